@@ -0,0 +1,151 @@
+"""
+asyncio API for image processing: load, apply and save as coroutines that
+run in executors, and a batch runner that overlaps the three stages.
+
+NumPy, PIL decoding and PNG/JPEG encoding release the GIL for their heavy
+parts, so threads are enough to keep the disk, the codec and the pipeline
+busy at the same time: while image N is being computed, image N+1 is
+decoded and image N-1 encoded.
+"""
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional
+
+from core.batch import BatchProcessor, BatchReport, BatchResult
+from core.image_data import ImageData
+
+
+async def load_async(path: str, executor: Executor = None) -> ImageData:
+    """ImageData.load(path) on `executor` (the loop's default if None)."""
+    return await asyncio.get_running_loop().run_in_executor(executor, ImageData.load, path)
+
+
+async def apply_async(pipeline, image_data: ImageData, executor: Executor = None) -> ImageData:
+    """pipeline.apply(image_data) on `executor` (the loop's default if None)."""
+    return await asyncio.get_running_loop().run_in_executor(executor, pipeline.apply, image_data)
+
+
+async def save_async(image_data: ImageData, path: str, executor: Executor = None) -> None:
+    """image_data.save(path) on `executor` (the loop's default if None)."""
+    def save():
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        image_data.save(path)
+    await asyncio.get_running_loop().run_in_executor(executor, save)
+
+
+class AsyncBatchProcessor(BatchProcessor):
+    """
+    Applies one pipeline to many images in one process, with decode,
+    compute and encode running concurrently as a three-stage pipeline.
+
+    Each stage has its own thread and works on one image at a time; the
+    stages are connected by queues of at most `queue_size` images, so a
+    slow stage makes the faster ones wait instead of piling up decoded
+    images in memory. At most 2 * queue_size + 3 images are alive at once.
+
+    Unlike BatchProcessor there is a single compute thread, so the pipeline
+    may hold state (e.g. an in-place BufferPool) and is not copied.
+    """
+
+    def __init__(self, pipeline, output_dir: str, queue_size: int = 2,
+                 output_extension: str = None):
+        """
+        Args:
+            pipeline: the OperationPipeline to apply to every image
+            output_dir: directory for the outputs (see BatchProcessor)
+            queue_size: images buffered between two stages
+            output_extension: e.g. '.png'; defaults to each input's extension
+        """
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be at least 1, got {queue_size}")
+        super().__init__(pipeline, output_dir, workers=1,
+                         output_extension=output_extension)
+        self.queue_size = queue_size
+
+    def run(self, input_paths: List[str], on_result=None) -> BatchReport:
+        """Synchronous entry point: asyncio.run(self.run_async(...))."""
+        return asyncio.run(self.run_async(input_paths, on_result))
+
+    async def run_async(self, input_paths: List[str], on_result=None) -> BatchReport:
+        """
+        Process every input; a failing image is reported, not raised.
+
+        Args:
+            input_paths: the images to process
+            on_result: optional callback called with each BatchResult as it
+                completes (on the event loop thread)
+
+        Returns:
+            BatchReport with one result per input, in input order
+        """
+        outputs = self.output_paths(input_paths)
+        results: List[Optional[BatchResult]] = [None] * len(input_paths)
+        decoded = asyncio.Queue(maxsize=self.queue_size)
+        computed = asyncio.Queue(maxsize=self.queue_size)
+        executors = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+                     for name in ('decode', 'compute', 'encode')]
+        decode_executor, compute_executor, encode_executor = executors
+
+        def fail(index: int, error: Exception) -> None:
+            finish(BatchResult(input_paths[index], outputs[index],
+                               f"{type(error).__name__}: {error}"), index)
+
+        def finish(result: BatchResult, index: int) -> None:
+            results[index] = result
+            if on_result:
+                on_result(result)
+
+        async def decode():
+            for index, path in enumerate(input_paths):
+                try:
+                    image = await self._run(decode_executor, self._load, path)
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                await decoded.put((index, image))
+            await decoded.put(None)
+
+        async def compute():
+            while (item := await decoded.get()) is not None:
+                index, image = item
+                try:
+                    result = await self._run(compute_executor, self._apply, image)
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                await computed.put((index, result))
+            await computed.put(None)
+
+        async def encode():
+            while (item := await computed.get()) is not None:
+                index, image = item
+                try:
+                    await self._run(encode_executor, self._save, image, outputs[index])
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                finish(BatchResult(input_paths[index], outputs[index]), index)
+
+        try:
+            await asyncio.gather(decode(), compute(), encode())
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+        return BatchReport(results)
+
+    @staticmethod
+    async def _run(executor: Executor, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+    # the three stages, run on their own threads
+
+    def _load(self, input_path: str) -> ImageData:
+        return ImageData.load(input_path)
+
+    def _apply(self, image_data: ImageData) -> ImageData:
+        return self.pipeline.apply(image_data)
+
+    def _save(self, image_data: ImageData, output_path: str) -> None:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        image_data.save(output_path)
@@ -0,0 +1,180 @@
+"""
+Batch processing: one operation list applied to many input images.
+
+The pipeline is built once in the parent process and shipped to every
+worker process when the pool starts, so each worker imports NumPy/PIL and
+constructs nothing per image.
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from core.image_data import ImageData
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.gif', '.webp')
+MANIFEST_EXTENSIONS = ('.txt', '.lst')
+
+# pipeline of the current worker process, set by _init_worker
+_worker_pipeline = None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one image of a batch run."""
+    input_path: str
+    output_path: str
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchReport:
+    """Outcome of a whole batch run."""
+    results: List[BatchResult] = field(default_factory=list)
+
+    @property
+    def failures(self) -> List[BatchResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.results) - len(self.failures)
+
+
+def collect_inputs(spec: str) -> List[str]:
+    """
+    Expand a batch input specification into a sorted list of image paths.
+
+    Args:
+        spec: a directory (its image files, not recursive), a manifest file
+            (.txt/.lst, one path per line, relative to the manifest), or a
+            glob pattern such as 'imgs/**/*.jpg'
+
+    Raises:
+        FileNotFoundError: If the specification matches no input
+    """
+    if os.path.isdir(spec):
+        paths = [os.path.join(spec, name) for name in os.listdir(spec)
+                 if name.lower().endswith(IMAGE_EXTENSIONS)]
+    elif os.path.isfile(spec) and spec.lower().endswith(MANIFEST_EXTENSIONS):
+        base_dir = os.path.dirname(os.path.abspath(spec))
+        with open(spec, 'r') as file:
+            lines = [line.strip() for line in file]
+        paths = [os.path.join(base_dir, line) for line in lines
+                 if line and not line.startswith('#')]
+    else:
+        paths = [path for path in glob.glob(spec, recursive=True)
+                 if os.path.isfile(path)]
+
+    if not paths:
+        raise FileNotFoundError(f"No input images found for: {spec}")
+    return sorted(paths)
+
+
+class BatchProcessor:
+    """Applies one pipeline to many images with a process pool."""
+
+    def __init__(self, pipeline, output_dir: str, workers: int = None,
+                 output_extension: str = None):
+        """
+        Args:
+            pipeline: the OperationPipeline to apply to every image
+            output_dir: directory for the outputs; the layout of the inputs
+                below their common directory is kept
+            workers: number of worker processes (defaults to os.cpu_count())
+            output_extension: e.g. '.png'; defaults to each input's extension
+        """
+        self.pipeline = pipeline
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.output_extension = output_extension
+
+    def output_paths(self, input_paths: List[str]) -> List[str]:
+        """
+        Map input paths to output paths below output_dir.
+
+        Raises:
+            ValueError: If two inputs map to the same output (e.g. a.jpg and
+                a.png with output_extension '.png'), or an output is one of
+                the inputs (e.g. output_dir is the input directory)
+        """
+        absolute = [os.path.abspath(path) for path in input_paths]
+        common_dir = os.path.commonpath([os.path.dirname(path) for path in absolute])
+        sources = {_resolved(path) for path in absolute}
+        written = {}
+        outputs = []
+        for input_path, path in zip(input_paths, absolute):
+            relative = os.path.relpath(path, common_dir)
+            if self.output_extension:
+                relative = os.path.splitext(relative)[0] + self.output_extension
+            output = os.path.join(self.output_dir, relative)
+            resolved = _resolved(output)
+            if resolved in sources:
+                raise ValueError(f"Output {output} would overwrite an input image")
+            if resolved in written:
+                raise ValueError(f"{written[resolved]} and {input_path} would both "
+                                 f"be written to {output}")
+            written[resolved] = input_path
+            outputs.append(output)
+        return outputs
+
+    def run(self, input_paths: List[str], on_result=None) -> BatchReport:
+        """
+        Process every input; a failing image is reported, not raised.
+
+        Args:
+            input_paths: the images to process
+            on_result: optional callback called with each BatchResult as it
+                completes
+
+        Returns:
+            BatchReport with one result per input, in input order
+        """
+        outputs = self.output_paths(input_paths)
+        results = [None] * len(input_paths)
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.pipeline,)) as pool:
+            futures = {pool.submit(_process_image, input_path, output_path): index
+                       for index, (input_path, output_path)
+                       in enumerate(zip(input_paths, outputs))}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # e.g. a worker process died
+                    result = BatchResult(input_paths[index], outputs[index],
+                                         f"{type(e).__name__}: {e}")
+                results[index] = result
+                if on_result:
+                    on_result(result)
+
+        return BatchReport(results)
+
+
+def _resolved(path: str) -> str:
+    """path with symlinks resolved, normalized for comparison."""
+    return os.path.normcase(os.path.realpath(path))
+
+
+def _init_worker(pipeline) -> None:
+    """Process pool initializer: keep the pipeline for every task."""
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+
+def _process_image(input_path: str, output_path: str) -> BatchResult:
+    """Load, process and save one image inside a worker process."""
+    try:
+        image = ImageData.load(input_path)
+        result = _worker_pipeline.apply(image)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        result.save(output_path)
+        return BatchResult(input_path, output_path)
+    except Exception as e:
+        return BatchResult(input_path, output_path, f"{type(e).__name__}: {e}")
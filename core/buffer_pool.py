@@ -0,0 +1,87 @@
+"""Reusable scratch and output arrays for in-place pipeline execution."""
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    Free lists of arrays keyed by (shape, dtype).
+
+    take() hands out an uninitialized array, reusing one given back with
+    give() when a buffer of the same shape and dtype is idle. A pipeline
+    runs every step on the same few image-sized shapes, so after the first
+    image (or strip) the steps allocate next to nothing.
+
+    Buffers are owned by whoever took them until they are given back;
+    giving back an array that is still in use elsewhere corrupts it.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        """
+        Args:
+            max_bytes: upper bound on the bytes held by idle buffers; arrays
+                given back beyond it are dropped
+        """
+        self.max_bytes = max_bytes
+        self._free: Dict[Tuple, List[np.ndarray]] = defaultdict(list)
+        self._idle_bytes = 0
+        self._lock = threading.Lock()
+        # reuse statistics
+        self.hits = 0
+        self.misses = 0
+        self.allocated_bytes = 0
+
+    def take(self, shape, dtype) -> np.ndarray:
+        """An uninitialized C-contiguous array of the given shape and dtype."""
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self.hits += 1
+                buffer = free.pop()
+                self._idle_bytes -= buffer.nbytes
+                return buffer
+            self.misses += 1
+        buffer = np.empty(key[0], dtype=key[1])
+        with self._lock:
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def take_like(self, arr: np.ndarray) -> np.ndarray:
+        """An uninitialized array of arr's shape and dtype."""
+        return self.take(arr.shape, arr.dtype)
+
+    def give(self, arr: np.ndarray) -> None:
+        """
+        Return an array for reuse. Views, read-only and memory-mapped
+        arrays are ignored, so it is safe to give back whatever a step
+        no longer needs.
+        """
+        if (arr is None or arr.base is not None or not arr.flags.writeable
+                or not arr.flags.c_contiguous or isinstance(arr, np.memmap)):
+            return
+        key = (arr.shape, arr.dtype)
+        with self._lock:
+            if self._idle_bytes + arr.nbytes > self.max_bytes:
+                return
+            if any(buffer is arr for buffer in self._free[key]):
+                return
+            self._free[key].append(arr)
+            self._idle_bytes += arr.nbytes
+
+    def clear(self) -> None:
+        """Drop every idle buffer."""
+        with self._lock:
+            self._free.clear()
+            self._idle_bytes = 0
+
+    @property
+    def idle_bytes(self) -> int:
+        return self._idle_bytes
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}(hits={self.hits}, misses={self.misses}, "
+                f"idle_bytes={self._idle_bytes})")
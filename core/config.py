@@ -1,6 +1,8 @@
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from core.precision import DEFAULT_PRECISION, working_dtype
 
 
 class Config:
@@ -8,14 +10,47 @@ class Config:
     Configuration class that holds all parsed data from a JSON configuration file.
     """
 
-    def __init__(self, config_file_path: str):
-        self.config_dict = self._load_from_file(config_file_path)
+    def __init__(self, config_file_path: str, batch: bool = False):
+        """
+        Args:
+            config_file_path: path to the JSON configuration file
+            batch: the inputs and outputs come from the batch options, so
+                only the operations are read and validated
+        """
+        self._setup(self._load_from_file(config_file_path), batch)
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any], batch: bool = False) -> 'Config':
+        """
+        Build and validate a configuration from an already parsed dictionary
+        (e.g. the body of a server request), with the same rules as a file.
+        """
+        config = cls.__new__(cls)
+        config._setup(dict(config_dict), batch)
+        return config
+
+    @staticmethod
+    def canonical_operations(operations_config: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The operations with lowercased types, so that configurations which
+        build the same pipeline serialize (json.dumps with sort_keys) alike.
+        """
+        return [dict(op, type=str(op.get('type', '')).lower())
+                for op in operations_config]
+
+    def _setup(self, config_dict: Dict[str, Any], batch: bool) -> None:
+        """Read the values of a parsed configuration and validate them."""
+        self.config_dict = config_dict
+        self.batch = batch
 
         # store configuration values as instance properties
-        self.input_path = self.config_dict['input']
+        self.input_path = self.config_dict.get('input') if batch else self.config_dict['input']
         self.output_path = self.config_dict.get('output', None)
         self.display = self.config_dict.get('display', False)
         self.operations_config = self.config_dict.get('operations', [])
+        self.precision = self.config_dict.get('precision', DEFAULT_PRECISION)
+        self.branches = self.config_dict.get('branches', [])
+        self.roi = self.config_dict.get('roi', None)
 
         self._validate()
 
@@ -28,11 +63,20 @@ class Config:
             'input': 'string (required, path to input image)',
             'output': 'string (optional, path to save output image)',
             'display': True,  # or False, depending on the actual boolean value
+            'precision': 'string (optional, working dtype: float32 (default), float64, uint16, uint8)',
+            'roi': [x, y, width, height],  # optional, compute only this rectangle (core.roi)
             'operations': [
                 {
                     'type': 'string (required)',
                     '<parameter_key>': '<parameter_value>'
                 }
+            ],
+            'branches': [  # optional, see core.fanout
+                {
+                    'operations': [...],  # applied after the parent's operations
+                    'output': 'string (optional)',
+                    'branches': [...]  # optional, nested
+                }
             ]
         }
         """
@@ -41,6 +85,10 @@ class Config:
 
     def _validate(self) -> None:
         """Validate the configuration according to requirements."""
+        if self.batch:
+            self._validate_operations()
+            return
+
         # Check for required input field
         if 'input' not in self.config_dict or not self.config_dict['input']:
             raise ValueError("Configuration must contain a valid 'input' path")
@@ -49,15 +97,58 @@ class Config:
             raise FileNotFoundError(f"Input file not found: {self.input_path}")
 
         # Check that at least output or display:true is specified
-        if not (self.output_path or self.display):
+        if not (self.output_path or self.display or self.branches):
             raise ValueError(
                 "Configuration must specify either an output path or display=true (or both)")
-
-        for op in self.operations_config:
+        if self.branches and self.display:
+            raise ValueError("display is not supported with 'branches'; every branch "
+                             "writes its 'output'")
+
+        if self.roi is not None:
+            if self.branches:
+                raise ValueError("'roi' is not supported with 'branches'")
+            self._validate_roi()
+        self._validate_operations()
+
+    def _validate_roi(self) -> None:
+        """The region must be [x, y, width, height]; it is checked against the image when run."""
+        if (not isinstance(self.roi, list) or len(self.roi) != 4
+                or not all(isinstance(value, int) and not isinstance(value, bool)
+                           for value in self.roi)):
+            raise ValueError("'roi' must be a list of four integers [x, y, width, height]")
+        if self.roi[0] < 0 or self.roi[1] < 0 or self.roi[2] < 1 or self.roi[3] < 1:
+            raise ValueError("'roi' must have x, y >= 0 and width, height >= 1")
+
+    def _validate_operations(self) -> None:
+        """Validate every operation entry and the working precision."""
+        working_dtype(self.precision)
+        self._validate_operation_list(self.operations_config)
+        outputs = [self.output_path] if self.output_path else []
+        self._validate_branches(self.branches, outputs)
+
+    def _validate_operation_list(self, operations_config: List[Dict[str, Any]]) -> None:
+        for op in operations_config:
             if 'type' not in op:
                 raise ValueError("Operation config must include 'type' field")
             self._validate_parameters(op)
 
+    def _validate_branches(self, branches: List[Dict[str, Any]], outputs: List[str]) -> None:
+        """Validate nested branches: every branch writes an output or has branches."""
+        if not isinstance(branches, list):
+            raise ValueError("'branches' must be a list")
+        for branch in branches:
+            if not isinstance(branch, dict):
+                raise ValueError("Every branch must be an object")
+            self._validate_operation_list(branch.get('operations', []))
+            output = branch.get('output')
+            if not (output or branch.get('branches')):
+                raise ValueError("Every branch must have an 'output' or 'branches'")
+            if output:
+                if output in outputs:
+                    raise ValueError(f"Output written by more than one branch: {output}")
+                outputs.append(output)
+            self._validate_branches(branch.get('branches', []), outputs)
+
     def _validate_parameters(self, operation_config: Dict[str, Any]) -> None:
         """
         Validate the parameters for the operation.
@@ -1,4 +1,10 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 """
 Convolver: low-level convolution routines for applying kernels to images.
@@ -12,55 +18,370 @@ Prompts that influenced this implementation:
   • “what should be the effect of kernel of ones?”  
 """
 
+logger = logging.getLogger(__name__)
+
 
 class Convolver:
     """
     Provides low-level convolution routines for applying kernels to images.
+
+    Backends (selected with the `method` argument of apply_kernel, or
+    globally through DEFAULT_METHOD):
+        - 'loop':       reference implementation, one Python iteration per pixel
+        - 'vectorized': whole rows of output pixels per NumPy call
+        - 'separable':  two 1D passes, for rank-1 kernels only
+        - 'fft':        pointwise product of spectra (numpy.fft.rfft2)
+        - 'auto':       cheapest of the above for the image/kernel sizes,
+                        according to the cost model in select_method
+
+    With workers > 1 (argument, or DEFAULT_WORKERS) the padded channels are
+    split into horizontal bands with kernel-radius halos, and the bands are
+    convolved on a thread pool straight into one preallocated output array.
     """
+    DEFAULT_METHOD = 'auto'
+    DEFAULT_WORKERS = 1
+    # relative singular value below which a kernel is treated as rank-1
+    SEPARABLE_TOL = 1e-10
+    # upper bound on the number of (pixel, tap) products held in memory at once
+    CHUNK_ELEMENTS = 1 << 22
+    # rows per band of sobel_magnitude (scratch arrays are a few bands large)
+    GRADIENT_BAND_ROWS = 64
+
+    # cost model, in approximate nanoseconds (see select_method)
+    DIRECT_TAP_COST = 5.5       # per output pixel and kernel tap
+    DIRECT_PIXEL_COST = 100.0   # per output pixel
+    SEPARABLE_TAP_COST = 1.8    # per output pixel and 1D tap
+    FFT_COST = 1.8              # per transformed pixel and log2(transform size)
+    FFT_CALL_COST = 50000.0     # per plane
+
+    # kernel spectra kept for reuse, keyed by kernel and transform shape
+    SPECTRUM_CACHE_SIZE = 16
+    _spectrum_cache = OrderedDict()
+    _spectrum_lock = threading.Lock()
 
     @staticmethod
-    def apply_kernel(image: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    def apply_kernel(image: np.ndarray, kernel: np.ndarray,
+                     method: str = None, workers: int = None,
+                     out: np.ndarray = None) -> np.ndarray:
         """
         Convolves the given image with the specified kernel.
 
         Args:
             image: numpy array of shape (H, W) or (H, W, C)
             kernel: 2D numpy array of shape (kernel_h, kernel_w)
+            method: name of the backend to use (defaults to DEFAULT_METHOD)
+            workers: number of threads (defaults to DEFAULT_WORKERS)
+            out: optional array of the image's shape to write the result
+                into; may be `image` itself (see _apply_per_channel)
+
+        Returns:
+            Convolved image array of the same shape as input.
+        """
+        method = Convolver.select_method(kernel, image.shape[:2], method)
+        if method == 'separable':
+            factors = Convolver._split_separable(kernel)
+            if factors is None:
+                raise ValueError("Kernel is not separable (rank > 1)")
+            return Convolver.apply_separable(image, *factors, workers=workers, out=out)
+
+        convolve = Convolver._get_backend(method)
+        return Convolver._apply_per_channel(
+            image, kernel.shape,
+            lambda padded, band_out: convolve(padded, kernel, out=band_out),
+            workers=workers,
+            # FFT round-off depends on the transform size: whole planes only
+            split_rows=(method != 'fft'), out=out)
+
+    @staticmethod
+    def apply_separable(image: np.ndarray, column: np.ndarray,
+                        row: np.ndarray, workers: int = None,
+                        out: np.ndarray = None) -> np.ndarray:
+        """
+        Convolves the image with the separable kernel outer(column, row),
+        as a vertical 1D pass followed by a horizontal 1D pass.
+
+        Costs kernel_h + kernel_w multiply-adds per pixel instead of
+        kernel_h * kernel_w, with the same edge padding as apply_kernel.
+
+        Args:
+            image: numpy array of shape (H, W) or (H, W, C)
+            column: 1D array of length kernel_h (vertical factor)
+            row: 1D array of length kernel_w (horizontal factor)
+            workers: number of threads (defaults to DEFAULT_WORKERS)
+            out: optional output array, as in apply_kernel
 
         Returns:
             Convolved image array of the same shape as input.
         """
+        column = np.asarray(column).ravel()
+        row = np.asarray(row).ravel()
+        return Convolver._apply_per_channel(
+            image, (column.size, row.size),
+            lambda padded, band_out: Convolver._convolve_separable(
+                padded, column, row, out=band_out),
+            workers=workers, out=out)
+
+    @staticmethod
+    def apply_box(image: np.ndarray, width: int, height: int,
+                  workers: int = None, out: np.ndarray = None) -> np.ndarray:
+        """
+        Box blur (mean over a height x width window) using running sums.
+
+        Equivalent to apply_kernel with a normalized ones kernel of shape
+        (height, width), including the edge padding, but the cost per pixel
+        does not depend on the window size.
+
+        Args:
+            image: numpy array of shape (H, W) or (H, W, C)
+            width: window width in pixels (odd)
+            height: window height in pixels (odd)
+            workers: number of threads (defaults to DEFAULT_WORKERS)
+            out: optional output array, as in apply_kernel
+
+        Returns:
+            Blurred image array of the same shape and dtype as input.
+        """
+        return Convolver._apply_per_channel(
+            image, (height, width),
+            lambda padded, band_out: Convolver._box_blur_2d(
+                padded, height, width, out=band_out),
+            workers=workers,
+            # running sums of floats round differently from another start row
+            split_rows=np.issubdtype(image.dtype, np.integer), out=out)
+
+    @staticmethod
+    def sobel_magnitude(image: np.ndarray, workers: int = None,
+                        out: np.ndarray = None) -> np.ndarray:
+        """
+        Sobel gradient magnitude sqrt(Gx^2 + Gy^2) of the image's grayscale
+        (mean of the channels), in one pass over a single padded copy.
+
+        Both Sobel kernels are products of a [1, 2, 1] smoothing and a
+        [-1, 0, 1] difference, so each band of rows is smoothed once
+        vertically (Gx is its column difference) and once horizontally (Gy
+        is its row difference), from the same reads of the padded band.
+        Bands of GRADIENT_BAND_ROWS rows keep the scratch arrays small.
+
+        Args:
+            image: numpy array of shape (H, W) or (H, W, C)
+            workers: number of threads (defaults to DEFAULT_WORKERS)
+            out: optional (H, W) array of the result dtype to write into
+
+        Returns:
+            (H, W) magnitude; float32 for float32 input, else float64.
+        """
+        if image.ndim not in (2, 3):
+            raise ValueError("Image must be 2D or 3D array")
+        dtype = np.float32 if image.dtype == np.float32 else np.float64
+        height, width = image.shape[:2]
+        if out is None:
+            out = np.empty((height, width), dtype=dtype)
+        elif out.shape != (height, width) or out.dtype != dtype:
+            raise ValueError(f"Output {out.shape} {out.dtype} does not match "
+                             f"{(height, width)} {np.dtype(dtype)}")
+
+        # grayscale written straight into the interior of the edge-padded plane
+        padded = np.empty((height + 2, width + 2), dtype=dtype)
+        if image.ndim == 3:
+            np.mean(image, axis=2, dtype=dtype, out=padded[1:-1, 1:-1])
+        else:
+            padded[1:-1, 1:-1] = image
+        padded[0, 1:-1] = padded[1, 1:-1]
+        padded[-1, 1:-1] = padded[-2, 1:-1]
+        padded[:, 0] = padded[:, 1]
+        padded[:, -1] = padded[:, -2]
+
+        def gradient_band(start):
+            stop = min(start + Convolver.GRADIENT_BAND_ROWS, height)
+            band = padded[start:stop + 2]
+            rows = stop - start
+            # vertical smoothing -> Gx = difference of its columns 2 apart
+            smooth = np.add(band[:-2], band[2:])
+            smooth += band[1:-1]
+            smooth += band[1:-1]
+            gradient_x = np.subtract(smooth[:, 2:], smooth[:, :-2])
+            # horizontal smoothing -> Gy = difference of its rows 2 apart
+            smooth = np.add(band[:, :-2], band[:, 2:])
+            smooth += band[:, 1:-1]
+            smooth += band[:, 1:-1]
+            gradient_y = np.subtract(smooth[2:rows + 2], smooth[:rows])
+            np.hypot(gradient_x, gradient_y, out=out[start:stop])
+
+        starts = range(0, height, Convolver.GRADIENT_BAND_ROWS)
+        workers = max(1, workers or Convolver.DEFAULT_WORKERS)
+        if workers == 1:
+            for start in starts:
+                gradient_band(start)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(gradient_band, starts))
+        return out
+
+    @staticmethod
+    def _apply_per_channel(image: np.ndarray, kernel_shape, convolve_plane,
+                           workers: int = None, split_rows: bool = True,
+                           out: np.ndarray = None) -> np.ndarray:
+        """
+        Edge-pads every channel of the image and convolves it.
+
+        Every padded channel is cut into horizontal bands that overlap by
+        kernel_h - 1 rows (the halo), and each band writes into its own rows
+        of the preallocated output. Bands are independent, so they run on a
+        thread pool when workers > 1; NumPy releases the GIL in the heavy
+        array operations.
+
+        Every channel is padded (copied) before any output of that channel
+        is written, so `out` may be the input image itself.
+
+        Args:
+            image: numpy array of shape (H, W) or (H, W, C)
+            kernel_shape: (kernel_h, kernel_w), used for the padding size
+            convolve_plane: callable (padded 2D band, 2D output view) -> None
+            workers: number of threads (defaults to DEFAULT_WORKERS)
+            split_rows: if False, only whole channels are run in parallel
+            out: optional array of the image's shape and dtype to write into
+
+        Returns:
+            Convolved image array of the same shape as input (`out` if given).
+        """
+        if image.ndim not in (2, 3):
+            raise ValueError("Image must be 2D or 3D array")
+        if out is not None and (out.shape != image.shape or out.dtype != image.dtype):
+            raise ValueError(f"Output {out.shape} {out.dtype} does not match "
+                             f"image {image.shape} {image.dtype}")
+        workers = max(1, workers or Convolver.DEFAULT_WORKERS)
+
         # Ensure kernel dimensions are odd
-        kernel_h, kernel_w = kernel.shape
+        kernel_h, kernel_w = kernel_shape
         pad_h = kernel_h // 2
         pad_w = kernel_w // 2
 
-        # Pad image with edge padding
-        if image.ndim == 2:  # 2D = grayscale img
-            padded = np.pad(image, ((pad_h, pad_h), (pad_w, pad_w)),
+        # 2D = grayscale img, 3D = colored img; both handled as (H, W, C)
+        planes = image[:, :, np.newaxis] if image.ndim == 2 else image
+        if out is None:
+            output = np.empty(planes.shape, dtype=image.dtype)
+        else:
+            output = out[:, :, np.newaxis] if out.ndim == 2 else out
+        height = planes.shape[0]
+        n_bands = workers if split_rows else 1
+        band_h = -(-height // n_bands)
+
+        def convolve_channel_bands(c):
+            # Pad image with edge padding
+            padded = np.pad(planes[:, :, c], ((pad_h, pad_h), (pad_w, pad_w)),
                             mode='edge')
-            return Convolver._convolve_2d(padded, kernel)
-
-        elif image.ndim == 3:  # 3D = colored img
-            channels = []
-            for c in range(image.shape[2]):
-                channel = image[:, :, c]
-                padded = np.pad(channel, ((pad_h, pad_h), (pad_w, pad_w)),
-                                mode='edge')
-                convolved = Convolver._convolve_2d(padded, kernel)
-                channels.append(convolved)
-            return np.stack(channels, axis=2)
+            return [(padded[start:min(start + band_h, height) + kernel_h - 1],
+                     output[start:start + band_h, :, c])
+                    for start in range(0, height, band_h)]
+
+        if workers == 1:
+            for c in range(planes.shape[2]):
+                for band, band_out in convolve_channel_bands(c):
+                    convolve_plane(band, band_out)
         else:
-            raise ValueError("Image must be 2D or 3D array")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                bands = [band for channel_bands in
+                         pool.map(convolve_channel_bands, range(planes.shape[2]))
+                         for band in channel_bands]
+                # consume the iterator to surface worker exceptions
+                list(pool.map(lambda task: convolve_plane(*task), bands))
+
+        if out is not None:
+            return out
+        return output[:, :, 0] if image.ndim == 2 else output
+
+    @staticmethod
+    def select_method(kernel: np.ndarray, image_shape, method: str = None) -> str:
+        """
+        Resolve 'auto' (or no method) to a concrete backend.
+
+        Estimates the cost of convolving one (H, W) plane with every
+        applicable backend and picks the cheapest:
+            direct:    H * W * (kernel_h * kernel_w * DIRECT_TAP_COST + DIRECT_PIXEL_COST)
+            separable: H * W * (kernel_h + kernel_w) * SEPARABLE_TAP_COST  (rank-1 only)
+            fft:       N * log2(N) * FFT_COST + FFT_CALL_COST, N = transform size
+        The decision is logged at INFO level.
+
+        Args:
+            kernel: 2D kernel array
+            image_shape: (H, W) of the image planes
+            method: requested method; anything but 'auto'/None is returned as is
+
+        Returns:
+            The backend name: 'vectorized', 'separable' or 'fft'
+        """
+        method = method or Convolver.DEFAULT_METHOD
+        if method != 'auto':
+            return method
+
+        height, width = image_shape[:2]
+        kernel_h, kernel_w = kernel.shape
+        pixels = height * width
+        costs = {
+            'vectorized': pixels * (kernel_h * kernel_w * Convolver.DIRECT_TAP_COST
+                                    + Convolver.DIRECT_PIXEL_COST),
+        }
+        if Convolver._split_separable(kernel) is not None:
+            costs['separable'] = pixels * (kernel_h + kernel_w) * Convolver.SEPARABLE_TAP_COST
+        fft_h, fft_w = Convolver._fft_shape((height + kernel_h - 1, width + kernel_w - 1))
+        fft_size = fft_h * fft_w
+        costs['fft'] = (fft_size * np.log2(max(fft_size, 2)) * Convolver.FFT_COST
+                        + Convolver.FFT_CALL_COST)
+
+        selected = min(costs, key=costs.get)
+        logger.info("Convolver: '%s' backend for %dx%d image, %dx%d kernel "
+                    "(estimated ms: %s)", selected, height, width, kernel_h, kernel_w,
+                    ", ".join(f"{name}={cost / 1e6:.2f}" for name, cost in costs.items()))
+        return selected
+
+    @staticmethod
+    def _split_separable(kernel: np.ndarray):
+        """
+        Split a rank-1 kernel into (column, row) with outer(column, row) == kernel.
+
+        The rank is checked through the singular values of the kernel; the
+        factors themselves are read off the row and column of the largest
+        entry, which keeps them exact for integer kernels such as Sobel.
+
+        Returns:
+            (column, row) float arrays, or None if the kernel is not rank-1
+        """
+        kernel = np.asarray(kernel, dtype=float)
+        if kernel.ndim != 2 or not np.any(kernel):
+            return None
+        singular_values = np.linalg.svd(kernel, compute_uv=False)
+        if np.any(singular_values[1:] > Convolver.SEPARABLE_TOL * singular_values[0]):
+            return None
+
+        i, j = np.unravel_index(np.argmax(np.abs(kernel)), kernel.shape)
+        column = kernel[:, j].copy()
+        row = kernel[i, :] / kernel[i, j]
+        return column, row
+
+    @staticmethod
+    def _get_backend(method: str = None):
+        """
+        Resolve a backend name to its 2D convolution routine.
+
+        Raises:
+            ValueError: If the backend name is unknown
+        """
+        method = method or Convolver.DEFAULT_METHOD
+        backend = Convolver._backends.get(method)
+        if backend is None:
+            raise ValueError(f"Unknown convolution method: {method}")
+        return backend.__func__
 
     @staticmethod
-    def _convolve_2d(padded_img: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    def _convolve_2d(padded_img: np.ndarray, kernel: np.ndarray,
+                     out: np.ndarray = None) -> np.ndarray:
         """
         Helper for 2D convolution on a padded image.
 
         Args:
             padded_img: padded 2D array
             kernel: 2D kernel array
+            out: optional output array (defaults to a new one)
 
         Returns:
             2D convolved array cropped to original size
@@ -69,7 +390,7 @@ class Convolver:
         kernel_h, kernel_w = kernel.shape
         output_h = H - kernel_h + 1
         output_w = W - kernel_w + 1
-        result = np.zeros((output_h, output_w), dtype=padded_img.dtype)
+        result = Convolver._output_array(out, (output_h, output_w), padded_img.dtype)
 
         # (optional) Flip kernel for convolution
         flipped_kernel = np.flipud(np.fliplr(kernel))
@@ -81,3 +402,222 @@ class Convolver:
                 result[i, j] = np.sum(region * flipped_kernel)
 
         return result
+
+    @staticmethod
+    def _convolve_2d_vectorized(padded_img: np.ndarray, kernel: np.ndarray,
+                                out: np.ndarray = None) -> np.ndarray:
+        """
+        Vectorized equivalent of _convolve_2d.
+
+        Builds a (rows, W, kernel_h * kernel_w) view of the kernel windows
+        for a band of output rows and reduces it along the last axis. The
+        products and their summation order are the same as in the per-pixel
+        loop, so the result is bit-identical to _convolve_2d.
+
+        Args:
+            padded_img: padded 2D array
+            kernel: 2D kernel array
+            out: optional output array (defaults to a new one)
+
+        Returns:
+            2D convolved array cropped to original size
+        """
+        H, W = padded_img.shape
+        kernel_h, kernel_w = kernel.shape
+        output_h = H - kernel_h + 1
+        output_w = W - kernel_w + 1
+        result = Convolver._output_array(out, (output_h, output_w), padded_img.dtype)
+
+        flipped_kernel = np.flipud(np.fliplr(kernel))
+        windows = sliding_window_view(padded_img, (kernel_h, kernel_w))
+
+        # process bands of rows to bound the size of the products buffer
+        taps = kernel_h * kernel_w
+        band = max(1, Convolver.CHUNK_ELEMENTS // max(1, output_w * taps))
+        for start in range(0, output_h, band):
+            stop = min(start + band, output_h)
+            products = windows[start:stop] * flipped_kernel
+            sums = products.reshape(stop - start, output_w, taps).sum(axis=-1)
+            np.copyto(result[start:stop], sums, casting='unsafe')
+
+        return result
+
+    @staticmethod
+    def _convolve_separable(padded_img: np.ndarray, column: np.ndarray,
+                            row: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Separable 2D convolution on a padded image: a vertical pass with
+        `column` followed by a horizontal pass with `row`.
+
+        Args:
+            padded_img: padded 2D array
+            column: 1D vertical kernel factor
+            row: 1D horizontal kernel factor
+            out: optional output array (defaults to a new one)
+
+        Returns:
+            2D convolved array cropped to original size
+        """
+        H, W = padded_img.shape
+        output_h = H - column.size + 1
+        output_w = W - row.size + 1
+        acc_dtype = np.result_type(padded_img.dtype, column.dtype, row.dtype)
+
+        # vertical pass (kernel flipped, as in _convolve_2d)
+        vertical = np.zeros((output_h, W), dtype=acc_dtype)
+        scratch = np.empty_like(vertical)
+        for t, weight in enumerate(column[::-1]):
+            np.multiply(padded_img[t:t + output_h], weight, out=scratch)
+            vertical += scratch
+
+        # horizontal pass
+        horizontal = np.zeros((output_h, output_w), dtype=acc_dtype)
+        scratch = scratch[:, :output_w]
+        for t, weight in enumerate(row[::-1]):
+            np.multiply(vertical[:, t:t + output_w], weight, out=scratch)
+            horizontal += scratch
+
+        result = Convolver._output_array(out, (output_h, output_w), padded_img.dtype)
+        np.copyto(result, horizontal, casting='unsafe')
+        return result
+
+    @staticmethod
+    def _box_blur_2d(padded_img: np.ndarray, box_h: int, box_w: int,
+                     out: np.ndarray = None) -> np.ndarray:
+        """
+        Box blur of a padded image: window sums divided by the window area.
+
+        Returns:
+            2D array of window means in the padded image dtype
+        """
+        sums = Convolver._box_sum_2d(padded_img, box_h, box_w)
+        sums /= box_h * box_w
+        result = Convolver._output_array(out, sums.shape, padded_img.dtype)
+        np.copyto(result, sums, casting='unsafe')
+        return result
+
+    @staticmethod
+    def _box_sum_2d(padded_img: np.ndarray, box_h: int, box_w: int) -> np.ndarray:
+        """
+        Sum over every box_h x box_w window of a padded image, computed with
+        one cumulative sum per axis (a separable summed-area table).
+
+        For integer images the sums are exact as long as they fit in the
+        float64 mantissa (2**53), i.e. any realistic 8/16-bit image.
+
+        Args:
+            padded_img: padded 2D array
+            box_h: window height
+            box_w: window width
+
+        Returns:
+            2D float64 array of window sums, cropped to original size
+        """
+        # vertical running sum, with a leading zero row
+        H, W = padded_img.shape
+        running = np.zeros((H + 1, W), dtype=np.float64)
+        np.cumsum(padded_img, axis=0, dtype=np.float64, out=running[1:])
+        vertical = running[box_h:] - running[:-box_h]
+
+        # horizontal running sum over the vertical sums
+        output_h = vertical.shape[0]
+        running = np.zeros((output_h, W + 1), dtype=np.float64)
+        np.cumsum(vertical, axis=1, out=running[:, 1:])
+        return running[:, box_w:] - running[:, :-box_w]
+
+    @staticmethod
+    def _convolve_2d_fft(padded_img: np.ndarray, kernel: np.ndarray,
+                         out: np.ndarray = None) -> np.ndarray:
+        """
+        FFT-based 2D convolution on a padded image.
+
+        Both inputs are transformed at a 5-smooth size no smaller than the
+        padded image, so the circular convolution does not wrap into the
+        valid region. The kernel spectrum is cached per transform shape.
+
+        Args:
+            padded_img: padded 2D array
+            kernel: 2D kernel array
+            out: optional output array (defaults to a new one)
+
+        Returns:
+            2D convolved array cropped to original size
+        """
+        H, W = padded_img.shape
+        kernel_h, kernel_w = kernel.shape
+        output_h = H - kernel_h + 1
+        output_w = W - kernel_w + 1
+        fft_shape = Convolver._fft_shape((H, W))
+
+        spectrum = np.fft.rfft2(padded_img, s=fft_shape)
+        spectrum *= Convolver._kernel_spectrum(kernel, fft_shape)
+        full = np.fft.irfft2(spectrum, s=fft_shape)
+        result = full[kernel_h - 1:kernel_h - 1 + output_h,
+                      kernel_w - 1:kernel_w - 1 + output_w]
+
+        if np.issubdtype(padded_img.dtype, np.integer):
+            # drop transform round-off before truncating, like the direct sum
+            result = np.round(result, 6)
+        output = Convolver._output_array(out, (output_h, output_w), padded_img.dtype)
+        np.copyto(output, result, casting='unsafe')
+        return output
+
+    @staticmethod
+    def _output_array(out: np.ndarray, shape, dtype) -> np.ndarray:
+        """Return `out` after checking its shape, or a new zeroed array."""
+        if out is None:
+            return np.zeros(shape, dtype=dtype)
+        if out.shape != tuple(shape):
+            raise ValueError(f"Output shape {out.shape} does not match {tuple(shape)}")
+        return out
+
+    @staticmethod
+    def _kernel_spectrum(kernel: np.ndarray, fft_shape) -> np.ndarray:
+        """
+        Return rfft2 of the kernel at the given transform shape, from the
+        LRU cache of the last SPECTRUM_CACHE_SIZE spectra when possible.
+        """
+        kernel = np.ascontiguousarray(kernel, dtype=float)
+        key = (kernel.shape, kernel.tobytes(), tuple(fft_shape))
+        with Convolver._spectrum_lock:
+            spectrum = Convolver._spectrum_cache.get(key)
+            if spectrum is not None:
+                Convolver._spectrum_cache.move_to_end(key)
+                return spectrum
+
+        spectrum = np.fft.rfft2(kernel, s=fft_shape)
+        # shared by every thread that convolves with this kernel
+        spectrum.setflags(write=False)
+        with Convolver._spectrum_lock:
+            Convolver._spectrum_cache[key] = spectrum
+            while len(Convolver._spectrum_cache) > Convolver.SPECTRUM_CACHE_SIZE:
+                Convolver._spectrum_cache.popitem(last=False)
+        return spectrum
+
+    @staticmethod
+    def _fft_shape(shape):
+        """Smallest 5-smooth transform shape not smaller than `shape`."""
+        return tuple(Convolver._next_fast_len(n) for n in shape)
+
+    @staticmethod
+    def _next_fast_len(n: int) -> int:
+        """Smallest integer >= n whose only prime factors are 2, 3 and 5."""
+        best = 1 << max(0, int(n - 1).bit_length())
+        power5 = 1
+        while power5 < best:
+            power35 = power5
+            while power35 < best:
+                # smallest power of two bringing power35 up to at least n
+                candidate = power35
+                while candidate < n:
+                    candidate *= 2
+                best = min(best, candidate)
+                power35 *= 3
+            power5 *= 5
+        return best
+
+    _backends = {
+        'loop': _convolve_2d,
+        'vectorized': _convolve_2d_vectorized,
+        'fft': _convolve_2d_fft,
+    }
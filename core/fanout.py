@@ -0,0 +1,157 @@
+"""
+Fan-out execution: many variants of one image from a single decode.
+
+A fan-out configuration is a tree. The top-level 'operations' run first,
+then every entry of 'branches' continues from that result with its own
+'operations', writes its 'output' and may branch again:
+
+    {"input": "upload.jpg",
+     "operations": [{"type": "brightness", "value": 1.1}],
+     "branches": [
+        {"operations": [{"type": "box", "width": 5, "height": 5}], "output": "soft.png",
+         "branches": [{"operations": [{"type": "box", "width": 9, "height": 9}],
+                       "output": "softer.png"}]},
+        {"operations": [{"type": "sobel"}], "output": "edges.png"}]}
+
+Every output is a variant: the operations on its path from the root. The
+variants are merged into a prefix tree by operation config, so leading
+operations shared by several variants run once, whether they are written
+as a common parent or repeated in every branch. Branches read their
+parent's result directly (operations never modify their input), and an
+intermediate result is dropped once its last branch has been rendered.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.config import Config
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import DEFAULT_PRECISION
+
+
+@dataclass
+class FanoutNode:
+    """A run of operations applied to the parent's result, and what follows it."""
+    operations_config: List[Dict[str, Any]] = field(default_factory=list)
+    # outputs that are the result of this node
+    outputs: List[str] = field(default_factory=list)
+    children: List['FanoutNode'] = field(default_factory=list)
+    pipeline: Optional[OperationPipeline] = None
+
+
+class FanoutPlan:
+    """Prefix tree of the variants of a fan-out configuration."""
+
+    def __init__(self, root: FanoutNode, precision: str = DEFAULT_PRECISION,
+                 variant_operations: int = 0):
+        """
+        Args:
+            root: the tree; the root has no operations of its own
+            precision: working precision the source is converted to once
+            variant_operations: operations the variants would run one by one
+        """
+        self.root = root
+        self.precision = precision
+        self.variant_operations = variant_operations
+        self._converter = OperationPipeline([], options={'precision': precision})
+
+    @staticmethod
+    def from_config(config: Config, fuse: bool = True, lut: bool = True,
+                    precision: str = None) -> 'FanoutPlan':
+        """
+        Build the plan of a validated Config (see Config 'branches').
+
+        Args:
+            config: the configuration
+            fuse, lut: as in OperationPipeline.create_from_config, applied
+                within every run of unshared operations
+            precision: overrides the config's precision
+        """
+        precision = precision or config.precision
+        variants = list(_variants(config.operations_config, config.output_path,
+                                  config.branches))
+        if not variants:
+            raise ValueError("Fan-out configuration has no outputs")
+
+        # prefix tree with one node per operation
+        trie = _trie_node(None)
+        for operations, output in variants:
+            node = trie
+            for operation in operations:
+                key = json.dumps(Config.canonical_operations([operation])[0], sort_keys=True)
+                node = node['children'].setdefault(key, _trie_node(operation))
+            node['outputs'].append(output)
+
+        root = FanoutNode(outputs=trie['outputs'],
+                          children=[_compress(child) for child in trie['children'].values()])
+        for node in _walk(root):
+            if node.operations_config:
+                node.pipeline = OperationPipeline.create_from_config(
+                    node.operations_config, fuse=fuse, lut=lut, precision=precision)
+        return FanoutPlan(root, precision,
+                          variant_operations=sum(len(operations) for operations, _ in variants))
+
+    @property
+    def operation_count(self) -> int:
+        """Operations run per image (each shared prefix counted once)."""
+        return sum(len(node.operations_config) for node in _walk(self.root))
+
+    @property
+    def outputs(self) -> List[str]:
+        return [output for node in _walk(self.root) for output in node.outputs]
+
+    def render(self, image_data: ImageData) -> Iterator[Tuple[str, ImageData]]:
+        """
+        Yield (output path, result) for every variant, depth first. A
+        result stays valid after the generator moves on; it may share its
+        array with other results and must not be modified.
+        """
+        yield from self._render(self.root, self._converter.to_working(image_data))
+
+    def run(self, image_data: ImageData) -> List[str]:
+        """Render every variant of image_data and save it; returns the outputs written."""
+        written = []
+        for output, result in self.render(image_data):
+            os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+            result.save(output)
+            written.append(output)
+        return written
+
+    def _render(self, node: FanoutNode, image_data: ImageData) -> Iterator[Tuple[str, ImageData]]:
+        if node.pipeline is not None:
+            image_data = node.pipeline.apply(image_data)
+        for output in node.outputs:
+            yield output, image_data
+        for child in node.children:
+            yield from self._render(child, image_data)
+
+
+def _variants(operations, output, branches) -> Iterator[Tuple[List[Dict[str, Any]], str]]:
+    """(operations from the root, output) of every output in the tree."""
+    if output:
+        yield list(operations), output
+    for branch in branches or []:
+        yield from _variants(list(operations) + branch.get('operations', []),
+                             branch.get('output'), branch.get('branches'))
+
+
+def _trie_node(operation) -> Dict[str, Any]:
+    return {'operation': operation, 'outputs': [], 'children': {}}
+
+
+def _compress(trie_node) -> FanoutNode:
+    """FanoutNode for a trie node and the chain of single children below it."""
+    operations = [trie_node['operation']]
+    while not trie_node['outputs'] and len(trie_node['children']) == 1:
+        trie_node = next(iter(trie_node['children'].values()))
+        operations.append(trie_node['operation'])
+    return FanoutNode(operations, list(trie_node['outputs']),
+                      [_compress(child) for child in trie_node['children'].values()])
+
+
+def _walk(node: FanoutNode) -> Iterator[FanoutNode]:
+    yield node
+    for child in node.children:
+        yield from _walk(child)
@@ -1,13 +1,22 @@
-from PIL import Image
 import numpy as np
-import matplotlib.pyplot as plt
+
+from core.precision import convert
+from core.raw_image import is_raw_path, open_raw, write_raw
 
 
 class ImageData:
     """
     Core class for handling image I/O and display.
     Provides load, save, and show functionality.
+
+    PIL and matplotlib are imported on first use, so importing this module
+    (and everything that depends on it) only costs NumPy.
+
+    Paths ending in core.raw_image.RAW_EXTENSION are stored uncompressed in
+    the array's own dtype and loaded as a memory map (no decode, no copy).
     """
+    # reduction factors accepted by load(scale=...)
+    PREVIEW_SCALES = (1, 2, 4, 8)
 
     def __init__(self, image_data):
         """
@@ -18,33 +27,146 @@ class ImageData:
         """
         if isinstance(image_data, np.ndarray):
             self.image = image_data
-        elif isinstance(image_data, Image.Image):
+            return
+
+        from PIL import Image
+
+        if isinstance(image_data, Image.Image):
             self.image = np.array(image_data)
         else:
             raise TypeError(f"Expected PIL Image or numpy ndarray, got {type(image_data)}")
 
     @staticmethod
-    def load(path: str) -> 'ImageData':
+    def load(path: str, scale: int = 1) -> 'ImageData':
         """
         Load an image from a file and return an ImageData instance.
+
+        Args:
+            path: the image file
+            scale: one of PREVIEW_SCALES; load at 1/scale of the size in
+                each dimension (rounded up). JPEGs are decoded directly at
+                the reduced size (DCT scaling), other formats are decoded
+                and box-reduced, raw images are subsampled.
         """
-        img = Image.open(path).convert('RGB')
+        if scale not in ImageData.PREVIEW_SCALES:
+            raise ValueError(f"Scale must be one of {ImageData.PREVIEW_SCALES}, got {scale}")
+        if is_raw_path(path):
+            image_data = ImageData.open_raw(path)
+            if scale > 1:
+                image_data.image = image_data.image[::scale, ::scale]
+            return image_data
+
+        from PIL import Image
+
+        img = Image.open(path)
+        if scale > 1:
+            width = img.width
+            # JPEG only: decodes at the largest DCT scale (1/2, 1/4, 1/8) that
+            # keeps the image at least 1/scale of its size
+            img.draft('RGB', (-(-img.width // scale), -(-img.height // scale)))
+            remaining = scale // round(width / img.width)
+            if remaining > 1:
+                img = img.reduce(remaining)
+        img = img.convert('RGB')
         return ImageData(img)
 
+    @staticmethod
+    def from_bytes(data: bytes) -> 'ImageData':
+        """
+        Decode an encoded image (PNG, JPEG, ... file contents) into RGB.
+        """
+        import io
+        from PIL import Image
+
+        img = Image.open(io.BytesIO(data)).convert('RGB')
+        return ImageData(img)
+
+    def to_bytes(self, image_format: str = 'PNG') -> bytes:
+        """
+        Encode the image like save() does, but into memory.
+
+        Args:
+            image_format: a PIL format name, e.g. 'PNG' or 'JPEG'
+        """
+        import io
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.fromarray(convert(self.image, np.uint8)).save(buffer, format=image_format)
+        return buffer.getvalue()
+
     def save(self, path: str):
         """
         Save the image to the specified path.
+
+        Encoded formats store 8 bits per channel: this is where an image
+        held in a working precision (core.precision) is finally converted.
+        Raw files keep the dtype.
         """
-        img = Image.fromarray(self.image.astype(np.uint8))
+        if is_raw_path(path):
+            self.save_raw(path)
+            return
+
+        from PIL import Image
+
+        img = Image.fromarray(convert(self.image, np.uint8))
         img.save(path)
 
-    def show(self):
+    @staticmethod
+    def open_raw(path: str, mode: str = 'r') -> 'ImageData':
+        """
+        Open a raw image file as a memory map; pages are read on access.
+
+        Args:
+            path: a file written by save_raw
+            mode: 'r' (read-only), 'r+' (writes go to the file) or 'c'
+                (copy-on-write)
+
+        Returns:
+            ImageData over the mapped array, with the channels in RGB order
+            (a BGR file is returned as a reversed view, still without a copy)
+        """
+        array, header = open_raw(path, mode)
+        if header.get('channel_order') == 'BGR':
+            array = array[:, :, ::-1]
+        return ImageData(array)
+
+    def save_raw(self, path: str, channel_order: str = None):
+        """
+        Save the image uncompressed, keeping its dtype (see core.raw_image).
+
+        Args:
+            path: the file to write
+            channel_order: stored in the header; by default 'L', 'RGB' or
+                'RGBA' depending on the number of channels
+        """
+        write_raw(path, self.image, channel_order)
+
+    def show(self, block: bool = True):
         """
         Display the image using matplotlib.
+
+        matplotlib is imported here rather than at module load: pyplot takes
+        hundreds of milliseconds to import and sets up a GUI backend, which
+        headless runs (batch workers, save-only configs) never need.
+
+        Args:
+            block: wait until the window is closed; with False the image is
+                drawn into one reused window and show returns right away
+                (used by the --watch loop to redraw after every change)
         """
-        plt.imshow(self.image)
+        import matplotlib.pyplot as plt
+
+        if not block:
+            plt.figure(ImageData.__name__)
+            plt.clf()
+        # float images would be read as [0, 1]
+        plt.imshow(convert(self.image, np.uint8))
         plt.axis('off')
-        plt.show()
+        if block:
+            plt.show()
+        else:
+            plt.pause(0.001)
 
     def get_array(self) -> np.ndarray:
         """
@@ -1,25 +1,336 @@
 # core/pipeline.py
+import numpy as np
+
 from operations.operation_factory import OperationFactory
-from typing import List, Dict, Any
+from operations.base.filter_decorator import FilterDecorator
+from operations.base.fused_operation import FusedPointwiseOperation
+from operations.base.lookup_table import LookupTableOperation
+from operations.base.operation import Operation
+from core.buffer_pool import BufferPool
+from core.image_data import ImageData
+from core.precision import DEFAULT_PRECISION, convert, working_dtype
+from typing import Callable, List, Dict, Any, Optional, Sequence
+
+# hook signature: hook(step_index, operation, image_data)
+StepHook = Callable[[int, Operation, ImageData], None]
+
 
 class OperationPipeline:
-    """Manages creation and execution of operation pipelines."""
+    """
+    Manages creation and execution of operation pipelines.
+
+    The operations are kept as a flat list and run in a loop, so chains of
+    thousands of steps need no recursion. Hooks registered with
+    add_before_hook/add_after_hook are called around every step.
+
+    With options['precision'] set (see core.precision), the input is
+    converted to that working dtype once and every step keeps it, so there
+    is no quantization between steps; ImageData.save does the final cast.
+
+    With a BufferPool (pool argument, or in_place=True in
+    create_from_config) the pipeline copies its input into a buffer it
+    owns and runs every FilterDecorator through apply_in_place, so steps
+    overwrite the working array and reuse scratch arrays between steps and
+    between images. Hooks then see arrays that later steps overwrite.
+    Read-only step results (memory maps, broadcast views) are copied into
+    a pooled buffer before the next step overwrites them, and into a new
+    array if they are the final result: apply() always returns a writable
+    array.
+
+    Operations are immutable and every step returns a new array (or one
+    from the pool), so apply() never modifies its input and one pipeline
+    can be built once and applied from many threads at the same time
+    (hooks, e.g. a profiler, are the caller's to synchronize).
+    """
+
+    def __init__(self, operations: List[Operation],
+                 step_configs: List[List[Dict[str, Any]]] = None,
+                 options: Dict[str, Any] = None, pool: BufferPool = None):
+        """
+        Args:
+            operations: the steps, in application order
+            step_configs: for every step, the operation configurations it
+                was built from (a fused step covers several)
+            options: settings that change the results, e.g. fusion or
+                'precision' (None keeps the input dtype)
+            pool: buffers for in-place execution; None allocates per step
+        """
+        self.operations = list(operations)
+        self.step_configs = step_configs
+        self.options = dict(options or {})
+        self.pool = pool
+        self._before_hooks: List[StepHook] = []
+        self._after_hooks: List[StepHook] = []
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def __repr__(self) -> str:
+        return f"OperationPipeline({self.operations})"
 
     @staticmethod
-    def create_from_config(operations_config: List[Dict[str, Any]]):
-        """Create a pipeline of operations from configuration."""
+    def create_from_config(operations_config: List[Dict[str, Any]],
+                           fuse: bool = True, lut: bool = True,
+                           precision: str = DEFAULT_PRECISION,
+                           in_place: bool = False) -> 'OperationPipeline':
+        """
+        Create a pipeline of operations from configuration.
+
+        Args:
+            operations_config: list of operation configurations, in order
+            fuse: merge runs of consecutive pointwise operations into one
+                FusedPointwiseOperation (see its docstring for the tolerance)
+            lut: merge runs of consecutive operations that have a lookup
+                table into one LookupTableOperation (exact on uint8 data;
+                only used with the uint8 precision)
+            precision: working dtype name from core.precision.PRECISIONS
+            in_place: run the steps in place on pooled buffers (see the
+                class docstring)
+        """
         if not operations_config:
             raise ValueError("At least one operation must be specified")
+        working_dtype(precision)  # validate
+        # tables only apply to uint8 data
+        lut = lut and precision == 'uint8'
 
-        # Create operation objects
-        operations_chain = []
-        for op_config in reversed(operations_config):
+        # Create operation objects, each with the configs it covers
+        steps = []
+        for op_config in operations_config:
             current_config = op_config.copy()
             current_operation = OperationFactory.create(current_config)
-            operations_chain.append(current_operation)
+            steps.append((current_operation, [op_config]))
+
+        if lut:
+            steps = OperationPipeline._replace_runs(
+                steps, lambda op: op.lookup_table() is not None,
+                LookupTableOperation, min_length=1)
+        if fuse:
+            steps = OperationPipeline._replace_runs(
+                steps, lambda op: getattr(op, 'POINTWISE', False),
+                FusedPointwiseOperation, min_length=2)
+
+        return OperationPipeline([operation for operation, _ in steps],
+                                 [configs for _, configs in steps],
+                                 options={'fuse': fuse, 'lut': lut,
+                                          'precision': precision},
+                                 pool=BufferPool() if in_place else None)
+
+    def scaled(self, factor: int) -> 'OperationPipeline':
+        """
+        A pipeline for images downscaled by `factor` (e.g. a preview loaded
+        with ImageData.load(path, scale=factor)): window sizes in pixels are
+        scaled down so the result looks like the full-size one. Hooks are
+        not copied.
+        """
+        return OperationPipeline(
+            [operation.scaled(factor) if isinstance(operation, FilterDecorator) else operation
+             for operation in self.operations],
+            self.step_configs, options=dict(self.options, scale=factor),
+            pool=BufferPool() if self.pool is not None else None)
+
+    @staticmethod
+    def from_chain(head: Operation) -> 'OperationPipeline':
+        """
+        Build a flat pipeline from a FilterDecorator chain (head = outermost,
+        i.e. last applied). The decorators themselves are not modified.
+        """
+        operations = []
+        operation = head
+        while isinstance(operation, FilterDecorator):
+            operations.append(operation)
+            operation = operation._wrapped_filter
+        if operation is not None:
+            operations.append(operation)
+        return OperationPipeline(operations[::-1])
+
+    def add_before_hook(self, hook: StepHook) -> None:
+        """Register hook(step_index, operation, image_data) to run before each step."""
+        self._before_hooks.append(hook)
+
+    def add_after_hook(self, hook: StepHook) -> None:
+        """Register hook(step_index, operation, image_data) to run after each step."""
+        self._after_hooks.append(hook)
+
+    def remove_before_hook(self, hook: StepHook) -> None:
+        """Unregister a hook added with add_before_hook."""
+        self._before_hooks.remove(hook)
+
+    def remove_after_hook(self, hook: StepHook) -> None:
+        """Unregister a hook added with add_after_hook."""
+        self._after_hooks.remove(hook)
 
-        # Chain operations
-        for i in range(len(operations_chain) - 1):
-            operations_chain[i].set_wrapped_filter(operations_chain[i + 1])
+    def apply(self, image_data: ImageData,
+              order: Optional[Sequence[int]] = None) -> ImageData:
+        """
+        Run the steps on the image.
 
-        return operations_chain[0] if operations_chain else None
\ No newline at end of file
+        Args:
+            image_data: The image data to process
+            order: optional permutation of the step indices to run them in;
+                steps may only swap places with steps they commute with
+
+        Returns:
+            The processed image data, with a writable array
+
+        Raises:
+            ValueError: If the order is not a valid permutation of commuting steps
+        """
+        if order is None:
+            order = range(len(self.operations))
+        else:
+            self._check_order(order)
+
+        image_data = self.to_working(image_data, owned=self.pool is not None)
+        for index in order:
+            image_data = self._run_step(index, image_data)
+        return self._writable(image_data)
+
+    def apply_cached(self, load_image: Callable[[], ImageData], cache,
+                     input_hash: str) -> ImageData:
+        """
+        Run the steps, resuming from the longest prefix found in the cache
+        and storing the result of every step that had to run.
+
+        Keys exist only at step boundaries: a fused or lookup-table step is
+        cached as one unit, so changing its last operation reruns all of
+        it. Build the pipeline with fuse=False, lut=False to cache every
+        operation on its own (main does this for --cache-dir).
+
+        Args:
+            load_image: returns the decoded input; only called when no
+                prefix is cached
+            cache: a core.result_cache.ResultCache
+            input_hash: content hash of the input (ResultCache.file_hash)
+
+        Returns:
+            The processed image data, with a writable array
+        """
+        if self.step_configs is None:
+            raise ValueError("Caching needs a pipeline built by create_from_config")
+
+        keys = []
+        prefix = []
+        for configs in self.step_configs:
+            prefix = prefix + configs
+            keys.append(cache.prefix_key(input_hash, prefix, self.options))
+
+        start = 0
+        image_data = None
+        for index in range(len(keys) - 1, -1, -1):
+            cached = cache.get(keys[index])
+            if cached is not None:
+                image_data = ImageData(cached)
+                start = index + 1
+                break
+        if image_data is None:
+            image_data = load_image()
+        image_data = self.to_working(image_data, owned=self.pool is not None)
+
+        for index in range(start, len(self.operations)):
+            image_data = self._run_step(index, image_data)
+            cache.put(keys[index], image_data.get_array())
+        return self._writable(image_data)
+
+    def to_working(self, image_data: ImageData, owned: bool = False) -> ImageData:
+        """
+        The image converted to the working precision (unchanged if none is set).
+
+        Args:
+            image_data: the input image
+            owned: return an array the steps may overwrite; with a pool, an
+                input already in the working dtype is not copied but made
+                read-only, so the first step writes into a pooled buffer
+        """
+        arr = image_data.get_array()
+        precision = self.options.get('precision')
+        dtype = arr.dtype if precision is None else working_dtype(precision)
+        if dtype == arr.dtype and not owned:
+            return image_data
+        if dtype == arr.dtype and self.pool is not None:
+            view = arr.view()
+            view.setflags(write=False)
+            return ImageData(view)
+        out = None
+        if self.pool is not None:
+            out = self.pool.take(arr.shape, dtype)
+        converted = convert(arr, dtype, out=out)
+        if converted is arr:
+            converted = arr.copy()
+        return ImageData(converted)
+
+    @staticmethod
+    def _writable(image_data: ImageData) -> ImageData:
+        """The result as a writable array, e.g. not the broadcast view of a Sobel result."""
+        arr = image_data.get_array()
+        if arr.flags.writeable:
+            return image_data
+        return ImageData(np.array(arr))
+
+    def _run_step(self, index: int, image_data: ImageData,
+                  operation: Operation = None) -> ImageData:
+        """Run step `index` (or `operation` in its place) with its hooks."""
+        operation = operation or self.operations[index]
+        for hook in self._before_hooks:
+            hook(index, operation, image_data)
+        image_data = self._apply_step(operation, image_data)
+        for hook in self._after_hooks:
+            hook(index, operation, image_data)
+        return image_data
+
+    def can_swap(self, first: int, second: int) -> bool:
+        """Whether steps `first` and `second` may run in either order."""
+        a, b = self.operations[first], self.operations[second]
+        return a.commutes_with(b) or b.commutes_with(a)
+
+    def _check_order(self, order: Sequence[int]) -> None:
+        """Validate that `order` only reorders steps that commute."""
+        if sorted(order) != list(range(len(self.operations))):
+            raise ValueError("Order must be a permutation of the step indices")
+        for position, index in enumerate(order):
+            # every step that now runs after `index` but came before it
+            for later in order[position + 1:]:
+                if later < index and not self.can_swap(later, index):
+                    raise ValueError(
+                        f"Steps {later} and {index} do not commute")
+
+    def _apply_step(self, operation: Operation, image_data: ImageData) -> ImageData:
+        """Run one step; decorators run only their own filter, not their chain."""
+        if isinstance(operation, FilterDecorator):
+            if self.pool is not None:
+                arr = image_data.get_array()
+                if not arr.flags.writeable:
+                    if getattr(operation, 'POINTWISE', False):
+                        # read it once, writing straight into a pooled buffer
+                        out = self.pool.take(arr.shape, arr.dtype)
+                        return ImageData(operation.process(arr, out=out, pool=self.pool))
+                    # e.g. the input, or the broadcast color view of a Sobel result
+                    owned = self.pool.take(arr.shape, arr.dtype)
+                    np.copyto(owned, arr)
+                    arr = owned
+                return ImageData(operation.apply_in_place(arr, self.pool))
+            return operation._apply_filter(image_data)
+        return operation.apply(image_data)
+
+    @staticmethod
+    def _replace_runs(steps: List[Any], matches, build,
+                      min_length: int) -> List[Any]:
+        """
+        Replace every run of at least min_length consecutive
+        (operation, configs) steps whose operation satisfies matches(op) by
+        one step (build(operations), concatenated configs).
+        """
+        result = []
+        run = []
+        for step in steps + [None]:
+            if step is not None and matches(step[0]):
+                run.append(step)
+                continue
+            if len(run) >= min_length:
+                result.append((build([operation for operation, _ in run]),
+                               [config for _, configs in run for config in configs]))
+            else:
+                result.extend(run)
+            run = []
+            if step is not None:
+                result.append(step)
+        return result
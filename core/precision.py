@@ -0,0 +1,82 @@
+"""Working precision of a pipeline: the dtype the image is held in between steps."""
+import numpy as np
+
+# name (config / --precision) -> working dtype
+PRECISIONS = {
+    'float32': np.float32,
+    'float64': np.float64,
+    'uint16': np.uint16,
+    'uint8': np.uint8,
+}
+DEFAULT_PRECISION = 'float32'
+
+
+def working_dtype(precision: str) -> np.dtype:
+    """
+    The dtype for a precision name.
+
+    Raises:
+        ValueError: If the name is not one of PRECISIONS
+    """
+    try:
+        return np.dtype(PRECISIONS[precision])
+    except KeyError:
+        raise ValueError(f"Precision must be one of {sorted(PRECISIONS)}, "
+                         f"got {precision!r}") from None
+
+
+def value_max(dtype) -> float:
+    """
+    The value of full intensity in arrays of `dtype`.
+
+    Float and 8-bit images use the 0-255 scale of the original operations;
+    16-bit images use their full 0-65535 range.
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer) and dtype.itemsize > 1:
+        return float(np.iinfo(dtype).max)
+    return 255.0
+
+
+def convert(arr: np.ndarray, dtype, out: np.ndarray = None) -> np.ndarray:
+    """
+    Convert an image to `dtype`, rescaling between value ranges.
+
+    Float results are not rounded. Integer results are rounded from
+    integer sources and truncated from float sources, as the operations
+    truncate when they cast back to uint8.
+
+    Args:
+        arr: the image (not modified)
+        dtype: the target dtype
+        out: optional array of arr's shape and the target dtype to write
+            the result into (always written when given)
+
+    Returns:
+        arr itself if it already has the dtype and no out is given,
+        else out or a new array
+    """
+    dtype = np.dtype(dtype)
+    if arr.dtype == dtype and out is None:
+        return arr
+    scale = value_max(dtype) / value_max(arr.dtype)
+    if np.issubdtype(dtype, np.floating):
+        if out is None:
+            result = arr.astype(dtype)
+        else:
+            result = out
+            np.copyto(result, arr, casting='unsafe')
+        if scale != 1:
+            result *= scale
+        return result
+
+    result = arr.astype(np.float64 if scale != 1 else arr.dtype, copy=False)
+    if scale != 1:
+        result = result * scale
+        if not np.issubdtype(arr.dtype, np.floating):
+            result = np.rint(result)
+    result = np.clip(result, 0, value_max(dtype))
+    if out is None:
+        return result.astype(dtype)
+    np.copyto(out, result, casting='unsafe')
+    return out
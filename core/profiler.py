@@ -0,0 +1,118 @@
+# core/profiler.py
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional
+
+from core.image_data import ImageData
+from operations.base.operation import Operation
+
+
+@dataclass
+class StepProfile:
+    """Measurements of one pipeline step."""
+    index: int
+    operation: str
+    wall_s: float
+    cpu_s: float
+    input_shape: tuple
+    input_dtype: str
+    output_shape: tuple
+    output_dtype: str
+    # peak of traced allocations during the step (None if not traced)
+    alloc_peak_bytes: Optional[int] = None
+
+
+class PipelineProfiler:
+    """
+    Records per-step timing and memory of an OperationPipeline.
+
+    Attaches itself as a before/after hook of the pipeline, so a pipeline
+    without a profiler pays nothing. Usage:
+
+        profiler = PipelineProfiler(callback=print)
+        profiler.attach(pipeline)
+        pipeline.apply(image)
+        profiler.to_json('profile.json')
+    """
+
+    def __init__(self, callback: Callable[[StepProfile], None] = None,
+                 trace_allocations: bool = True):
+        """
+        Args:
+            callback: called with every StepProfile as soon as the step ends
+            trace_allocations: measure allocations with tracemalloc (slows
+                the profiled steps down)
+        """
+        self.callback = callback
+        self.trace_allocations = trace_allocations
+        self.steps: List[StepProfile] = []
+        self._start = None
+        self._started_tracing = False
+
+    def attach(self, pipeline) -> 'PipelineProfiler':
+        """Start profiling every step of the pipeline."""
+        pipeline.add_before_hook(self._before_step)
+        pipeline.add_after_hook(self._after_step)
+        return self
+
+    def detach(self, pipeline) -> None:
+        """Stop profiling the pipeline."""
+        pipeline.remove_before_hook(self._before_step)
+        pipeline.remove_after_hook(self._after_step)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _before_step(self, index: int, operation: Operation,
+                     image_data: ImageData) -> None:
+        array = image_data.get_array()
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            traced_before, _ = tracemalloc.get_traced_memory()
+        else:
+            traced_before = None
+        self._start = (array.shape, str(array.dtype), traced_before,
+                       time.perf_counter(), time.process_time())
+
+    def _after_step(self, index: int, operation: Operation,
+                    image_data: ImageData) -> None:
+        wall_end, cpu_end = time.perf_counter(), time.process_time()
+        input_shape, input_dtype, traced_before, wall_start, cpu_start = self._start
+        alloc_peak = None
+        if traced_before is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            alloc_peak = peak - traced_before
+
+        array = image_data.get_array()
+        name = type(operation).__name__
+        if hasattr(operation, 'operations'):  # fused / lookup-table steps
+            name = repr(operation)
+        step = StepProfile(index=index, operation=name,
+                           wall_s=wall_end - wall_start, cpu_s=cpu_end - cpu_start,
+                           input_shape=tuple(input_shape), input_dtype=input_dtype,
+                           output_shape=tuple(array.shape), output_dtype=str(array.dtype),
+                           alloc_peak_bytes=alloc_peak)
+        self.steps.append(step)
+        if self.callback:
+            self.callback(step)
+
+    def report(self) -> dict:
+        """Structured report of all profiled steps."""
+        return {
+            'total_wall_s': sum(step.wall_s for step in self.steps),
+            'total_cpu_s': sum(step.cpu_s for step in self.steps),
+            'steps': [asdict(step) for step in self.steps],
+        }
+
+    def to_json(self, path: str = None) -> str:
+        """Return the report as JSON, and write it to `path` if given."""
+        text = json.dumps(self.report(), indent=2)
+        if path:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
@@ -0,0 +1,119 @@
+"""
+Uncompressed, memory-mappable container for image arrays.
+
+Layout of a raw image file:
+
+    MAGIC (8 bytes)
+    header length (4 bytes, little-endian uint32)
+    header: UTF-8 JSON {"shape": [...], "dtype": "|u1", "channel_order": "RGB"},
+            space-padded so the data starts at a multiple of ALIGNMENT
+    data: the array in C order
+"""
+import json
+import os
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+RAW_EXTENSION = '.imraw'
+
+MAGIC = b'IMRAW\x00\x01\x00'
+# the data starts at a multiple of this, so it can be mapped and vectorized
+ALIGNMENT = 64
+# channel orders by number of channels, when the writer does not give one
+DEFAULT_CHANNEL_ORDERS = {None: 'L', 1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+
+def is_raw_path(path: str) -> bool:
+    """Whether `path` names a raw image file (by extension)."""
+    return path.lower().endswith(RAW_EXTENSION)
+
+
+def create_raw(path: str, shape: Tuple[int, ...], dtype,
+               channel_order: str = None) -> np.memmap:
+    """
+    Create a raw image file and return a writable memory map of its data,
+    so it can be filled incrementally (e.g. strip by strip).
+
+    Args:
+        path: the file to create (overwritten if it exists)
+        shape: (height, width) or (height, width, channels)
+        dtype: the element type
+        channel_order: e.g. 'RGB' or 'BGR'; by default derived from the
+            number of channels
+
+    Returns:
+        np.memmap of the given shape and dtype
+    """
+    shape = tuple(int(size) for size in shape)
+    if len(shape) not in (2, 3):
+        raise ValueError(f"Expected a 2D or 3D image shape, got {shape}")
+    channels = shape[2] if len(shape) == 3 else None
+    if channel_order is None:
+        channel_order = DEFAULT_CHANNEL_ORDERS.get(channels)
+    if channel_order is not None and len(channel_order) != (channels or 1):
+        raise ValueError(
+            f"Channel order {channel_order!r} does not match shape {shape}")
+
+    dtype = np.dtype(dtype)
+    header = json.dumps({'shape': list(shape), 'dtype': dtype.str,
+                         'channel_order': channel_order}).encode('utf-8')
+    prefix = len(MAGIC) + 4
+    padded = -(-(prefix + len(header)) // ALIGNMENT) * ALIGNMENT - prefix
+    header = header.ljust(padded, b' ')
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(4, 'little'))
+        file.write(header)
+    return np.memmap(path, dtype=dtype, mode='r+', offset=prefix + len(header),
+                     shape=shape)
+
+
+def write_raw(path: str, array: np.ndarray, channel_order: str = None) -> None:
+    """Write `array` to a raw image file (see create_raw)."""
+    data = create_raw(path, array.shape, array.dtype, channel_order)
+    data[...] = array
+    data.flush()
+    del data
+
+
+def read_header(path: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Read the header of a raw image file.
+
+    Returns:
+        (header dict, byte offset of the data)
+
+    Raises:
+        ValueError: If the file is not a raw image or is truncated
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a raw image file: {path}")
+        length = int.from_bytes(file.read(4), 'little')
+        header = json.loads(file.read(length).decode('utf-8'))
+    offset = len(MAGIC) + 4 + length
+    expected = offset + int(np.prod(header['shape'])) * np.dtype(header['dtype']).itemsize
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"Raw image file is truncated: {path}")
+    return header, offset
+
+
+def open_raw(path: str, mode: str = 'r') -> Tuple[np.memmap, Dict[str, Any]]:
+    """
+    Memory-map the data of a raw image file. Nothing is read up front;
+    pages are loaded when they are accessed.
+
+    Args:
+        path: the raw image file
+        mode: 'r' (read-only), 'r+' (write through to the file) or 'c'
+            (copy-on-write), as in np.memmap
+
+    Returns:
+        (np.memmap with the stored shape and dtype, header dict)
+    """
+    header, offset = read_header(path)
+    data = np.memmap(path, dtype=np.dtype(header['dtype']), mode=mode,
+                     offset=offset, shape=tuple(header['shape']))
+    return data, header
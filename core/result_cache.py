@@ -0,0 +1,150 @@
+# core/result_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.config import Config
+
+
+class ResultCache:
+    """
+    Content-addressed cache of intermediate pipeline results.
+
+    A key identifies "this input file, run through this prefix of the
+    operations list": the SHA-256 of the input file's bytes plus the
+    canonical JSON of every operation configuration in the prefix (and the
+    pipeline options that change the result). Values are the arrays after
+    the prefix.
+
+    There are two tiers, both least-recently-used under a byte budget:
+      - memory: an OrderedDict of read-only arrays
+      - disk (optional): one .npy file per key in `directory`; the file's
+        modification time is refreshed on every hit and the oldest files are
+        deleted first
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = 1 << 30,
+                 memory_max_bytes: int = 256 << 20):
+        """
+        Args:
+            directory: on-disk cache directory (None = memory only)
+            max_bytes: byte budget of the on-disk tier
+            memory_max_bytes: byte budget of the in-memory tier
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+        """SHA-256 of a file's contents."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def prefix_key(input_hash: str, operations_config: List[Dict[str, Any]],
+                   options: Dict[str, Any] = None) -> str:
+        """Key of `input_hash` run through the given operations."""
+        canonical = Config.canonical_operations(operations_config)
+        payload = json.dumps({'input': input_hash, 'operations': canonical,
+                              'options': options or {}},
+                             sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached (read-only) array for `key`, or None."""
+        with self._lock:
+            array = self._memory.get(key)
+            if array is not None:
+                self._memory.move_to_end(key)
+                return array
+
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            array = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, array)
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """Store a copy of `array` under `key` in both tiers."""
+        array = np.array(array, copy=True)
+        self._remember(key, array)
+
+        path = self._path(key)
+        if path is None:
+            return
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def clear(self) -> None:
+        """Drop every entry of both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for path in self._disk_entries():
+            os.remove(path)
+
+    def _remember(self, key: str, array: np.ndarray) -> None:
+        """Add to the memory tier and evict least recently used entries."""
+        if array.nbytes > self.memory_max_bytes:
+            return
+        array.flags.writeable = False
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous.nbytes
+            self._memory[key] = array
+            self._memory_bytes += array.nbytes
+            while self._memory_bytes > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+
+    def _path(self, key: str) -> Optional[str]:
+        return os.path.join(self.directory, f"{key}.npy") if self.directory else None
+
+    def _disk_entries(self) -> List[str]:
+        if not self.directory:
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith('.npy')]
+
+    def _evict_disk(self) -> None:
+        """Delete the least recently used files until under max_bytes."""
+        entries = []
+        for path in self._disk_entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
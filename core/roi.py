@@ -0,0 +1,125 @@
+"""Execution of a pipeline for one rectangle of the output (region of interest)."""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.tiled import TiledProcessor, open_source
+from operations.base.operation import Operation
+
+# (x, y, width, height) in pixels, x/y of the top-left corner
+Region = Tuple[int, int, int, int]
+
+
+class RegionProcessor:
+    """
+    Computes only a rectangle of a pipeline's output.
+
+    The rectangle is grown backwards through the steps by their footprints
+    (the kernel radius of box blur, sharpen and Sobel; zero for pointwise
+    adjustments) and clipped to the image. Only that input region is read
+    and processed, so the work scales with the region, not the image, and
+    the result equals the same crop of a whole-image run: inside the image
+    the halo supplies the neighbourhood, at its borders the convolutions
+    edge-pad exactly as they do for the whole image.
+
+    Steps that depend on a global statistic (GLOBAL_STATISTIC, e.g. the
+    mean in ContrastAdjustment) need the whole image to be exact. By default
+    the statistic is computed in a strip-wise pass over the whole image (as
+    in TiledProcessor), which costs a full pass over the steps before it;
+    with exact_statistics=False it is taken over the processed region
+    instead, keeping the cost proportional to the region.
+
+    The region's steps run with the pipeline's hooks (e.g. a profiler);
+    the statistics passes do not.
+
+    Memory-mapped inputs (.npy, raw images) only read the pages of the
+    region. PIL formats are decoded whole by PIL before cropping, but none
+    of the processing is image-sized.
+    """
+
+    def __init__(self, pipeline: OperationPipeline, exact_statistics: bool = True):
+        """
+        Args:
+            pipeline: the steps to run
+            exact_statistics: compute global statistics over the whole image
+                (see the class docstring)
+        """
+        self.pipeline = pipeline
+        self.exact_statistics = exact_statistics
+        self._tiled = TiledProcessor(pipeline)
+
+    def run(self, input_path: str, region: Region) -> ImageData:
+        """The region of the pipeline's output for the image file `input_path`."""
+        return ImageData(self.process(open_source(input_path), region))
+
+    def process(self, source, region: Region) -> np.ndarray:
+        """
+        Run the pipeline for one region of the output.
+
+        Args:
+            source: array-like of shape (height, width[, channels]) that
+                supports source[rows, columns] (an ndarray, a memmap, a
+                PILSource)
+            region: (x, y, width, height) of the output to compute
+
+        Returns:
+            The region of the output, of shape (height, width[, channels])
+
+        Raises:
+            ValueError: If the region is empty or not inside the image
+        """
+        x, y, width, height = self.check_region(region, source.shape)
+        left, top, input_width, input_height = self.input_region(region, source.shape)
+
+        steps = self._steps(source)
+        # copy: memmap and PIL crops are read-only views of the source
+        tile = np.array(source[top:top + input_height, left:left + input_width])
+        image_data = self.pipeline.to_working(ImageData(tile))
+        for index, step in enumerate(steps):
+            # with the pipeline's hooks, e.g. a profiler
+            image_data = self.pipeline._run_step(index, image_data, step)
+        processed = image_data.get_array()
+        result = processed[y - top:y - top + height, x - left:x - left + width].copy()
+        self._tiled._release(tile, processed)
+        return result
+
+    def input_region(self, region: Region, shape: Sequence[int]) -> Region:
+        """The input rectangle (x, y, width, height) that `region` of the output depends on."""
+        x, y, width, height = self.check_region(region, shape)
+        rows = sum(self._footprint(step)[0] for step in self.pipeline.operations)
+        columns = sum(self._footprint(step)[1] for step in self.pipeline.operations)
+        left, top = max(0, x - columns), max(0, y - rows)
+        right = min(shape[1], x + width + columns)
+        bottom = min(shape[0], y + height + rows)
+        return left, top, right - left, bottom - top
+
+    @staticmethod
+    def check_region(region: Region, shape: Sequence[int]) -> Region:
+        """
+        The region as ints.
+
+        Raises:
+            ValueError: If the region is empty or not inside the image
+        """
+        if len(region) != 4:
+            raise ValueError(f"Region must be (x, y, width, height), got {region}")
+        x, y, width, height = (int(value) for value in region)
+        if width < 1 or height < 1:
+            raise ValueError(f"Region must not be empty, got {region}")
+        if x < 0 or y < 0 or x + width > shape[1] or y + height > shape[0]:
+            raise ValueError(f"Region {region} is not inside the "
+                             f"{shape[1]}x{shape[0]} image")
+        return x, y, width, height
+
+    def _steps(self, source) -> List[Operation]:
+        """The pipeline's steps, with exact global statistics if requested."""
+        if self.exact_statistics:
+            return self._tiled._resolve_statistics(source)
+        return list(self.pipeline.operations)
+
+    @staticmethod
+    def _footprint(operation: Operation) -> Tuple[int, int]:
+        footprint = getattr(operation, 'footprint', None)
+        return footprint() if footprint else (0, 0)
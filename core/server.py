@@ -0,0 +1,363 @@
+"""
+Resident HTTP service: edits without interpreter startup, imports or
+config-file parsing per request.
+
+Endpoints (JSON in, JSON or image bytes out):
+
+    POST /process   body: {"input": "path" | "input_base64": "<encoded image>",
+                           "operations": [...], "precision": "float32",
+                           "output": "path (optional)", "format": "PNG"}
+                    without "output" the response body is the encoded
+                    result image, with it a JSON summary
+    GET  /metrics   request counts, queue depth, latency percentiles and
+                    pipeline cache statistics
+    GET  /health    {"status": "ok"}
+
+File paths in requests are confined to the server's root directories
+(roots); a server without roots only takes "input_base64" and returns the
+result in the response. The server binds to loopback interfaces only,
+unless allow_remote is given.
+
+Requests are handled on threads and processed on a pool of worker
+processes that are started (and have imported everything) before the
+first request. Every worker keeps an LRU cache of pipelines keyed by the
+canonical configuration, so a repeated edit only decodes, runs and
+encodes.
+"""
+import base64
+import ipaddress
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import Config
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+
+logger = logging.getLogger(__name__)
+
+# pipelines of the current worker process, keyed by canonical config
+_worker_pipelines: Optional[OrderedDict] = None
+_worker_cache_size = 0
+# shared by the warm-up tasks, see ImageServer.__init__
+_worker_barrier = None
+
+
+class ImageServer:
+    """
+    HTTP front end plus a warm process pool.
+
+    Usage:
+        server = ImageServer(port=8080, roots=['photos']).start()   # serves on a thread
+        ...
+        server.shutdown()
+    or ImageServer(port=8080).serve_forever() to block.
+    """
+    # pipelines kept per worker process
+    PIPELINE_CACHE_SIZE = 64
+    # latencies kept for the percentiles in /metrics
+    LATENCY_WINDOW = 1000
+    # seconds the warm-up waits for every worker to start
+    WARM_UP_TIMEOUT = 120
+    # largest accepted request body
+    MAX_BODY_BYTES = 256 << 20
+    # config keys /process does not act on; rejected rather than ignored
+    UNSUPPORTED_KEYS = ('roi', 'branches', 'display')
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 workers: int = None, cache_size: int = PIPELINE_CACHE_SIZE,
+                 roots: Sequence[str] = (), allow_remote: bool = False):
+        """
+        Args:
+            host: interface to bind; the default only accepts local clients
+            port: TCP port; 0 picks a free one (see `address`)
+            workers: worker processes (defaults to os.cpu_count())
+            cache_size: pipelines cached per worker
+            roots: directories that request 'input' and 'output' paths must
+                lie in (relative paths are taken from the first one); with
+                none, requests can only send 'input_base64' and get the
+                result in the response
+            allow_remote: allow a host that is not a loopback address; any
+                client that reaches it can then read and write the roots
+
+        Raises:
+            ValueError: If host is not a loopback address and allow_remote
+                is not set, or a root is not a directory
+        """
+        if not (allow_remote or _is_loopback(host)):
+            raise ValueError(f"Refusing to serve on non-loopback host {host!r} "
+                             f"without allow_remote")
+        for root in roots:
+            if not os.path.isdir(root):
+                raise ValueError(f"Server root is not a directory: {root}")
+        self.roots = [os.path.realpath(root) for root in roots]
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(self.workers, timeout=self.WARM_UP_TIMEOUT)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_init_worker,
+                                         initargs=(cache_size, barrier))
+        # start every worker now, so the first requests do not pay for it:
+        # each warm-up task holds its worker at the barrier until all
+        # workers have one, so no worker can take two
+        self.worker_pids = list(self._pool.map(_warm_up, range(self.workers)))
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._in_flight = 0
+        self._counts = {'requests': 0, 'errors': 0, 'cache_hits': 0, 'cache_misses': 0}
+        self._started = time.time()
+
+        self._http = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._http.daemon_threads = True
+        self._http.app = self
+        self._thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """(host, port) the server listens on."""
+        return self._http.server_address[:2]
+
+    def start(self) -> 'ImageServer':
+        """Serve on a background thread and return immediately."""
+        self._thread = threading.Thread(target=self._http.serve_forever,
+                                        name='image-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._http.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop accepting requests and stop the worker processes."""
+        if self._thread is not None:
+            self._http.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._http.server_close()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def process(self, request: Dict[str, Any]) -> Tuple[bytes, str]:
+        """
+        Validate a /process request and run it on a worker.
+
+        Returns:
+            (response body, content type)
+
+        Raises:
+            ValueError / FileNotFoundError: If the request is invalid
+            PermissionError: If a path is outside the roots
+        """
+        unsupported = [key for key in self.UNSUPPORTED_KEYS if key in request]
+        if unsupported:
+            raise ValueError(f"Not supported by /process: {', '.join(unsupported)}")
+        config = Config.from_dict(request, batch=True)
+        if not config.operations_config:
+            raise ValueError("At least one operation must be specified")
+        output_path = self._confined(config.output_path) if config.output_path else None
+        if 'input_base64' in request:
+            source = ('bytes', base64.b64decode(request['input_base64'], validate=True))
+        elif config.input_path:
+            input_path = self._confined(config.input_path)
+            if not os.path.exists(input_path):
+                raise FileNotFoundError(f"Input file not found: {config.input_path}")
+            source = ('path', input_path)
+        else:
+            raise ValueError("Request must contain 'input' or 'input_base64'")
+        image_format = str(request.get('format', 'PNG')).upper()
+
+        key = json.dumps({'operations': Config.canonical_operations(config.operations_config),
+                          'precision': config.precision},
+                         sort_keys=True, separators=(',', ':'))
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(_process, key, config.operations_config,
+                                       config.precision, source,
+                                       output_path, image_format)
+            data, cache_hit = future.result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self._counts['cache_hits' if cache_hit else 'cache_misses'] += 1
+
+        if config.output_path:
+            return json.dumps({'output': config.output_path}).encode('utf-8'), 'application/json'
+        return data, f"image/{image_format.lower()}"
+
+    def _confined(self, path: str) -> str:
+        """
+        `path` resolved (symlinks included) inside one of the roots.
+
+        Raises:
+            PermissionError: If there are no roots or the path leaves them
+        """
+        if not self.roots:
+            raise PermissionError("File paths are disabled on this server; "
+                                  "send 'input_base64' and omit 'output'")
+        resolved = os.path.realpath(os.path.join(self.roots[0], path))
+        if not any(os.path.commonpath([resolved, root]) == root for root in self.roots):
+            raise PermissionError(f"Path is outside the server roots: {path}")
+        return resolved
+
+    def record(self, latency_s: float, ok: bool) -> None:
+        """Account one finished request."""
+        with self._lock:
+            self._counts['requests'] += 1
+            if not ok:
+                self._counts['errors'] += 1
+            self._latencies.append(latency_s)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of the counters, queue depth and latency percentiles (ms)."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            in_flight = self._in_flight
+            counts = dict(self._counts)
+        latency = {}
+        if latencies.size:
+            latency = {'mean': float(latencies.mean()),
+                       'p50': float(np.percentile(latencies, 50)),
+                       'p95': float(np.percentile(latencies, 95)),
+                       'p99': float(np.percentile(latencies, 99)),
+                       'max': float(latencies.max())}
+        return dict(counts,
+                    workers=self.workers,
+                    in_flight=in_flight,
+                    # requests waiting for a free worker
+                    queue_depth=max(0, in_flight - self.workers),
+                    latency_ms=latency,
+                    uptime_s=time.time() - self._started)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the ImageServer in self.server.app."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        app = self.server.app
+        if self.path == '/metrics':
+            self._send_json(200, app.metrics())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        app = self.server.app
+        if self.path != '/process':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            # a negative length would make read() wait for the client to hang up
+            if length < 0:
+                raise ValueError(f"Invalid Content-Length: {length}")
+            if length > app.MAX_BODY_BYTES:
+                raise ValueError(f"Request body larger than {app.MAX_BODY_BYTES} bytes")
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            body, content_type = app.process(request)
+            ok = True
+        except PermissionError as e:
+            self._send_json(403, {'error': f"{type(e).__name__}: {e}"})
+        except (ValueError, FileNotFoundError, KeyError, TypeError) as e:
+            # json.JSONDecodeError and binascii.Error are ValueErrors
+            self._send_json(400, {'error': f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            logger.exception("Request failed")
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+        else:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            self._send(200, body, content_type, {'X-Elapsed-Ms': f"{elapsed_ms:.2f}"})
+        finally:
+            app.record(time.perf_counter() - start, ok)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str,
+              headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def _is_loopback(host: str) -> bool:
+    """Whether `host` only accepts connections from this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # a host name or '' (all interfaces)
+        return False
+
+
+def _init_worker(cache_size: int, barrier) -> None:
+    """Process pool initializer: an empty pipeline cache per worker."""
+    global _worker_pipelines, _worker_cache_size, _worker_barrier
+    _worker_pipelines = OrderedDict()
+    _worker_cache_size = cache_size
+    _worker_barrier = barrier
+
+
+def _warm_up(_) -> int:
+    """Runs once per worker at startup, after its imports; returns its PID."""
+    _worker_barrier.wait()
+    return os.getpid()
+
+
+def _pipeline(key: str, operations_config, precision: str) -> Tuple[OperationPipeline, bool]:
+    """The cached pipeline for `key` (building it on a miss), and whether it was cached."""
+    pipeline = _worker_pipelines.get(key)
+    if pipeline is not None:
+        _worker_pipelines.move_to_end(key)
+        return pipeline, True
+    pipeline = OperationPipeline.create_from_config(
+        operations_config, precision=precision, in_place=True)
+    _worker_pipelines[key] = pipeline
+    while len(_worker_pipelines) > _worker_cache_size:
+        _worker_pipelines.popitem(last=False)
+    return pipeline, False
+
+
+def _process(key: str, operations_config, precision: str, source,
+             output_path: Optional[str], image_format: str) -> Tuple[bytes, bool]:
+    """Decode, run and encode one request inside a worker process."""
+    pipeline, cache_hit = _pipeline(key, operations_config, precision)
+    kind, value = source
+    image = ImageData.from_bytes(value) if kind == 'bytes' else ImageData.load(value)
+    result = pipeline.apply(image)
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        result.save(output_path)
+        return b'', cache_hit
+    return result.to_bytes(image_format), cache_hit
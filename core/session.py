@@ -0,0 +1,175 @@
+"""
+Interactive editing: re-render a chain after a parameter change without
+redoing the steps before the change.
+
+An EditSession decodes its image once and keeps the result of every step
+of the last render. A new render compares its operations with the last
+ones and restarts from the first one that differs, so nudging the last
+step's value recomputes only that step. The intermediates are kept at the
+working precision (float32 by default), so a pointwise tail restarts from
+unquantized data, exactly as a full run would see it.
+
+watch() drives a session from a config file: every time the file is
+saved, it re-renders and saves/displays the result.
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from core.config import Config
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import DEFAULT_PRECISION
+from operations.operation_factory import OperationFactory
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RenderStats:
+    """What one EditSession.render did."""
+    reused_steps: int
+    computed_steps: int
+    elapsed_s: float
+
+
+class EditSession:
+    """
+    One image and the per-step results of its last render.
+
+    Memory: one working-precision image per step of the last chain, plus
+    the source.
+    """
+
+    def __init__(self, image_data: ImageData, precision: str = DEFAULT_PRECISION):
+        """
+        Args:
+            image_data: the source image (not modified)
+            precision: working precision of every step (see core.precision)
+        """
+        self.precision = precision
+        self._source = OperationPipeline([], options={'precision': precision}).to_working(image_data)
+        # canonical config and result of every step of the last render
+        self._keys: List[str] = []
+        self._results: List[ImageData] = []
+        self.last_stats: Optional[RenderStats] = None
+
+    @staticmethod
+    def open(path: str, precision: str = DEFAULT_PRECISION) -> 'EditSession':
+        """Start a session on an image file."""
+        return EditSession(ImageData.load(path), precision)
+
+    def render(self, operations_config: List[Dict[str, Any]]) -> ImageData:
+        """
+        Apply the operations to the source, reusing the results of the
+        longest unchanged prefix of the previous render.
+
+        Raises:
+            ValueError: If an operation is invalid (the cached steps are kept)
+        """
+        start = time.perf_counter()
+        Config.from_dict({'operations': operations_config, 'precision': self.precision},
+                         batch=True)
+        keys = [json.dumps(op, sort_keys=True)
+                for op in Config.canonical_operations(operations_config)]
+        operations = [OperationFactory.create(dict(op)) for op in operations_config]
+
+        reused = 0
+        while (reused < min(len(keys), len(self._keys))
+               and keys[reused] == self._keys[reused]):
+            reused += 1
+        del self._keys[reused:]
+        del self._results[reused:]
+
+        image_data = self._results[-1] if self._results else self._source
+        for key, operation in zip(keys[reused:], operations[reused:]):
+            # operations return a new image, so earlier results stay valid
+            image_data = operation.apply(image_data)
+            self._keys.append(key)
+            self._results.append(image_data)
+
+        self.last_stats = RenderStats(reused, len(keys) - reused,
+                                      time.perf_counter() - start)
+        return image_data
+
+    def clear(self) -> None:
+        """Drop the cached step results (the source is kept)."""
+        self._keys.clear()
+        self._results.clear()
+
+
+def watch(config_path: str, interval: float = 0.5, precision: str = None,
+          on_render: Callable[[ImageData, RenderStats], None] = None,
+          stop: Callable[[], bool] = None) -> None:
+    """
+    Re-render a config file every time it changes, until interrupted.
+
+    Each render reuses the unchanged prefix of the previous one; the result
+    is saved to the config's output and/or shown in one reused window.
+    A change to the input image starts a new session. An invalid config is
+    reported and the last good render is kept; a config file that is
+    briefly missing (an editor saving through a rename) is waited for.
+
+    Args:
+        config_path: the JSON config to watch
+        interval: seconds between checks of the file's modification time
+        precision: overrides the config's precision
+        on_render: optional callback(result, stats) after every render
+        stop: optional callable; the loop ends when it returns True
+    """
+    session = None
+    session_key = None
+    config = None
+    # modification times of the config and its input at the last render
+    seen = None
+    shown = False
+    try:
+        while not (stop and stop()):
+            config_mtime = _mtime(config_path)
+            input_mtime = _mtime(config.input_path) if config else None
+            if config_mtime is not None and (config_mtime, input_mtime) != seen:
+                try:
+                    config = Config(config_path)
+                    input_mtime = _mtime(config.input_path)
+                    key = (config.input_path, precision or config.precision, input_mtime)
+                    if key != session_key:
+                        session, session_key = EditSession.open(*key[:2]), key
+                    result = session.render(config.operations_config)
+                except (OSError, json.JSONDecodeError, ValueError) as e:
+                    # OSError also covers an input image that is still being written
+                    print(f"Error: {e}")
+                else:
+                    stats = session.last_stats
+                    print(f">> Rendered in {stats.elapsed_s * 1000:.0f} ms "
+                          f"({stats.reused_steps} steps reused, {stats.computed_steps} computed)")
+                    if config.output_path:
+                        result.save(config.output_path)
+                    if config.display:
+                        result.show(block=False)
+                        shown = True
+                    if on_render:
+                        on_render(result, stats)
+                seen = (config_mtime, input_mtime)
+            _wait(interval, shown)
+    except KeyboardInterrupt:
+        pass
+
+
+def _mtime(path: str) -> Optional[int]:
+    """Modification time of `path` in ns, or None while it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _wait(interval: float, shown: bool) -> None:
+    """Sleep, keeping an open window responsive."""
+    if shown:
+        import matplotlib.pyplot as plt
+        plt.pause(interval)
+    else:
+        time.sleep(interval)
@@ -0,0 +1,229 @@
+"""Out-of-core execution of a pipeline, one horizontal strip at a time."""
+import logging
+import os
+import tempfile
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+from core.raw_image import create_raw, is_raw_path
+from operations.base.operation import Operation
+
+logger = logging.getLogger(__name__)
+
+
+class TiledProcessor:
+    """
+    Runs a pipeline over an image in horizontal strips, so the working
+    memory is bounded by the strip size instead of the image size.
+
+    Every strip is read with a halo of extra rows on both sides: the sum of
+    the row footprints of all the steps, so the strip's own rows come out
+    exactly as if the whole image had been processed (the convolutions
+    edge-pad the tile, which only matches the full image at its borders).
+
+    Steps that depend on a global statistic (GLOBAL_STATISTIC, e.g. the
+    mean in ContrastAdjustment or the maximum in SobelFilter) are resolved
+    first: one extra pass over the strips runs the steps before it and
+    accumulates the statistic, then the step is replaced by a copy that
+    uses it. A pipeline with k such steps reads the input k + 1 times.
+
+    Inputs are read lazily: .npy and raw image files are memory-mapped;
+    other formats are decoded by PIL and cropped strip by strip (PIL keeps
+    the decoded 8-bit image, but none of the float intermediates are
+    image-sized). .npy and raw outputs are written in place through a
+    memory map; other formats are assembled in a temporary .npy file and
+    encoded at the end.
+    """
+    # bytes of float64 data per strip, used when tile_rows is not given
+    DEFAULT_TILE_BYTES = 64 << 20
+
+    def __init__(self, pipeline: OperationPipeline, tile_rows: Optional[int] = None,
+                 tile_bytes: int = DEFAULT_TILE_BYTES):
+        """
+        Args:
+            pipeline: the steps to run
+            tile_rows: rows per strip (without the halo); by default as
+                many as fit in tile_bytes
+            tile_bytes: float64 bytes per strip when tile_rows is not given
+        """
+        if tile_rows is not None and tile_rows < 1:
+            raise ValueError("tile_rows must be at least 1")
+        self.pipeline = pipeline
+        self.tile_rows = tile_rows
+        self.tile_bytes = tile_bytes
+
+    def run(self, input_path: str, output_path: str) -> None:
+        """Process the image file `input_path` into `output_path`."""
+        source = open_source(input_path)
+        if output_path.lower().endswith('.npy'):
+            self.process(source, lambda shape, dtype: np.lib.format.open_memmap(
+                output_path, mode='w+', dtype=dtype, shape=shape))
+            return
+        if is_raw_path(output_path):
+            self.process(source, lambda shape, dtype: create_raw(output_path, shape, dtype))
+            return
+
+        directory = os.path.dirname(os.path.abspath(output_path))
+        handle, scratch_path = tempfile.mkstemp(suffix='.npy', dir=directory)
+        os.close(handle)
+        try:
+            # like ImageData.save, the output is converted to 8 bits
+            result = self.process(source, lambda shape, dtype: np.lib.format.open_memmap(
+                scratch_path, mode='w+', dtype=np.uint8, shape=shape))
+            ImageData(result).save(output_path)
+            del result
+        finally:
+            os.remove(scratch_path)
+
+    def process(self, source, allocate: Callable = None) -> np.ndarray:
+        """
+        Run the pipeline over `source` strip by strip.
+
+        Args:
+            source: array-like of shape (height, width[, channels]) that
+                supports row slicing (an ndarray, a memmap, a PILSource)
+            allocate: allocate(shape, dtype) -> writable array for the
+                result; defaults to np.empty
+
+        Returns:
+            The array returned by allocate, filled with the result
+        """
+        allocate = allocate or np.empty
+        steps = self._resolve_statistics(source)
+        halo = sum(self._row_footprint(step) for step in steps)
+        out = None
+        for start, stop, tile, rows in self._strips(source, halo):
+            processed = self._run_steps(steps, tile)
+            result = processed[rows]
+            if out is None:
+                out = allocate((source.shape[0],) + result.shape[1:], result.dtype)
+            out[start:stop] = convert(result, out.dtype)
+            self._release(tile, processed)
+        if hasattr(out, 'flush'):
+            out.flush()
+        return out
+
+    def rows_per_strip(self, shape) -> int:
+        """Rows per strip for an image of the given shape."""
+        if self.tile_rows is not None:
+            return self.tile_rows
+        row_bytes = int(np.prod(shape[1:])) * np.dtype(np.float64).itemsize
+        return max(1, self.tile_bytes // row_bytes)
+
+    def _strips(self, source, halo: int):
+        """Yield (start, stop, tile with halo, rows of the tile that are start:stop)."""
+        height = source.shape[0]
+        step = self.rows_per_strip(source.shape)
+        for start in range(0, height, step):
+            stop = min(start + step, height)
+            first = max(0, start - halo)
+            last = min(height, stop + halo)
+            # copy: memmap and PIL strips are read-only views of the source
+            strip = source[first:last]
+            if self.pipeline.pool is None:
+                tile = np.array(strip)
+            else:
+                tile = self.pipeline.pool.take((last - first,) + tuple(source.shape[1:]),
+                                               strip.dtype)
+                tile[...] = strip
+            yield start, stop, tile, slice(start - first, stop - first)
+
+    def _resolve_statistics(self, source) -> List[Operation]:
+        """
+        The pipeline's steps, with every global-statistic step (also inside
+        fused steps) replaced by a copy that uses the whole-image statistic.
+        """
+        steps = list(self.pipeline.operations)
+        for index, step in enumerate(steps):
+            inner = getattr(step, 'operations', None)
+            if getattr(step, 'GLOBAL_STATISTIC', False):
+                steps[index] = self._statistic_pass(
+                    source, step, steps[:index], lambda arr: arr)
+            elif inner and any(op.GLOBAL_STATISTIC for op in inner):
+                # a fused step: the statistic is taken on its float
+                # intermediate, as FusedPointwiseOperation.process sees it
+                inner = list(inner)
+                for position, operation in enumerate(inner):
+                    if operation.GLOBAL_STATISTIC:
+                        inner[position] = self._statistic_pass(
+                            source, operation, steps[:index],
+                            self._pointwise_prefix(step, inner[:position]))
+                steps[index] = type(step)(inner)
+        return steps
+
+    def _statistic_pass(self, source, operation, before: List[Operation],
+                        finish: Callable[[np.ndarray], np.ndarray]):
+        """Copy of `operation` with its statistic over the input of `operation`."""
+        halo = sum(self._row_footprint(step) for step in before)
+        halo += self._row_footprint(operation)
+        partials = []
+        for _, _, tile, rows in self._strips(source, halo):
+            processed = finish(self._run_steps(before, tile))
+            partials.append(operation.partial_statistic(processed, rows))
+            self._release(tile, processed)
+        statistic = operation.combine_statistics(partials)
+        logger.info("%s statistic: %s", type(operation).__name__, statistic)
+        return operation.with_statistic(statistic)
+
+    @staticmethod
+    def _pointwise_prefix(step, operations) -> Callable[[np.ndarray], np.ndarray]:
+        """The float intermediate of a fused step after `operations`."""
+        def run(arr):
+            if not np.issubdtype(arr.dtype, np.floating):
+                arr = convert(arr, step.WORKING_DTYPE)
+            for operation in operations:
+                arr = operation.process(arr)
+            return arr
+        return run
+
+    def _release(self, *arrays) -> None:
+        """Give strip buffers back to the pipeline's pool, if it has one."""
+        if self.pipeline.pool is not None:
+            for array in arrays:
+                self.pipeline.pool.give(array)
+
+    def _run_steps(self, steps: List[Operation], tile: np.ndarray) -> np.ndarray:
+        image_data = self.pipeline.to_working(ImageData(tile))
+        for step in steps:
+            image_data = self.pipeline._apply_step(step, image_data)
+        return image_data.get_array()
+
+    @staticmethod
+    def _row_footprint(operation: Operation) -> int:
+        footprint = getattr(operation, 'footprint', None)
+        return footprint()[0] if footprint else 0
+
+
+class PILSource:
+    """
+    Row-sliceable view of an image file, decoded by PIL and cropped per
+    strip; source[rows] or source[rows, columns].
+    """
+
+    def __init__(self, path: str):
+        from PIL import Image
+
+        self.image = Image.open(path)
+        if self.image.mode != 'RGB':
+            self.image = self.image.convert('RGB')
+        width, height = self.image.size
+        self.shape = (height, width, 3)
+
+    def __getitem__(self, key) -> np.ndarray:
+        rows, columns = key if isinstance(key, tuple) else (key, slice(None))
+        start, stop, _ = rows.indices(self.shape[0])
+        left, right, _ = columns.indices(self.shape[1])
+        return np.asarray(self.image.crop((left, start, right, stop)))
+
+
+def open_source(path: str):
+    """Open an image file for strip-wise reading: memmap for .npy and raw, else PILSource."""
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if is_raw_path(path):
+        return ImageData.open_raw(path).get_array()
+    return PILSource(path)
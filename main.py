@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import logging
 import sys
 from core.config import Config
+from core.convolver import Convolver
 from core.pipeline import OperationPipeline
+from core.precision import PRECISIONS
 from core.image_data import ImageData
 
 """
@@ -34,6 +37,13 @@ def main():
         2. Create a Config object that handles loading and validation.
         3. Create the operation pipeline using OperationPipeline.create_from_config().
         4. Load the image, apply the pipeline, and handle output/display.
+           With --batch, apply it to every matched input instead (run_batch).
+           With --tiled, stream it through the pipeline in strips (run_tiled).
+           With --serve, answer edit requests over HTTP instead (run_server).
+           With --preview, render and show a reduced-resolution version (run_preview).
+           A config with 'branches' writes all its variants from one decode (run_fanout).
+           With --watch, re-render incrementally whenever the config changes (core.session).
+           With --roi (or a config 'roi'), compute only that rectangle of the output (core.roi).
 
         Returns:
             None
@@ -44,22 +54,157 @@ def main():
             ValueError: If the configuration is invalid.
         """
     parser = argparse.ArgumentParser()
-    parser.add_argument('--config', required=True)
+    parser.add_argument('--config')
+    parser.add_argument('--log-level', default='WARNING',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="INFO also logs the convolution backend choices")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="threads used by each convolution")
+    parser.add_argument('--no-fuse', action='store_true',
+                        help="run consecutive pointwise operations one by one")
+    parser.add_argument('--no-lut', action='store_true',
+                        help="do not compile byte operations into lookup tables "
+                             "(tables are only used with --precision uint8)")
+    parser.add_argument('--precision', choices=sorted(PRECISIONS), default=None,
+                        help="working dtype between operations (overrides the "
+                             "config's 'precision'; default float32)")
+    parser.add_argument('--in-place', action='store_true',
+                        help="run the operations in place on reused buffers "
+                             "(lower peak memory, fewer allocations)")
+    parser.add_argument('--profile', nargs='?', const='-', metavar='PATH',
+                        help="write a per-operation JSON profile to PATH "
+                             "(or print it when no PATH is given)")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help="cache the result of every operation prefix in DIR, "
+                             "so re-runs resume from the longest unchanged prefix")
+    parser.add_argument('--cache-bytes', type=int, default=1 << 30,
+                        help="byte budget of the on-disk cache (default 1 GiB)")
+    parser.add_argument('--preview', type=int, choices=[2, 4, 8], default=None,
+                        help="decode and process at 1/N resolution and show the "
+                             "result, for tuning parameters; nothing is saved")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and re-render whenever the config file "
+                             "is saved, recomputing only the steps after the first change")
+    parser.add_argument('--tiled', action='store_true',
+                        help="process the image in horizontal strips, for images "
+                             "larger than memory (.npy inputs are memory-mapped)")
+    parser.add_argument('--tile-rows', type=int, default=None,
+                        help="rows per strip with --tiled (default: 64 MiB of float64 data)")
+    parser.add_argument('--roi', type=parse_region, default=None, metavar='X,Y,W,H',
+                        help="compute only this rectangle of the output, reading only "
+                             "the input it depends on (overrides the config's 'roi')")
+    parser.add_argument('--roi-local-stats', action='store_true',
+                        help="with --roi, take global statistics (e.g. the contrast mean) "
+                             "over the region instead of the whole image")
+    parser.add_argument('--batch', metavar='INPUTS',
+                        help="glob, directory or manifest file of input images; "
+                             "the config then only needs 'operations'")
+    parser.add_argument('--output-dir',
+                        help="directory for the batch outputs (required with --batch)")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="worker processes for --batch and --serve "
+                             "(default: CPU count)")
+    parser.add_argument('--overlap', action='store_true',
+                        help="with --batch, run in one process and overlap the decode, "
+                             "compute and encode of consecutive images (asyncio)")
+    parser.add_argument('--output-format', default=None,
+                        help="extension for the batch outputs, e.g. .png")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="run as a local HTTP service on PORT instead of "
+                             "processing a config (see core/server.py)")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="interface for --serve (default: localhost only; other "
+                             "interfaces need --allow-remote)")
+    parser.add_argument('--allow-remote', action='store_true',
+                        help="let --serve listen on a non-loopback --host; every client "
+                             "that reaches it can use the --serve-root directories")
+    parser.add_argument('--serve-root', action='append', default=[], metavar='DIR',
+                        help="directory that --serve requests may read 'input' from and "
+                             "write 'output' to (repeatable; without it only "
+                             "'input_base64' requests are accepted)")
     args = parser.parse_args()
+    if args.config is None and args.serve is None:
+        parser.error("--config is required unless --serve is given")
+    if args.preview:
+        reject_flags(parser, '--preview', args, ['--profile', '--cache-dir', '--tiled'])
+    if args.tiled:
+        reject_flags(parser, '--tiled', args, ['--profile', '--cache-dir'])
+    logging.basicConfig(level=args.log_level,
+                        format="%(levelname)s %(name)s: %(message)s")
+    Convolver.DEFAULT_WORKERS = args.workers
+
+    if args.serve is not None:
+        run_server(args)
+        return
+    if args.batch:
+        run_batch(args)
+        return
+    if args.watch:
+        from core.session import watch
+        print(f">> Watching {args.config} for changes. Ctrl+C to stop.")
+        watch(args.config, precision=args.precision)
+        return
 
     try:
         # Create config object which loads, validates and prepares operations
         config = Config(args.config)
+        region = args.roi or config.roi
+        if region:
+            # the cache, preview and tiled paths all render the whole image
+            reject_flags(parser, '--roi' if args.roi else "'roi'", args,
+                         ['--cache-dir', '--preview', '--tiled'])
+        elif args.roi_local_stats:
+            parser.error("--roi-local-stats needs --roi or a config 'roi'")
+        if config.branches:
+            # variants share their intermediate results, so none may be overwritten
+            reject_flags(parser, "'branches'", args,
+                         ['--in-place', '--profile', '--cache-dir', '--preview', '--tiled',
+                          '--roi'])
+            run_fanout(args, config)
+            return
+        # cache keys exist per step: with --cache-dir every operation is its
+        # own step, so a tweak to the last one resumes right before it
         pipeline = OperationPipeline.create_from_config(
-            config.operations_config)
-        image = ImageData.load(config.input_path)
-        result = pipeline.apply(image)
+            config.operations_config, fuse=not (args.no_fuse or args.cache_dir),
+            lut=not (args.no_lut or args.cache_dir),
+            precision=args.precision or config.precision, in_place=args.in_place)
+        if args.preview:
+            run_preview(args, config, pipeline)
+            return
+        if args.tiled:
+            run_tiled(args, config, pipeline)
+            return
+
+        profiler = None
+        if args.profile:
+            from core.profiler import PipelineProfiler
+            profiler = PipelineProfiler().attach(pipeline)
+        if region:
+            from core.roi import RegionProcessor
+            result = RegionProcessor(pipeline, exact_statistics=not args.roi_local_stats).run(
+                config.input_path, region)
+        elif args.cache_dir:
+            from core.result_cache import ResultCache
+            cache = ResultCache(args.cache_dir, max_bytes=args.cache_bytes)
+            result = pipeline.apply_cached(
+                lambda: ImageData.load(config.input_path), cache,
+                ResultCache.file_hash(config.input_path))
+        else:
+            image = ImageData.load(config.input_path)
+            result = pipeline.apply(image)
 
         # Print each operation configuration
         print(">> Applied the following operations:")
         for i, operation in enumerate(config.operations_config):
             print(f"\t{i + 1}. {operation}")
 
+        if profiler:
+            report = profiler.to_json(None if args.profile == '-' else args.profile)
+            if args.profile == '-':
+                print(report)
+            else:
+                print(f"Profile saved to {args.profile}")
+
         # Handle output based on configuration
         if config.output_path:
             result.save(config.output_path)
@@ -74,6 +219,126 @@ def main():
         sys.exit(1)
 
 
+def reject_flags(parser, mode, args, options):
+    """Exit with a usage error if any of `options` (e.g. '--profile') is set along with `mode`."""
+    for option in options:
+        if getattr(args, option[2:].replace('-', '_')) not in (None, False):
+            parser.error(f"{option} is not supported with {mode}")
+
+
+def run_fanout(args, config):
+    """Render every output of a config with 'branches' from one load of the input."""
+    from core.fanout import FanoutPlan
+
+    plan = FanoutPlan.from_config(config, fuse=not args.no_fuse, lut=not args.no_lut,
+                                  precision=args.precision)
+    print(f">> Rendering {len(plan.outputs)} variants with {plan.operation_count} "
+          f"operations ({plan.variant_operations} without sharing):")
+    for output in plan.run(ImageData.load(config.input_path)):
+        print(f"\t{output}")
+
+
+def parse_region(text):
+    """Parse an X,Y,W,H command-line region."""
+    try:
+        region = tuple(int(value) for value in text.split(','))
+    except ValueError:
+        region = ()
+    if len(region) != 4:
+        raise argparse.ArgumentTypeError(f"expected X,Y,W,H, got {text!r}")
+    return region
+
+
+def run_preview(args, config, pipeline):
+    """Load the input at 1/--preview resolution, apply the scaled pipeline and show it."""
+    import time
+
+    start = time.perf_counter()
+    image = ImageData.load(config.input_path, scale=args.preview)
+    result = pipeline.scaled(args.preview).apply(image)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    height, width = result.get_array().shape[:2]
+    print(f">> Preview {width}x{height} (1/{args.preview}) rendered in {elapsed_ms:.0f} ms")
+    result.show()
+
+
+def run_tiled(args, config, pipeline):
+    """Run the pipeline strip by strip from the input file into the output file."""
+    from core.tiled import TiledProcessor
+
+    if not config.output_path:
+        raise ValueError("--tiled needs an output path in the config")
+    TiledProcessor(pipeline, tile_rows=args.tile_rows).run(
+        config.input_path, config.output_path)
+    print(f"Image saved to {config.output_path}")
+    if config.display:
+        print("display is not supported with --tiled")
+
+
+def run_server(args):
+    """Serve edit requests on --host:--serve until interrupted."""
+    from core.server import ImageServer
+
+    try:
+        server = ImageServer(args.host, args.serve, workers=args.processes,
+                             roots=args.serve_root, allow_remote=args.allow_remote)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    host, port = server.address
+    print(f">> Serving on http://{host}:{port} with {server.workers} workers "
+          f"(POST /process, GET /metrics). Ctrl+C to stop.")
+    server.serve_forever()
+
+
+def run_batch(args):
+    """
+    Apply the config's operations to every input matched by --batch.
+
+    Failures of single images are printed and do not stop the run; the
+    exit code is 1 if any image failed.
+    """
+    from core.batch import BatchProcessor, collect_inputs
+
+    try:
+        if not args.output_dir:
+            raise ValueError("--output-dir is required with --batch")
+        config = Config(args.config, batch=True)
+        pipeline = OperationPipeline.create_from_config(
+            config.operations_config, fuse=not args.no_fuse,
+            lut=not args.no_lut, precision=args.precision or config.precision,
+            in_place=args.in_place)
+        inputs = collect_inputs(args.batch)
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    def report(result):
+        if result.ok:
+            print(f"\t{result.input_path} -> {result.output_path}")
+        else:
+            print(f"\tFAILED {result.input_path}: {result.error}")
+
+    print(f">> Processing {len(inputs)} images:")
+    if args.overlap:
+        from core.async_processing import AsyncBatchProcessor
+        processor = AsyncBatchProcessor(pipeline, args.output_dir,
+                                        output_extension=args.output_format)
+    else:
+        processor = BatchProcessor(pipeline, args.output_dir, args.processes,
+                                   args.output_format)
+    try:
+        batch_report = processor.run(inputs, on_result=report)
+    except ValueError as e:
+        # e.g. two inputs mapped to one output; nothing has been written
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f">> {batch_report.succeeded} succeeded, "
+          f"{len(batch_report.failures)} failed.")
+    if batch_report.failures:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     printUI(0)
     main()
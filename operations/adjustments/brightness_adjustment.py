@@ -2,6 +2,7 @@
 from operations.base.filter_decorator import FilterDecorator
 import numpy as np
 from core.image_data import ImageData
+from core.precision import value_max
 
 """
 BrightnessAdjustment: scales pixel values to adjust brightness.
@@ -27,6 +28,8 @@ class BrightnessAdjustment(FilterDecorator):
     Range:
         value must be > 0. Recommended range [0.0, 3.0].
     """
+    POINTWISE = True
+    HOMOGENEOUS = True
 
     def __init__(self, value: float, wrapped_operation=None):
         super().__init__(wrapped_operation)
@@ -35,12 +38,32 @@ class BrightnessAdjustment(FilterDecorator):
         self.factor = value
 
     def _apply_filter(self, image_data: ImageData) -> ImageData:
-        # Work on float copy to prevent overflow
-        arr = image_data.get_array().astype(float)
-        # Scale brightness
-        arr *= self.factor
-        # Clip to valid [0,255]
-        np.clip(arr, 0, 255, out=arr)
-        # Update image and return
-        image_data.image = arr.astype(np.uint8)
-        return image_data
+        return ImageData(self.process(image_data.get_array()))
+
+    def process(self, arr: np.ndarray, out: np.ndarray = None,
+                pool=None) -> np.ndarray:
+        if np.issubdtype(arr.dtype, np.floating):
+            # Scale straight into the output, no temporaries
+            result = self._output(arr, out)
+            np.multiply(arr, self.factor, out=result)
+        else:
+            # Work on float copy to prevent overflow
+            result = self._as_float(arr)
+            # Scale brightness
+            result *= self.factor
+        # Clip to the valid range ([0,255], or [0,65535] for uint16)
+        np.clip(result, 0, value_max(arr.dtype), out=result)
+        return self._store(result, arr.dtype, out)
+
+    def commutes_with(self, other) -> bool:
+        # exact including clipping: two factors on the same side of 1 clip
+        # alike in either order; a darkening factor never clips, so it
+        # commutes with filters that scale along and never clip either
+        if isinstance(other, BrightnessAdjustment):
+            return (self.factor <= 1) == (other.factor <= 1)
+        return (self.factor <= 1 and getattr(other, 'HOMOGENEOUS', False)
+                and getattr(other, 'RANGE_PRESERVING', False))
+
+    def lookup_table(self) -> np.ndarray:
+        # the same float path as process(), evaluated once per byte value
+        return self.process(np.arange(256, dtype=np.uint8))
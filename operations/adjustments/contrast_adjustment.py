@@ -1,14 +1,18 @@
-from typing import Any
+from typing import Any, List
 
 import numpy as np
 from operations.base.filter_decorator import FilterDecorator
 from core.image_data import ImageData
+from core.precision import value_max
 
 
 class ContrastAdjustment(FilterDecorator):
     """
     Concrete decorator for contrast adjustment using the Decorator pattern.
     """
+    POINTWISE = True
+    HOMOGENEOUS = True
+    GLOBAL_STATISTIC = True
 
     def __init__(self, value: float, wrapped_operation=None):
         """
@@ -26,6 +30,8 @@ class ContrastAdjustment(FilterDecorator):
             raise ValueError("Contrast value must be between -10.0 and 10.0")
 
         self.value = value
+        # per-channel mean to stretch around; None = mean of the input
+        self.mean = None
 
     def _apply_filter(self, image_data: ImageData) -> ImageData:
         """
@@ -37,8 +43,54 @@ class ContrastAdjustment(FilterDecorator):
         Returns:
             The processed image data with contrast adjustment applied
         """
-        img_float = image_data.image.astype(np.float32)
-        mean = np.mean(img_float, axis=(0, 1), keepdims=True)
-        adjusted_image = np.clip((img_float - mean) * self.value + mean, 0, 255)
-        image_data.image = adjusted_image.astype(image_data.image.dtype)
-        return image_data
+        return ImageData(self.process(image_data.get_array()))
+
+    def process(self, arr: np.ndarray, out: np.ndarray = None,
+                pool=None) -> np.ndarray:
+        """
+        Stretch every channel around its mean.
+
+        Args:
+            arr: The image array to process
+            out: optional output array (may be arr)
+            pool: unused; the float path needs no scratch arrays
+
+        Returns:
+            The contrast-adjusted array, in the dtype of `arr`
+        """
+        if np.issubdtype(arr.dtype, np.floating):
+            img_float = arr
+            result = self._output(arr, out)
+        else:
+            img_float = arr.astype(np.float32)
+            result = img_float
+        mean = self.mean
+        if mean is None:
+            mean = self.combine_statistics(
+                [self.partial_statistic(img_float, slice(None))])
+        # (img - mean) * value + mean, in the result buffer
+        np.subtract(img_float, mean, out=result)
+        result *= self.value
+        result += mean
+        np.clip(result, 0, value_max(arr.dtype), out=result)
+        return self._store(result, arr.dtype, out)
+
+    def partial_statistic(self, arr: np.ndarray, rows: slice):
+        """Per-channel sum and pixel count of the given rows."""
+        tile = arr[rows]
+        # accumulate in float64: a float32 sum drifts by whole levels on
+        # images with tens of millions of pixels. One channel at a time is
+        # several times faster than reducing over axes (0, 1) at once.
+        planes = [tile] if tile.ndim == 2 else [tile[:, :, c] for c in range(tile.shape[2])]
+        sums = np.array([plane.sum(dtype=np.float64) for plane in planes])
+        return (sums if tile.ndim == 3 else sums[0]), tile.shape[0] * tile.shape[1]
+
+    def combine_statistics(self, partials: List[Any]) -> np.ndarray:
+        """Per-channel mean of the whole image."""
+        total = sum(partial[0] for partial in partials)
+        count = sum(partial[1] for partial in partials)
+        mean = np.asarray(total / count, dtype=np.float32)
+        return mean.reshape((1, 1) + mean.shape)
+
+    def with_statistic(self, statistic: np.ndarray) -> 'ContrastAdjustment':
+        return self._copy_with(mean=statistic)
@@ -1,12 +1,15 @@
 import numpy as np
 from operations.base.filter_decorator import FilterDecorator
 from core.image_data import ImageData
+from core.precision import value_max
 
 
 class SaturationAdjustment(FilterDecorator):
     """
     Concrete decorator for saturation adjustment using the Decorator pattern.
     """
+    POINTWISE = True
+    HOMOGENEOUS = True
     BLUE_WEIGHT = 0.114
     GREEN_WEIGHT = 0.587
     RED_WEIGHT = 0.299
@@ -34,32 +37,56 @@ class SaturationAdjustment(FilterDecorator):
         """
         Apply saturation adjustment to the image using pure NumPy.
         """
-        # Get the image array
-        image = image_data.get_array()
+        return ImageData(self.process(image_data.get_array()))
 
-        # Only process if image is not grayscale
-        if len(image.shape) == 3 and image.shape[2] >= 3:
-            # Convert to float and normalize to [0, 1]
-            img_float = image.astype(float) / 255.0
+    def process(self, arr: np.ndarray, out: np.ndarray = None,
+                pool=None) -> np.ndarray:
+        """
+        Blend every pixel with its luminance.
 
-            # Calculate grayscale version (luminance)
-            # Standard conversion weights: 0.299 R + 0.587 G + 0.114 B
-            grayscale = (self.RED_WEIGHT * img_float[:, :, 0] +
-                         self.GREEN_WEIGHT * img_float[:, :, 1] +
-                         self.BLUE_WEIGHT * img_float[:, :, 2])
-            # align num of dims for next step
-            grayscale = np.expand_dims(grayscale, axis=2)
+        Works in the image's value range: with L the luminance,
+        L + v * (x - L) == v * x + (1 - v) * L, so the result is built in
+        the output buffer with two channel-sized scratch arrays.
+
+        Args:
+            arr: The image array to process
+            out: optional output array (may be arr)
+            pool: optional BufferPool for the scratch arrays
+
+        Returns:
+            The saturation-adjusted array, in the dtype of `arr`
+        """
+        # Only process if image is not grayscale
+        if len(arr.shape) != 3 or arr.shape[2] < 3:
+            return arr.copy() if out is None else self._store(arr, arr.dtype, out)
 
-            # Blend between grayscale and color based on saturation factor
-            # factor = 0: fully grayscale
-            # factor = 1: original image
-            # factor > 1: increased saturation
-            adjusted = grayscale + self.value * (img_float - grayscale)
+        scale = value_max(arr.dtype)
+        is_float = np.issubdtype(arr.dtype, np.floating)
+        work_dtype = arr.dtype if is_float else np.float64
 
-            # Convert back to uint8
-            adjusted = np.clip(adjusted * 255.0, 0, 255).astype(np.uint8)
+        # Calculate grayscale version (luminance)
+        # Standard conversion weights: 0.299 R + 0.587 G + 0.114 B
+        grayscale = self._take(pool, arr.shape[:2], work_dtype)
+        term = self._take(pool, arr.shape[:2], work_dtype)
+        np.multiply(arr[:, :, 0], self.RED_WEIGHT, out=grayscale)
+        np.multiply(arr[:, :, 1], self.GREEN_WEIGHT, out=term)
+        grayscale += term
+        np.multiply(arr[:, :, 2], self.BLUE_WEIGHT, out=term)
+        grayscale += term
 
-            # Update the image data
-            image_data.image = adjusted
+        # Blend between grayscale and color based on saturation factor
+        # factor = 0: fully grayscale
+        # factor = 1: original image
+        # factor > 1: increased saturation
+        grayscale *= 1.0 - self.value
+        result = self._output(arr, out) if is_float else np.empty(arr.shape, np.float64)
+        np.multiply(arr, self.value, out=result)
+        # align num of dims with the channels
+        result += grayscale[:, :, np.newaxis]
+        if pool is not None:
+            pool.give(grayscale)
+            pool.give(term)
 
-        return image_data
+        # Clip and convert back to the input dtype
+        np.clip(result, 0, scale, out=result)
+        return self._store(result, arr.dtype, out)
@@ -1,6 +1,9 @@
 """Base decorator class implementing decorator pattern."""
+import copy
 from abc import abstractmethod
-from typing import Any
+from typing import Any, List, Tuple
+
+import numpy as np
 
 from .operation import Operation
 from core.image_data import ImageData
@@ -10,7 +13,41 @@ class FilterDecorator(Operation):
     """
     Base decorator class that wraps another operation.
     Similar to Java's Decorator pattern implementation.
+
+    Subclasses that are per-pixel functions of their input (no spatial
+    neighbourhood) set POINTWISE = True and implement process(arr), which
+    lets the pipeline fuse consecutive pointwise operations into one pass.
+    Those that are pure per-channel functions of the input byte also
+    implement lookup_table(). HOMOGENEOUS marks operations with
+    op(k * image) == k * op(image) for k > 0, ignoring clipping;
+    RANGE_PRESERVING marks those whose output never leaves the range of
+    their input, so they never clip (averaging filters). Only the two
+    together make a swap with a scaling exact.
+
+    apply_in_place(arr, pool) is the allocation-free variant used by
+    pipelines that own their working buffer: it may overwrite arr and takes
+    scratch arrays from a core.buffer_pool.BufferPool. Pointwise operations
+    get it for free by supporting process(arr, out=arr, pool=pool).
+
+    Operations that depend on a statistic of the whole image (e.g. its
+    mean) set GLOBAL_STATISTIC = True and implement partial_statistic,
+    combine_statistics and with_statistic, so tiled execution can compute
+    the statistic in a separate pass over the tiles.
+
+    Operations with a window measured in pixels override scaled(factor),
+    so a preview rendered at reduced resolution looks like the full one.
+
+    Operations are immutable after construction: _apply_filter and process
+    return new arrays (or write only into `out`), never modify their input
+    or themselves, and parameter arrays (kernels, tables) are read-only. One
+    instance can therefore serve any number of images and threads at once;
+    variants are made with _copy_with (e.g. with_statistic, scaled,
+    with_wrapped_filter).
     """
+    POINTWISE = False
+    HOMOGENEOUS = False
+    RANGE_PRESERVING = False
+    GLOBAL_STATISTIC = False
 
     def __init__(self, wrapped_filter: Operation = None):
         """
@@ -24,29 +61,44 @@ class FilterDecorator(Operation):
 
     def set_wrapped_filter(self, wrapped_filter: Operation) -> None:
         """
-        Sets the wrapped operation.
+        Sets the wrapped operation. This changes every chain the decorator
+        is part of; prefer with_wrapped_filter on shared instances.
 
         Args:
             wrapped_filter: The operation to be wrapped
         """
         self._wrapped_filter = wrapped_filter
 
+    def with_wrapped_filter(self, wrapped_filter: Operation) -> 'FilterDecorator':
+        """A copy of this decorator wrapping `wrapped_filter` (self is unchanged)."""
+        return self._copy_with(_wrapped_filter=wrapped_filter)
+
     def apply(self, image_data: Any) -> Any:
         """
         Template method pattern: delegates to wrapped operation,
         then calls internal _apply_filter.
 
+        The chain of wrapped decorators is walked iteratively, so long
+        chains do not recurse.
+
         Args:
             image_data: The image data to process
 
         Returns:
             The processed image data
         """
-        processed_img = image_data
-        if self._wrapped_filter:
-            processed_img = self._wrapped_filter.apply(image_data)
+        chain = []
+        operation = self
+        while isinstance(operation, FilterDecorator):
+            chain.append(operation)
+            operation = operation._wrapped_filter
 
-        return self._apply_filter(processed_img)
+        processed_img = image_data
+        if operation is not None:
+            processed_img = operation.apply(processed_img)
+        for decorator in reversed(chain):
+            processed_img = decorator._apply_filter(processed_img)
+        return processed_img
 
     @abstractmethod
     def _apply_filter(self, image_data: ImageData) -> Any:
@@ -54,9 +106,157 @@ class FilterDecorator(Operation):
         Abstract method to be implemented by concrete filters.
 
         Args:
-            image_data: The image data to process
+            image_data: The image data to process (not modified)
 
         Returns:
-            The processed image data
+            A new ImageData with the processed image
+        """
+        pass
+
+    def process(self, arr: np.ndarray, out: np.ndarray = None,
+                pool=None) -> np.ndarray:
+        """
+        Apply the operation to a raw array without quantizing float input.
+
+        Float arrays come back in the same float dtype (clipped to [0, 255]);
+        integer arrays are cast back to their dtype (uint16 arrays use the
+        range [0, 65535], see core.precision.value_max). Only pointwise
+        operations implement this.
+
+        Args:
+            arr: The image array to process (not modified, unless it is out)
+            out: optional array of arr's shape and dtype for the result;
+                may be arr itself
+            pool: optional BufferPool for scratch arrays
+
+        Returns:
+            The processed array (out, if given)
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support array processing")
+
+    def apply_in_place(self, arr: np.ndarray, pool) -> np.ndarray:
+        """
+        Apply the operation to an array the caller owns, reusing memory.
+
+        arr may be overwritten; if the result is in another buffer, arr is
+        given back to the pool.
+
+        Args:
+            arr: The writable working array
+            pool: core.buffer_pool.BufferPool for scratch and output arrays
+
+        Returns:
+            The processed array (often arr itself)
+        """
+        if self.POINTWISE:
+            return self.process(arr, out=arr, pool=pool)
+        result = self._apply_filter(ImageData(arr)).get_array()
+        if result is not arr:
+            pool.give(arr)
+        return result
+
+    def lookup_table(self):
+        """
+        256-entry uint8 table equivalent to this operation on uint8 input.
+
+        Only operations that map every channel value independently of the
+        rest of the image (e.g. brightness) return a table.
+
+        Returns:
+            np.ndarray of shape (256,) and dtype uint8, or None
+        """
+        return None
+
+    def footprint(self) -> Tuple[int, int]:
+        """
+        Neighbourhood radius (rows, columns) that every output pixel reads.
+
+        Output pixels further than this from the edge of a tile are the
+        same as when the whole image is processed.
+
+        Returns:
+            (row radius, column radius); (0, 0) for pointwise operations
+        """
+        return 0, 0
+
+    def scaled(self, factor: int) -> 'FilterDecorator':
+        """
+        The equivalent of this operation on an image downscaled by `factor`.
+
+        Pointwise operations and operations normalized by the image itself
+        look the same at any resolution and return self.
+        """
+        return self
+
+    def partial_statistic(self, arr: np.ndarray, rows: slice) -> Any:
         """
-        pass
\ No newline at end of file
+        The global statistic of this operation over rows `rows` of `arr`.
+
+        Args:
+            arr: a tile of the operation's input (rows outside `rows` are
+                only there as neighbourhood)
+            rows: the rows of the tile that count towards the statistic
+
+        Returns:
+            A partial result for combine_statistics
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} has no global statistic")
+
+    def combine_statistics(self, partials: List[Any]) -> Any:
+        """Combine the partial_statistic results of all tiles."""
+        raise NotImplementedError(
+            f"{type(self).__name__} has no global statistic")
+
+    def with_statistic(self, statistic: Any) -> 'FilterDecorator':
+        """
+        A copy of this operation that uses `statistic` instead of computing
+        it from the image it is applied to.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} has no global statistic")
+
+    def _copy_with(self, **attributes) -> 'FilterDecorator':
+        """Shallow copy of this operation with some attributes replaced."""
+        clone = copy.copy(self)
+        clone.__dict__.update(attributes)
+        return clone
+
+    @staticmethod
+    def _frozen(arr: np.ndarray) -> np.ndarray:
+        """arr, made read-only (parameter arrays are shared between threads)."""
+        arr.setflags(write=False)
+        return arr
+
+    @staticmethod
+    def _scaled_size(size: int, factor: int, minimum: int = 1) -> int:
+        """Odd window size covering the same area as `size` after downscaling by `factor`."""
+        scaled = int(round(size / factor))
+        return max(minimum, scaled if scaled % 2 == 1 else scaled + 1)
+
+    @staticmethod
+    def _output(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """out, or a new array like arr."""
+        return np.empty_like(arr) if out is None else out
+
+    @staticmethod
+    def _store(result: np.ndarray, dtype, out: np.ndarray = None) -> np.ndarray:
+        """result cast to dtype, written into out when one is given."""
+        if out is None:
+            return result.astype(dtype, copy=False)
+        if result is not out:
+            np.copyto(out, result, casting='unsafe')
+        return out
+
+    @staticmethod
+    def _take(pool, shape, dtype) -> np.ndarray:
+        """A scratch array from the pool, or a new one without a pool."""
+        return np.empty(shape, dtype=dtype) if pool is None else pool.take(shape, dtype)
+
+    @staticmethod
+    def _as_float(arr: np.ndarray, dtype=np.float64) -> np.ndarray:
+        """Float copy of arr: float arrays keep their dtype, others become dtype."""
+        if np.issubdtype(arr.dtype, np.floating):
+            return arr.copy()
+        return arr.astype(dtype)
@@ -0,0 +1,65 @@
+"""Fused run of consecutive pointwise operations."""
+from typing import List
+
+import numpy as np
+
+from .filter_decorator import FilterDecorator
+from core.image_data import ImageData
+from core.precision import convert
+
+
+class FusedPointwiseOperation(FilterDecorator):
+    """
+    Runs a run of pointwise operations as a single float pass.
+
+    The image is converted to float32 once, every operation's process()
+    works on the float intermediate, and the result is cast back to the
+    input dtype at the end. Each operation still clips to [0, 255], so the
+    only difference from the unfused chain is the uint8 truncation that is
+    no longer applied between steps. Each dropped truncation is worth less
+    than one 8-bit level, amplified by the gain of the steps after it; with
+    factors up to 2 the fused output stays within TOLERANCE levels of the
+    unfused chain (and is the more accurate of the two).
+    """
+    POINTWISE = True
+    WORKING_DTYPE = np.float32
+    # max abs difference (in 8-bit levels) to the unfused chain, factors <= 2
+    TOLERANCE = 5
+
+    def __init__(self, operations: List[FilterDecorator], wrapped_operation=None):
+        """
+        Args:
+            operations: pointwise operations, in application order
+            wrapped_operation: The next filter in the chain (if any)
+        """
+        super().__init__(wrapped_operation)
+        if not all(op.POINTWISE for op in operations):
+            raise ValueError("Only pointwise operations can be fused")
+        self.operations = list(operations)
+        self.HOMOGENEOUS = all(op.HOMOGENEOUS for op in self.operations)
+
+    def _apply_filter(self, image_data: ImageData) -> ImageData:
+        return ImageData(self.process(image_data.get_array()))
+
+    def process(self, arr: np.ndarray, out: np.ndarray = None,
+                pool=None) -> np.ndarray:
+        if np.issubdtype(arr.dtype, np.floating):
+            # the first operation writes the output, the rest work in it
+            result = self.operations[0].process(arr, out=out, pool=pool)
+            for operation in self.operations[1:]:
+                result = operation.process(result, out=result, pool=pool)
+            return result
+
+        # rescaled to the 0-255 float range (uint16 data is 0-65535)
+        result = convert(arr, self.WORKING_DTYPE)
+        for operation in self.operations:
+            result = operation.process(result, out=result, pool=pool)
+        return self._store(convert(result, arr.dtype), arr.dtype, out)
+
+    def commutes_with(self, other) -> bool:
+        return all(operation.commutes_with(other) or other.commutes_with(operation)
+                   for operation in self.operations)
+
+    def __repr__(self) -> str:
+        names = ", ".join(type(op).__name__ for op in self.operations)
+        return f"{type(self).__name__}([{names}])"
@@ -0,0 +1,74 @@
+"""Lookup-table execution of per-channel byte operations."""
+from typing import List
+
+import numpy as np
+
+from .filter_decorator import FilterDecorator
+from core.image_data import ImageData
+
+
+class LookupTableOperation(FilterDecorator):
+    """
+    Applies a run of lookup-table operations as one 256-entry table.
+
+    The tables of the wrapped operations are composed once, so the whole
+    run costs a single fancy-indexing pass over uint8 data (one byte read and one
+    byte written per value, instead of float64 temporaries). Since every
+    operation's table is computed through its own process(), the result is
+    identical to applying the operations one by one.
+    Non-uint8 input falls back to the operations' process().
+    """
+    POINTWISE = True
+    # bytes of uint8 data indexed at once when writing into `out`
+    BAND_BYTES = 1 << 20
+
+    def __init__(self, operations: List[FilterDecorator], wrapped_operation=None):
+        """
+        Args:
+            operations: operations with a lookup_table(), in application order
+            wrapped_operation: The next filter in the chain (if any)
+        """
+        super().__init__(wrapped_operation)
+        self.operations = list(operations)
+        self.HOMOGENEOUS = all(op.HOMOGENEOUS for op in self.operations)
+        self.table = np.arange(256, dtype=np.uint8)
+        for operation in self.operations:
+            table = operation.lookup_table()
+            if table is None:
+                raise ValueError(
+                    f"{type(operation).__name__} has no lookup table")
+            self.table = table[self.table]
+        self._frozen(self.table)
+
+    def _apply_filter(self, image_data: ImageData) -> ImageData:
+        return ImageData(self.process(image_data.get_array()))
+
+    def process(self, arr: np.ndarray, out: np.ndarray = None,
+                pool=None) -> np.ndarray:
+        if arr.dtype == np.uint8:
+            # fancy indexing with the uint8 array directly; np.take would
+            # first convert the indices to an intp copy (8x the image size)
+            if out is None:
+                return self.table[arr]
+            # band by band, so the temporary stays BAND_BYTES even in place
+            rows = max(1, self.BAND_BYTES // max(1, arr[:1].nbytes))
+            for start in range(0, len(arr), rows):
+                out[start:start + rows] = self.table[arr[start:start + rows]]
+            return out
+        result = arr
+        for operation in self.operations:
+            result = operation.process(result, out=out, pool=pool)
+            # after the first step the result is ours to overwrite
+            out = result
+        return result
+
+    def lookup_table(self) -> np.ndarray:
+        return self.table
+
+    def commutes_with(self, other) -> bool:
+        return all(operation.commutes_with(other) or other.commutes_with(operation)
+                   for operation in self.operations)
+
+    def __repr__(self) -> str:
+        names = ", ".join(type(op).__name__ for op in self.operations)
+        return f"{type(self).__name__}([{names}])"
@@ -24,4 +24,18 @@ class Operation(ABC):
         Returns:
             The processed image data
         """
-        pass
\ No newline at end of file
+        pass
+
+    def commutes_with(self, other: 'Operation') -> bool:
+        """
+        Whether applying this operation and `other` in either order gives the
+        same result, clipping included (up to rounding). Used by the pipeline
+        to validate out-of-order execution; conservative by default.
+
+        Args:
+            other: The other operation
+
+        Returns:
+            True if the two operations commute
+        """
+        return False
@@ -7,21 +7,42 @@ from operations.base.filter_decorator import FilterDecorator
 class BoxBlurFilter(FilterDecorator):
     """
     Concrete decorator for box blur filter using the Decorator pattern.
+
+    Uses Convolver.apply_box (running sums), so the cost per pixel does not
+    depend on the window size and there is no upper bound on width/height.
     """
+    HOMOGENEOUS = True
+    RANGE_PRESERVING = True
+    MIN_SIZE = 3
+
     def __init__(self, width: int, height: int, wrapped_operation=None):
         super().__init__(wrapped_operation)
-        # self.width = width
-        # self.height = height
-        # accepted range
-        self.width = max(3, min(31, width if width % 2 == 1 else width + 1))
-        self.height = max(3, min(31, height if height % 2 == 1 else height + 1))
-        # normalized box kernel
-        self.kernel = np.ones((height, width), dtype=float) / (width * height)
+        # accepted range: odd sizes, at least MIN_SIZE
+        self.width = max(self.MIN_SIZE, width if width % 2 == 1 else width + 1)
+        self.height = max(self.MIN_SIZE, height if height % 2 == 1 else height + 1)
+
+    @property
+    def kernel(self) -> np.ndarray:
+        """
+        The normalized box kernel. Built on access only: the filter itself
+        runs on running sums, and a dense kernel of a large window would
+        cost width * height floats.
+        """
+        return self._frozen(np.ones((self.height, self.width), dtype=float) / (
+                self.width * self.height))
+
+    def footprint(self):
+        return self.height // 2, self.width // 2
+
+    def scaled(self, factor: int) -> 'BoxBlurFilter':
+        # may shrink below MIN_SIZE: a 1-pixel side leaves that axis as is
+        width = self._scaled_size(self.width, factor)
+        height = self._scaled_size(self.height, factor)
+        return self._copy_with(width=width, height=height)
 
     def _apply_filter(self, image_data: ImageData) -> ImageData:
-        # extract raw array
-        arr = image_data.get_array()
-        blurred = Convolver.apply_kernel(arr, self.kernel)
-        # update and return
-        image_data.image = blurred
-        return image_data
\ No newline at end of file
+        return ImageData(Convolver.apply_box(image_data.get_array(), self.width, self.height))
+
+    def apply_in_place(self, arr: np.ndarray, pool) -> np.ndarray:
+        # every channel is padded before it is overwritten
+        return Convolver.apply_box(arr, self.width, self.height, out=arr)
@@ -2,6 +2,7 @@ import numpy as np
 
 from core.convolver import Convolver
 from core.image_data import ImageData
+from core.precision import value_max
 from operations.base.filter_decorator import FilterDecorator
 
 
@@ -16,6 +17,7 @@ class SharpenFilter(FilterDecorator):
     3. Add the edges back to the original image with a scaling factor
     """
     RADIUS = 2  # constant radius as per requirements
+    HOMOGENEOUS = True
 
     def __init__(self, value: float, wrapped_operation=None):
         """
@@ -42,7 +44,16 @@ class SharpenFilter(FilterDecorator):
         self.value = value
         # box kernel of size (2*radius+1)=5
         size = self.RADIUS * self.RADIUS + 1
-        self.kernel = np.ones((size, size), dtype=float) / (size * size)
+        self.kernel = self._frozen(np.ones((size, size), dtype=float) / (size * size))
+
+    def footprint(self):
+        return self.kernel.shape[0] // 2, self.kernel.shape[1] // 2
+
+    def scaled(self, factor: int) -> 'SharpenFilter':
+        # at least 3x3: a 1x1 blur would make the mask (and `value`) vanish
+        size = self._scaled_size(self.kernel.shape[0], factor, minimum=3)
+        return self._copy_with(kernel=self._frozen(np.ones((size, size), dtype=float)
+                                                   / (size * size)))
 
     def _apply_filter(self, image_data: ImageData) -> ImageData:
         """
@@ -54,18 +65,35 @@ class SharpenFilter(FilterDecorator):
         Returns:
             The processed image data with sharpening applied
         """
+        return ImageData(self._sharpen(image_data.get_array()))
+
+    def apply_in_place(self, arr: np.ndarray, pool) -> np.ndarray:
+        return self._sharpen(arr, out=arr, pool=pool)
+
+    def _sharpen(self, arr: np.ndarray, out: np.ndarray = None,
+                 pool=None) -> np.ndarray:
+        """
+        Unsharp mask of arr, into out if given (which may be arr).
+
+        Returns:
+            The sharpened array, in the dtype of arr
+        """
         # work in float to preserve precision
-        original = image_data.get_array().astype(float)
-        blurred = Convolver.apply_kernel(original, self.kernel)
+        is_float = np.issubdtype(arr.dtype, np.floating)
+        original = arr if is_float else arr.astype(np.float64)
+        blurred = self._take(pool, original.shape, original.dtype)
+        Convolver.apply_kernel(original, self.kernel, out=blurred)
 
-        # unsharp mask
-        mask = original - blurred
+        # unsharp mask, scaled in the blur buffer
+        mask = np.subtract(original, blurred, out=blurred)
+        mask *= self.value
 
         # add scaled mask back
-        sharpened = original + self.value * mask
-
-        # clip and convert back to uint8
-        np.clip(sharpened, 0, 255, out=sharpened)
-        image_data.image = sharpened.astype(np.uint8)
+        sharpened = self._output(arr, out) if is_float else original
+        np.add(original, mask, out=sharpened)
+        if pool is not None:
+            pool.give(blurred)
 
-        return image_data
+        # clip and convert back to the input dtype
+        np.clip(sharpened, 0, value_max(arr.dtype), out=sharpened)
+        return self._store(sharpened, arr.dtype, out)
@@ -1,7 +1,10 @@
+from typing import List
+
 import numpy as np
 
 from core.convolver import Convolver
 from core.image_data import ImageData
+from core.precision import value_max
 from operations.base.filter_decorator import FilterDecorator
 
 
@@ -11,55 +14,68 @@ class SobelFilter(FilterDecorator):
 
     This filter applies two Sobel convolution kernels to detect edges in
     horizontal and vertical directions, then combines them to highlight edges.
+
+    The magnitude is normalized by its maximum over the whole image, which
+    makes that maximum a global statistic for tiled execution. Both
+    gradients and the magnitude come from one pass of
+    Convolver.sobel_magnitude; color results are a read-only broadcast of
+    that plane over the channels.
     """
+    GLOBAL_STATISTIC = True
 
     def __init__(self, wrapped_operation=None):
         super().__init__(wrapped_operation)
+        # The kernels, for reference: Convolver.sobel_magnitude applies them
+        # through their [1, 2, 1] x [-1, 0, 1] factors
         # Sobel kernel for horizontal edges (x-direction)
-        self.kernel_x = np.array([
+        self.kernel_x = self._frozen(np.array([
             [-1, 0, 1],
             [-2, 0, 2],
             [-1, 0, 1]
-        ], dtype=float)
+        ], dtype=float))
 
         # Sobel kernel for vertical edges (y-direction)
-        self.kernel_y = np.array([
+        self.kernel_y = self._frozen(np.array([
             [-1, -2, -1],
             [0, 0, 0],
             [1, 2, 1]
-        ], dtype=float)
+        ], dtype=float))
+        # magnitude that maps to 255; None = maximum of the input's magnitude
+        self.max_magnitude = None
+
+    def footprint(self):
+        return 1, 1
 
     def _apply_filter(self, image_data: ImageData) -> ImageData:
         # Extract raw array
         arr = image_data.get_array()
+        top = value_max(arr.dtype)
+        gradient_magnitude = Convolver.sobel_magnitude(arr)
 
-        # Convert to grayscale if it's a color image
-        if len(arr.shape) == 3 and arr.shape[2] == 3:
-            # Simple grayscale conversion - average of RGB channels
-            arr_gray = np.mean(arr, axis=2)
-        else:
-            arr_gray = arr
+        # Normalize to enhance visibility - scale to use the full range
+        max_magnitude = self.max_magnitude
+        if max_magnitude is None:
+            max_magnitude = np.max(gradient_magnitude)
+        if max_magnitude > 0:  # Avoid division by zero
+            gradient_magnitude *= top / max_magnitude
+            # float rounding can overshoot the top of the range
+            np.minimum(gradient_magnitude, top, out=gradient_magnitude)
 
-        # Apply horizontal and vertical Sobel kernels
-        gradient_x = Convolver.apply_kernel(arr_gray, self.kernel_x)
-        gradient_y = Convolver.apply_kernel(arr_gray, self.kernel_y)
+        # Back to the input dtype (no copy for float32 input)
+        gradient_magnitude = gradient_magnitude.astype(arr.dtype, copy=False)
 
-        # Compute gradient magnitude
-        gradient_magnitude = np.sqrt(
-            np.square(gradient_x) + np.square(gradient_y))
+        # Color input: the same plane in every channel, as a read-only view
+        if arr.ndim == 3:
+            gradient_magnitude = np.broadcast_to(gradient_magnitude[:, :, np.newaxis], arr.shape)
 
-        # Normalize to enhance visibility - scale to use full 0-255 range
-        if np.max(gradient_magnitude) > 0:  # Avoid division by zero
-            gradient_magnitude = gradient_magnitude * (
-                    255.0 / np.max(gradient_magnitude))
+        return ImageData(gradient_magnitude)
 
-        # Convert to proper data type for display
-        gradient_magnitude = gradient_magnitude.astype(np.uint8)
+    def partial_statistic(self, arr: np.ndarray, rows: slice) -> float:
+        """Maximum gradient magnitude over the given rows."""
+        return float(np.max(Convolver.sobel_magnitude(arr)[rows], initial=0.0))
 
-        # If original was color, convert result back to RGB format
-        if len(arr.shape) == 3 and arr.shape[2] == 3:
-            gradient_magnitude = np.stack([gradient_magnitude] * 3, axis=2)
+    def combine_statistics(self, partials: List[float]) -> float:
+        return max(partials, default=0.0)
 
-        # Update and return
-        image_data.image = gradient_magnitude
-        return image_data
+    def with_statistic(self, statistic: float) -> 'SobelFilter':
+        return self._copy_with(max_magnitude=statistic)
@@ -61,3 +61,4 @@ class OperationFactory:
         operation_class = OperationFactory._operation_map.get(operation_type)
         if operation_class:
             return operation_class(**parameters)
+        raise ValueError(f"Unknown operation type: {operation_config['type']}")
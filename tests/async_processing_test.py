@@ -0,0 +1,102 @@
+import asyncio
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.async_processing import AsyncBatchProcessor, apply_async, load_async, save_async
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+
+IMGS_DIR = Path(__file__).parent / "imgs"
+OPERATIONS = [{"type": "brightness", "value": 1.2}, {"type": "box", "width": 3, "height": 3}]
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    source = tmp_path / "in"
+    source.mkdir()
+    paths = []
+    for index in range(5):
+        path = source / f"img{index}.png"
+        shutil.copy(IMGS_DIR / "tiger.png", path)
+        paths.append(str(path))
+    return paths
+
+
+def test_coroutines_match_synchronous_calls(tmp_path):
+    pipeline = OperationPipeline.create_from_config(OPERATIONS)
+    output = tmp_path / "out" / "tiger.png"
+
+    async def run():
+        image = await load_async(str(IMGS_DIR / "tiger.png"))
+        await save_async(await apply_async(pipeline, image), str(output))
+    asyncio.run(run())
+
+    expected = pipeline.apply(ImageData.load(str(IMGS_DIR / "tiger.png")))
+    assert np.array_equal(ImageData.load(str(output)).get_array(),
+                          convert(expected.get_array(), np.uint8))
+
+
+def test_batch_results_in_order_with_failures(inputs, tmp_path):
+    Path(inputs[2]).write_text("not an image")
+    pipeline = OperationPipeline.create_from_config(OPERATIONS, in_place=True)
+    reported = []
+    report = AsyncBatchProcessor(pipeline, str(tmp_path / "out")).run(
+        inputs, on_result=reported.append)
+
+    assert [Path(r.input_path).name for r in report.results] == [
+        f"img{index}.png" for index in range(5)]
+    assert [r.ok for r in report.results] == [True, True, False, True, True]
+    assert len(reported) == 5
+    expected = convert(OperationPipeline.create_from_config(OPERATIONS).apply(
+        ImageData.load(inputs[0])).get_array(), np.uint8)
+    for result in report.results:
+        if result.ok:
+            assert np.array_equal(ImageData.load(result.output_path).get_array(), expected)
+
+
+class _Recording(AsyncBatchProcessor):
+    """Blocks the first encode until a later decode has started, and counts live images."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.third_decoded = threading.Event()
+        self.lock = threading.Lock()
+        self.loads = 0
+        self.live = 0
+        self.max_live = 0
+        self.overlapped = None
+
+    def _load(self, input_path):
+        with self.lock:
+            self.loads += 1
+            self.live += 1
+            self.max_live = max(self.max_live, self.live)
+            if self.loads == 3:
+                self.third_decoded.set()
+        return super()._load(input_path)
+
+    def _save(self, image_data, output_path):
+        if self.overlapped is None:
+            # image 0 is encoded while image 2 is decoded (and 1 computed)
+            self.overlapped = self.third_decoded.wait(timeout=30)
+        super()._save(image_data, output_path)
+        with self.lock:
+            self.live -= 1
+
+
+def test_stages_overlap_with_bounded_queues(inputs, tmp_path):
+    pipeline = OperationPipeline.create_from_config(OPERATIONS)
+    processor = _Recording(pipeline, str(tmp_path / "out"), queue_size=1)
+    report = processor.run(inputs)
+
+    assert report.succeeded == 5
+    assert processor.overlapped
+    assert processor.max_live <= 2 * processor.queue_size + 3
+
+    with pytest.raises(ValueError):
+        AsyncBatchProcessor(pipeline, str(tmp_path), queue_size=0)
@@ -0,0 +1,84 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.batch import BatchProcessor, collect_inputs
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+
+IMGS_DIR = Path(__file__).parent / "imgs"
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    source = tmp_path / "in"
+    (source / "sub").mkdir(parents=True)
+    shutil.copy(IMGS_DIR / "square.jpg", source / "square.jpg")
+    shutil.copy(IMGS_DIR / "tiger.png", source / "sub" / "tiger.png")
+    (source / "broken.png").write_text("not an image")
+    (source / "notes.md").write_text("ignored")
+    return source
+
+
+def test_collect_inputs_directory_glob_and_manifest(input_dir):
+    assert [Path(p).name for p in collect_inputs(str(input_dir))] == [
+        "broken.png", "square.jpg"]
+    assert [Path(p).name for p in collect_inputs(str(input_dir / "**" / "*.png"))] == [
+        "broken.png", "tiger.png"]
+
+    manifest = input_dir / "inputs.txt"
+    manifest.write_text("# comment\nsquare.jpg\n\nsub/tiger.png\n")
+    assert collect_inputs(str(manifest)) == sorted(
+        [str(input_dir / "square.jpg"), str(input_dir / "sub" / "tiger.png")])
+
+    with pytest.raises(FileNotFoundError):
+        collect_inputs(str(input_dir / "*.gif"))
+
+
+def test_batch_reports_failures_without_aborting(input_dir, tmp_path):
+    pipeline = OperationPipeline.create_from_config(
+        [{"type": "brightness", "value": 0.5}])
+    inputs = collect_inputs(str(input_dir / "**" / "*.*g"))
+    processor = BatchProcessor(pipeline, str(tmp_path / "out"), workers=2,
+                               output_extension=".png")
+    report = processor.run(inputs)
+
+    assert [Path(r.input_path).name for r in report.results] == [
+        "broken.png", "square.jpg", "tiger.png"]
+    assert [r.ok for r in report.results] == [False, True, True]
+    assert report.succeeded == 2
+    assert "broken.png" in report.failures[0].input_path
+
+    output = tmp_path / "out" / "sub" / "tiger.png"
+    expected = pipeline.apply(ImageData.load(str(input_dir / "sub" / "tiger.png")))
+    assert np.array_equal(ImageData.load(str(output)).get_array(),
+                          convert(expected.get_array(), np.uint8))
+
+
+def test_colliding_outputs_are_rejected(tmp_path):
+    pipeline = OperationPipeline.create_from_config([{"type": "brightness", "value": 0.5}])
+    source = tmp_path / "in"
+    source.mkdir()
+    shutil.copy(IMGS_DIR / "square.jpg", source / "a.jpg")
+    shutil.copy(IMGS_DIR / "tiger.png", source / "a.png")
+    inputs = collect_inputs(str(source))
+    processor = BatchProcessor(pipeline, str(tmp_path / "out"), workers=1,
+                               output_extension=".png")
+    with pytest.raises(ValueError, match="both"):
+        processor.run(inputs)
+    assert not (tmp_path / "out").exists()
+    # each input keeps its own extension by default: no collision
+    assert len(set(BatchProcessor(pipeline, str(tmp_path / "out")).output_paths(inputs))) == 2
+
+
+def test_outputs_may_not_overwrite_inputs(input_dir):
+    pipeline = OperationPipeline.create_from_config([{"type": "brightness", "value": 0.5}])
+    inputs = collect_inputs(str(input_dir))
+    before = [Path(path).read_bytes() for path in inputs]
+    processor = BatchProcessor(pipeline, str(input_dir), workers=1)
+    with pytest.raises(ValueError, match="overwrite"):
+        processor.run(inputs)
+    assert [Path(path).read_bytes() for path in inputs] == before
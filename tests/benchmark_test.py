@@ -0,0 +1,37 @@
+from tests.benchmarks import async_benchmark, benchmark_suite, in_place_benchmark
+
+
+def test_run_case_records_all_metrics():
+    row = benchmark_suite.run_case("op:box", "operation", "box", "32", "rgb", repeat=1)
+    assert row["height"] == row["width"] == 32
+    assert row["wall_s"] > 0
+    assert row["alloc_peak_bytes"] > 0
+    assert "peak_rss_kb" in row
+
+
+def test_every_operation_and_convolver_path_is_covered():
+    names = {case[0] for case in benchmark_suite.all_cases(["8k"])}
+    assert {f"op:{op}" for op in benchmark_suite.OperationFactory._operation_map} <= names
+    assert "convolver:fft" in names and "convolver:loop" not in names
+    assert benchmark_suite.parse_size("8k") == (4320, 7680)
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": [{"name": "op:box", "size": "256", "channels": "rgb",
+                             "wall_s": 1.0, "alloc_peak_bytes": 100}]}
+    results = [{"name": "op:box", "size": "256", "channels": "rgb",
+                "wall_s": 1.5, "alloc_peak_bytes": 100}]
+    messages = benchmark_suite.compare(results, baseline, threshold=0.25)
+    assert len(messages) == 1 and "wall_s" in messages[0]
+    assert benchmark_suite.compare(results, baseline, threshold=0.6) == []
+
+
+def test_in_place_benchmark_measures_both_modes():
+    rows = in_place_benchmark.run("32", "float32", repeat=1)
+    assert {row["name"] for row in rows} == set(in_place_benchmark.CASES)
+    assert all(row[mode]["wall_s"] > 0 for row in rows for mode in ("allocating", "in_place"))
+
+
+def test_async_benchmark_runs_both_modes():
+    result = async_benchmark.run("32", count=3, queue_size=1)
+    assert result["sequential_s"] > 0 and result["overlapped_s"] > 0
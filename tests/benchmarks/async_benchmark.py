@@ -0,0 +1,67 @@
+"""
+Overlap benchmark: a sequential load -> apply -> save loop (what main.py
+does per image) vs. AsyncBatchProcessor on the same PNG inputs.
+
+Usage (from the project root):
+    python -m tests.benchmarks.async_benchmark --size 2048 --count 8 --out async.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from core.async_processing import AsyncBatchProcessor
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from tests.benchmarks.benchmark_suite import make_image
+
+OPERATIONS = [{"type": "brightness", "value": 1.2}, {"type": "box", "width": 5, "height": 5},
+              {"type": "contrast", "value": 1.2}]
+
+
+def run(size: str, count: int, queue_size: int = 2) -> dict:
+    pipeline = OperationPipeline.create_from_config(OPERATIONS, in_place=True)
+    with tempfile.TemporaryDirectory() as root:
+        for name in ('in', 'sequential'):
+            os.makedirs(os.path.join(root, name))
+        inputs = []
+        for index in range(count):
+            path = os.path.join(root, 'in', f'{index}.png')
+            ImageData(make_image(size, 'rgb')).save(path)
+            inputs.append(path)
+
+        start = time.perf_counter()
+        for path in inputs:
+            pipeline.apply(ImageData.load(path)).save(
+                os.path.join(root, 'sequential', os.path.basename(path)))
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = AsyncBatchProcessor(pipeline, os.path.join(root, 'overlapped'),
+                                     queue_size=queue_size).run(inputs)
+        overlapped = time.perf_counter() - start
+        assert not report.failures
+
+    return {'size': size, 'count': count, 'cpus': os.cpu_count(),
+            'sequential_s': sequential, 'overlapped_s': overlapped}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', default='2048', help="e.g. 1024, 4096, 640x480")
+    parser.add_argument('--count', type=int, default=8)
+    parser.add_argument('--queue-size', type=int, default=2)
+    parser.add_argument('--out', help="path for the JSON results")
+    args = parser.parse_args()
+
+    result = run(args.size, args.count, args.queue_size)
+    print(f"{result['count']} x {result['size']}: sequential {result['sequential_s']:.2f} s, "
+          f"overlapped {result['overlapped_s']:.2f} s ({result['cpus']} CPUs)")
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark suite: every operation of OperationFactory._operation_map and
+every Convolver code path, on synthetic grayscale and RGB images from 256²
+up to 8K.
+
+For every case it records the best wall time, the peak RSS of the process
+running it and the peak of traced (NumPy + Python) allocations. By default
+each case runs in a fresh interpreter so that peak RSS belongs to that case
+alone.
+
+Usage (from the project root):
+    python -m tests.benchmarks.benchmark_suite --out results.json
+    python -m tests.benchmarks.benchmark_suite --sizes 256 1024 --only box
+    python -m tests.benchmarks.benchmark_suite --baseline results.json
+The last form exits with status 1 if any case is slower (or uses more
+memory) than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from core.convolver import Convolver
+from core.image_data import ImageData
+from operations.operation_factory import OperationFactory
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+SIZES = {'256': (256, 256), '1024': (1024, 1024), '2048': (2048, 2048),
+         '4096': (4096, 4096), '8k': (4320, 7680)}
+DEFAULT_SIZES = ['256', '1024', '4096', '8k']
+CHANNELS = {'gray': None, 'rgb': 3}
+
+# parameters used for every operation type
+OPERATION_PARAMS = {
+    "box": {"width": 5, "height": 5},
+    "sobel": {},
+    "sharpen": {"value": 1.0},
+    "brightness": {"value": 1.2},
+    "contrast": {"value": 1.1},
+    "saturation": {"value": 1.5},
+}
+KERNEL = np.ones((5, 5)) / 25
+CONVOLVER_CASES = ['loop', 'vectorized', 'separable', 'fft', 'auto', 'box']
+# the per-pixel loop is far too slow beyond this many pixels
+LOOP_MAX_PIXELS = 256 * 256
+
+
+def parse_size(token: str):
+    """'1024' -> (1024, 1024), '8k' -> (4320, 7680), '640x480' -> (480, 640)."""
+    if token.lower() in SIZES:
+        return SIZES[token.lower()]
+    if 'x' in token:
+        width, height = token.lower().split('x')
+        return int(height), int(width)
+    return int(token), int(token)
+
+
+def all_cases(sizes):
+    """Yield (name, kind, target, size_token, channels) for every case."""
+    for size_token in sizes:
+        height, width = parse_size(size_token)
+        for channels in CHANNELS:
+            for op_type in OperationFactory._operation_map:
+                yield (f"op:{op_type}", 'operation', op_type, size_token, channels)
+            for method in CONVOLVER_CASES:
+                if method == 'loop' and height * width > LOOP_MAX_PIXELS:
+                    continue
+                yield (f"convolver:{method}", 'convolver', method, size_token, channels)
+
+
+def make_image(size_token: str, channels: str) -> np.ndarray:
+    """Deterministic synthetic uint8 image."""
+    height, width = parse_size(size_token)
+    shape = (height, width) if CHANNELS[channels] is None else (height, width, CHANNELS[channels])
+    return np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def make_runner(kind: str, target: str, image: np.ndarray):
+    """Return a zero-argument callable running the case once."""
+    if kind == 'operation':
+        operation = OperationFactory.create(dict(OPERATION_PARAMS[target], type=target))
+        return lambda: operation.apply(ImageData(image.copy()))
+    if target == 'box':
+        return lambda: Convolver.apply_box(image, 5, 5)
+    return lambda: Convolver.apply_kernel(image, KERNEL, method=target)
+
+
+def peak_rss_kb() -> float:
+    """Peak resident set size of this process, in KiB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024.0 if sys.platform == 'darwin' else float(peak)
+
+
+def run_case(name, kind, target, size_token, channels, repeat: int) -> dict:
+    """Run one case in this process and return its measurements."""
+    image = make_image(size_token, channels)
+    runner = make_runner(kind, target, image)
+    rss_before = peak_rss_kb()
+
+    wall = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        wall = min(wall, time.perf_counter() - start)
+    rss_after = peak_rss_kb()
+
+    # separate run: tracing allocations slows the code down
+    tracemalloc.start()
+    runner()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    height, width = parse_size(size_token)
+    return {
+        'name': name, 'size': size_token, 'height': height, 'width': width,
+        'channels': channels, 'wall_s': wall,
+        'peak_rss_kb': rss_after,
+        'peak_rss_delta_kb': None if rss_after is None else rss_after - rss_before,
+        'alloc_peak_bytes': alloc_peak,
+    }
+
+
+def run_isolated(case, repeat: int) -> dict:
+    """Run one case in a fresh interpreter (so peak RSS is its own)."""
+    name, kind, target, size_token, channels = case
+    result = subprocess.run(
+        [sys.executable, "-m", "tests.benchmarks.benchmark_suite",
+         "--single", json.dumps(list(case)), "--repeat", str(repeat)],
+        cwd=Path(__file__).resolve().parent.parent.parent,
+        capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'name': name, 'size': size_token, 'channels': channels,
+                'error': result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout)
+
+
+def case_key(result: dict):
+    return result['name'], result['size'], result['channels']
+
+
+def compare(results, baseline, threshold: float):
+    """Return a list of regression messages against a baseline run."""
+    previous = {case_key(row): row for row in baseline['results'] if 'error' not in row}
+    regressions = []
+    for row in results:
+        old = previous.get(case_key(row))
+        if old is None or 'error' in row:
+            continue
+        for metric in ('wall_s', 'peak_rss_delta_kb', 'alloc_peak_bytes'):
+            if row.get(metric) is None or not old.get(metric):
+                continue
+            if row[metric] > old[metric] * (1 + threshold):
+                regressions.append(
+                    f"{row['name']} {row['size']} {row['channels']}: {metric} "
+                    f"{old[metric]:.4g} -> {row[metric]:.4g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help="e.g. 256 1024 4096 8k 640x480")
+    parser.add_argument('--only', help="run only cases whose name contains this")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--in-process', action='store_true',
+                        help="run all cases in this interpreter (faster, "
+                             "but peak RSS is then cumulative)")
+    parser.add_argument('--out', help="path for the JSON results")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed relative regression per metric")
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_case(*json.loads(args.single), repeat=args.repeat)))
+        return
+
+    results = []
+    for case in all_cases(args.sizes):
+        if args.only and args.only not in case[0]:
+            continue
+        row = (run_case(*case, repeat=args.repeat) if args.in_process
+               else run_isolated(case, args.repeat))
+        results.append(row)
+        if 'error' in row:
+            print(f"{row['name']:24s} {row['size']:>6s} {row['channels']:4s} ERROR {row['error']}")
+        else:
+            print(f"{row['name']:24s} {row['size']:>6s} {row['channels']:4s} "
+                  f"{row['wall_s'] * 1000:10.2f} ms  "
+                  f"alloc peak {row['alloc_peak_bytes'] / 2**20:8.1f} MiB")
+
+    report = {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                 'platform': platform.platform(), 'repeat': args.repeat,
+                 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION: {message}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Box blur benchmark: running-sum box blur (Convolver.apply_box) against the
+separable kernel path, for a range of blur radii.
+
+Usage (from the project root):
+    python -m tests.benchmarks.box_blur_benchmark --size 1024 --max-radius 200
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from core.convolver import Convolver
+
+
+def time_call(func, repeat: int) -> float:
+    """Return the best wall time (seconds) of `repeat` calls to func()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size: int, radii, repeat: int, kernel_max_radius: int):
+    """Time both box blur paths for every radius and return the results."""
+    rng = np.random.default_rng(0)
+    image = (rng.random((size, size, 3)) * 255).astype(np.uint8)
+
+    results = []
+    for radius in radii:
+        side = 2 * radius + 1
+        row = {'radius': radius,
+               'running_sum_s': time_call(
+                   lambda: Convolver.apply_box(image, side, side), repeat)}
+        if radius <= kernel_max_radius:
+            kernel = np.ones((side, side)) / (side * side)
+            row['separable_s'] = time_call(
+                lambda: Convolver.apply_kernel(image, kernel), repeat)
+        results.append(row)
+        print(f"radius {radius:4d}: " + ", ".join(
+            f"{k}={v:.4f}" for k, v in row.items() if k != 'radius'))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--min-radius', type=int, default=1)
+    parser.add_argument('--max-radius', type=int, default=200)
+    parser.add_argument('--step', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--kernel-max-radius', type=int, default=50,
+                        help="skip the separable path above this radius")
+    parser.add_argument('--out', help="optional path for JSON results")
+    args = parser.parse_args()
+
+    radii = sorted({args.min_radius, args.max_radius,
+                    *range(args.min_radius, args.max_radius + 1, args.step)})
+    results = run(args.size, radii, args.repeat, args.kernel_max_radius)
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump({'size': args.size, 'results': results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
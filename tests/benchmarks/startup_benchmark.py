@@ -0,0 +1,96 @@
+"""
+Startup benchmark: how long `python main.py` spends before doing any work.
+
+Records, over several fresh interpreters:
+  - the cumulative import time of main.py (from `python -X importtime`)
+  - the wall time of `python main.py --help`
+  - which heavy modules (matplotlib, PIL) got imported
+
+Usage (from the project root):
+    python -m tests.benchmarks.startup_benchmark --out startup.json
+    python -m tests.benchmarks.startup_benchmark --baseline startup.json
+The second form exits with status 1 if the import time regressed by more
+than --threshold relative to the baseline.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+HEAVY_MODULES = ('matplotlib', 'PIL')
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports() -> dict:
+    """Import main.py in a fresh interpreter and parse its -X importtime log."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        modules.add(match.group(4))
+        if match.group(4) == 'main':
+            total_us = int(match.group(2))
+    return {
+        'import_main_ms': total_us / 1000.0,
+        'heavy_modules': sorted(name for name in HEAVY_MODULES if name in modules),
+    }
+
+
+def measure_help_wall_time() -> float:
+    """Wall time (ms) of `python main.py --help`, interpreter startup included."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--help"], cwd=PROJECT_ROOT,
+                   capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def run(repeat: int) -> dict:
+    """Best-of-`repeat` startup measurements."""
+    imports = [measure_imports() for _ in range(repeat)]
+    return {
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'import_main_ms': min(sample['import_main_ms'] for sample in imports),
+        'help_wall_ms': min(measure_help_wall_time() for _ in range(repeat)),
+        'heavy_modules': imports[0]['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help="path for the JSON results")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed relative slowdown of the import time")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        limit = baseline['import_main_ms'] * (1 + args.threshold)
+        if results['import_main_ms'] > limit or results['heavy_modules']:
+            print(f"REGRESSION: import of main.py took {results['import_main_ms']:.1f} ms "
+                  f"(baseline {baseline['import_main_ms']:.1f} ms), "
+                  f"heavy modules: {results['heavy_modules']}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
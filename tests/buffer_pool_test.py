@@ -0,0 +1,116 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from core.buffer_pool import BufferPool
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.tiled import TiledProcessor
+from operations.base.lookup_table import LookupTableOperation
+from operations.operation_factory import OperationFactory
+
+CHAIN = [
+    {"type": "brightness", "value": 1.2},
+    {"type": "contrast", "value": 1.5},
+    {"type": "box", "width": 3, "height": 5},
+    {"type": "sharpen", "value": 1.0},
+    {"type": "saturation", "value": 1.4},
+    {"type": "sobel"},
+]
+
+
+def test_pool_reuses_buffers_by_shape_and_dtype():
+    pool = BufferPool()
+    first = pool.take((4, 5), np.float32)
+    pool.give(first)
+    assert pool.take((4, 5), np.float32) is first
+    assert pool.take((4, 5), np.float64) is not first
+    assert (pool.hits, pool.misses) == (1, 2)
+
+    pool.give(first)
+    pool.give(first)  # given twice: kept once
+    assert pool.idle_bytes == first.nbytes
+    pool.give(first[1:])  # views are not ours to reuse
+    readonly = np.zeros(3)
+    readonly.setflags(write=False)
+    pool.give(readonly)
+    assert pool.idle_bytes == first.nbytes
+
+    small = BufferPool(max_bytes=10)
+    small.give(np.zeros(100))
+    assert small.idle_bytes == 0
+
+
+@pytest.mark.parametrize("config", CHAIN, ids=lambda config: config["type"])
+@pytest.mark.parametrize("dtype", [np.float32, np.uint8])
+def test_in_place_matches_allocating(config, dtype, random_image):
+    operation = OperationFactory.create(dict(config))
+    arr = random_image(30, 40).astype(dtype)
+    expected = operation.apply(ImageData(arr.copy())).get_array()
+    pool = BufferPool()
+    result = operation.apply_in_place(arr, pool)
+    assert result.dtype == expected.dtype
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("precision", ["float32", "uint16", "uint8"])
+def test_in_place_pipeline_matches_and_keeps_input(precision, random_image):
+    image = random_image(30, 40)
+    expected = OperationPipeline.create_from_config(CHAIN, precision=precision).apply(
+        ImageData(image.copy())).get_array()
+
+    pipeline = OperationPipeline.create_from_config(CHAIN, precision=precision, in_place=True)
+    source = image.copy()
+    first = pipeline.apply(ImageData(source)).get_array()
+    second = pipeline.apply(ImageData(source)).get_array()
+    assert np.array_equal(source, image)
+    assert np.array_equal(first, expected) and np.array_equal(second, expected)
+    assert pipeline.pool.hits > 0
+
+
+def test_in_place_uint8_tables_need_one_output_buffer(random_image, monkeypatch):
+    monkeypatch.setattr(LookupTableOperation, "BAND_BYTES", 4096)
+    image = random_image(120, 160)
+    config = [{"type": "brightness", "value": 1.2}, {"type": "brightness", "value": 0.7}]
+    expected = OperationPipeline.create_from_config(config, precision="uint8").apply(
+        ImageData(image)).get_array()
+    pipeline = OperationPipeline.create_from_config(config, precision="uint8", in_place=True)
+    pipeline.apply(ImageData(image))
+
+    tracemalloc.start()
+    result = pipeline.apply(ImageData(image)).get_array()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # no copy of the input and no image-sized table temporary
+    assert peak < 2 * image.nbytes
+    assert np.array_equal(result, expected)
+
+
+def test_in_place_tiled_matches_whole_image(random_image):
+    image = random_image(30, 40)
+    expected = OperationPipeline.create_from_config(CHAIN).apply(ImageData(image.copy()))
+    pipeline = OperationPipeline.create_from_config(CHAIN, in_place=True)
+    result = TiledProcessor(pipeline, tile_rows=7).process(image)
+    assert np.array_equal(result, expected.get_array())
+
+
+def test_in_place_step_after_read_only_result(random_image):
+    config = [{"type": "sobel"}, {"type": "box", "width": 3, "height": 3},
+              {"type": "brightness", "value": 0.8}]
+    image = random_image(30, 40)
+    sobel = OperationFactory.create({"type": "sobel"}).apply(ImageData(image)).get_array()
+    assert not sobel.flags.writeable and sobel.strides[2] == 0
+
+    expected = OperationPipeline.create_from_config(config).apply(ImageData(image.copy()))
+    result = OperationPipeline.create_from_config(config, in_place=True).apply(ImageData(image))
+    assert np.array_equal(result.get_array(), expected.get_array())
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_pipeline_result_is_writable(random_image, in_place):
+    # the color Sobel result is a read-only broadcast view; apply() copies it
+    pipeline = OperationPipeline.create_from_config([{"type": "sobel"}], in_place=in_place)
+    result = pipeline.apply(ImageData(random_image(30, 40))).get_array()
+    assert result.flags.writeable
+    assert np.array_equal(result[:, :, 0], result[:, :, 2])
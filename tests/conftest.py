@@ -0,0 +1,10 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def random_image():
+    """random_image(height, width, seed=0) -> reproducible random RGB uint8 array."""
+    def make(height, width, seed=0):
+        return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return make
@@ -1,9 +1,185 @@
+import tracemalloc
+
 from core.convolver import Convolver
+from core.image_data import ImageData
+from operations.filters.box_blur_filter import BoxBlurFilter
 import numpy as np
+import pytest
+
+
+def _random_image(shape, dtype=np.uint8, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random(shape) * 255).astype(dtype)
+
+
+SOBEL_X = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=float)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float64, np.int64])
+@pytest.mark.parametrize("kernel", [
+    np.ones((5, 5)) / 25,
+    np.ones((3, 7)) / 21,
+    SOBEL_X,
+    np.arange(81, dtype=float).reshape(9, 9) / 81,
+])
+def test_vectorized_matches_loop(dtype, kernel):
+    img = _random_image((23, 19, 3), dtype)
+    expected = Convolver.apply_kernel(img, kernel, method='loop')
+    result = Convolver.apply_kernel(img, kernel, method='vectorized')
+    assert result.dtype == expected.dtype
+    assert np.array_equal(result, expected)
+
+
+def test_vectorized_small_chunks_match_loop(monkeypatch):
+    # force one output row per band
+    monkeypatch.setattr(Convolver, 'CHUNK_ELEMENTS', 1)
+    img = _random_image((12, 10), np.float64)
+    kernel = np.ones((3, 3)) / 9
+    assert np.array_equal(Convolver.apply_kernel(img, kernel, method='vectorized'),
+                          Convolver.apply_kernel(img, kernel, method='loop'))
+
+
+@pytest.mark.parametrize("kernel", [
+    np.ones((5, 5)) / 25,
+    np.ones((31, 3)) / 93,
+    SOBEL_X,
+    SOBEL_X.T,
+])
+def test_separable_matches_dense(kernel):
+    img = _random_image((40, 33, 3), np.float64)
+    assert Convolver.select_method(kernel, img.shape) == 'separable'
+    np.testing.assert_allclose(Convolver.apply_kernel(img, kernel),
+                               Convolver.apply_kernel(img, kernel, method='vectorized'),
+                               atol=1e-9)
+
+
+def test_separable_explicit_vectors():
+    img = _random_image((17, 21), np.float64)
+    column = np.array([1.0, 2.0, 1.0])
+    row = np.array([-1.0, 0.0, 1.0])
+    np.testing.assert_allclose(Convolver.apply_separable(img, column, row),
+                               Convolver.apply_kernel(img, np.outer(column, row),
+                                                      method='vectorized'),
+                               atol=1e-9)
+
+
+def test_split_separable_exact_and_rank_check():
+    column, row = Convolver._split_separable(SOBEL_X)
+    assert np.array_equal(np.outer(column, row), SOBEL_X)
+    assert Convolver._split_separable(np.eye(3)) is None
+    assert Convolver.select_method(np.eye(3), (8, 8)) == 'vectorized'
+    with pytest.raises(ValueError):
+        Convolver.apply_kernel(np.zeros((4, 4)), np.eye(3), method='separable')
+
+
+@pytest.mark.parametrize("width, height", [(3, 3), (5, 9), (41, 3), (61, 61)])
+def test_box_matches_kernel(width, height):
+    img = _random_image((40, 33, 3), np.float64)
+    kernel = np.ones((height, width)) / (width * height)
+    np.testing.assert_allclose(Convolver.apply_box(img, width, height),
+                               Convolver.apply_kernel(img, kernel, method='vectorized'),
+                               atol=1e-9)
+
+
+def test_box_filter_size_is_not_capped():
+    tracemalloc.start()
+    box = BoxBlurFilter(4001, 4001)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # no dense width x height kernel is built
+    assert peak < 1 << 20
+    img = _random_image((8, 9, 3), np.float64)
+    np.testing.assert_allclose(box.apply(ImageData(img)).get_array(),
+                               Convolver.apply_box(img, 4001, 4001))
+
+
+def test_box_keeps_dtype_and_shape():
+    img = _random_image((20, 30, 3))
+    result = Convolver.apply_box(img, 101, 7)
+    assert result.dtype == np.uint8 and result.shape == img.shape
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.uint8])
+@pytest.mark.parametrize("kernel_shape", [(1, 1), (3, 3), (7, 5), (15, 15)])
+def test_fft_matches_direct(dtype, kernel_shape):
+    img = _random_image((37, 29, 3), dtype)
+    kernel = np.random.default_rng(1).random(kernel_shape)
+    kernel /= kernel.sum()
+    expected = Convolver.apply_kernel(img, kernel, method='vectorized')
+    result = Convolver.apply_kernel(img, kernel, method='fft')
+    assert result.dtype == expected.dtype
+    # integer outputs may flip by one level where the direct sum truncates
+    atol = 1e-9 if dtype == np.float64 else 1
+    np.testing.assert_allclose(result.astype(float), expected.astype(float), atol=atol)
+
+
+def test_fft_reuses_cached_spectrum(monkeypatch):
+    monkeypatch.setattr(Convolver, '_spectrum_cache', type(Convolver._spectrum_cache)())
+    img = _random_image((20, 20), np.float64)
+    kernel = np.random.default_rng(2).random((5, 5))
+    Convolver.apply_kernel(img, kernel, method='fft')
+    cached = dict(Convolver._spectrum_cache)
+    Convolver.apply_kernel(img, kernel, method='fft')
+    assert len(Convolver._spectrum_cache) == 1
+    assert all(Convolver._spectrum_cache[key] is value for key, value in cached.items())
+
+
+def test_select_method_cost_model(caplog):
+    dense = np.random.default_rng(3).random((31, 31))
+    with caplog.at_level('INFO', logger='core.convolver'):
+        assert Convolver.select_method(dense, (1000, 1000)) == 'fft'
+    assert "'fft' backend" in caplog.text
+    assert Convolver.select_method(np.ones((5, 5)), (1000, 1000)) == 'separable'
+    assert Convolver.select_method(dense, (1000, 1000), method='vectorized') == 'vectorized'
+    assert [Convolver._next_fast_len(n) for n in (1, 7, 11, 97, 1025)] == [1, 8, 12, 100, 1080]
+
+
+@pytest.mark.parametrize("method, kernel", [
+    ('vectorized', np.arange(35, dtype=float).reshape(7, 5) / 35),
+    ('separable', np.ones((7, 7)) / 49),
+    ('fft', np.arange(35, dtype=float).reshape(7, 5) / 35),
+])
+@pytest.mark.parametrize("shape", [(61, 47, 3), (61, 47)])
+def test_parallel_bands_match_serial(method, kernel, shape):
+    img = _random_image(shape, np.float64)
+    serial = Convolver.apply_kernel(img, kernel, method=method, workers=1)
+    for workers in (2, 5, 64):
+        assert np.array_equal(
+            Convolver.apply_kernel(img, kernel, method=method, workers=workers), serial)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float64])
+def test_parallel_box_matches_serial(dtype):
+    img = _random_image((53, 41, 3), dtype)
+    assert np.array_equal(Convolver.apply_box(img, 9, 11, workers=4),
+                          Convolver.apply_box(img, 9, 11, workers=1))
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32])
+@pytest.mark.parametrize("shape", [(150, 41, 3), (37, 29)])
+def test_sobel_magnitude_matches_two_convolutions(dtype, shape):
+    img = _random_image(shape, dtype)
+    gray = img.mean(axis=2) if img.ndim == 3 else img.astype(np.float64)
+    expected = np.hypot(Convolver.apply_kernel(gray, SOBEL_X),
+                        Convolver.apply_kernel(gray, SOBEL_X.T))
+    result = Convolver.sobel_magnitude(img)
+    assert result.shape == shape[:2]
+    assert result.dtype == (np.float32 if dtype == np.float32 else np.float64)
+    assert np.allclose(result, expected, rtol=1e-5, atol=1e-3)
+    assert np.array_equal(Convolver.sobel_magnitude(img, workers=3), result)
+
+    with pytest.raises(ValueError):
+        Convolver.sobel_magnitude(img, out=np.empty(shape[:2], dtype=np.float16))
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        Convolver.apply_kernel(np.zeros((3, 3)), np.ones((3, 3)), method='nope')
+
 
 if __name__ == '__main__':
     kernel = np.array([[0,0,0],[0,1,0],[0,0,0]])
     kernel1 = np.array([[1,1,1],[1,1,1],[1,1,1]])
     img1 = np.array([[1,2,3],[4,5,6],[7,8,9],[10,11,12],[13,14,15]])
     img2 = np.array([[1,2,3,4,5], [6,7,8,9,10], [11,12,13,14,15]])
-    print(Convolver.apply_kernel(img2, kernel1))
\ No newline at end of file
+    print(Convolver.apply_kernel(img2, kernel1))
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from operations.adjustments.brightness_adjustment import BrightnessAdjustment
+from operations.base.filter_decorator import FilterDecorator
+from operations.filters.box_blur_filter import BoxBlurFilter
+from operations.filters.sharpen_filter import SharpenFilter
+from operations.filters.sobel_filter import SobelFilter
+
+
+class AddOneFilter(FilterDecorator):
+    """Adds 1 to every pixel; records the order it ran in."""
+
+    def __init__(self, log=None, wrapped_operation=None):
+        super().__init__(wrapped_operation)
+        self.log = log if log is not None else []
+
+    def _apply_filter(self, image_data: ImageData) -> ImageData:
+        self.log.append(self)
+        return ImageData(image_data.get_array() + 1)
+
+
+def _image():
+    return ImageData(np.full((4, 5, 3), 10, dtype=np.int64))
+
+
+def test_thousands_of_steps_run_without_recursion():
+    pipeline = OperationPipeline([AddOneFilter() for _ in range(5000)])
+    assert pipeline.apply(_image()).get_array()[0, 0, 0] == 5010
+
+
+def test_long_decorator_chain_applies_iteratively():
+    head = None
+    for _ in range(5000):
+        head = AddOneFilter(wrapped_operation=head)
+    assert head.apply(_image()).get_array()[0, 0, 0] == 5010
+
+
+def test_from_chain_keeps_order_and_decorators():
+    log = []
+    first = AddOneFilter(log)
+    second = AddOneFilter(log, wrapped_operation=first)
+    pipeline = OperationPipeline.from_chain(second)
+    assert pipeline.operations == [first, second]
+    pipeline.apply(_image())
+    assert log == [first, second]
+    assert second._wrapped_filter is first
+
+
+def test_hooks_see_every_step():
+    pipeline = OperationPipeline.create_from_config(
+        [{"type": "box", "width": 3, "height": 3}, {"type": "sobel"}])
+    events = []
+    pipeline.add_before_hook(lambda i, op, img: events.append(("before", i)))
+    pipeline.add_after_hook(lambda i, op, img: events.append(("after", i, img.image.dtype)))
+    pipeline.apply(ImageData(np.zeros((6, 6, 3), dtype=np.uint8)))
+    # the default float32 working precision is kept by every step
+    assert events == [("before", 0), ("after", 0, np.float32),
+                      ("before", 1), ("after", 1, np.float32)]
+
+
+def test_commuting_steps_can_run_out_of_order():
+    pipeline = OperationPipeline([BrightnessAdjustment(0.5), BoxBlurFilter(3, 3)])
+    image = np.arange(60, dtype=np.float64).reshape(4, 5, 3)
+    in_order = pipeline.apply(ImageData(image.copy())).get_array()
+    swapped = pipeline.apply(ImageData(image.copy()), order=[1, 0]).get_array()
+    np.testing.assert_allclose(swapped, in_order)
+
+
+def test_non_commuting_order_is_rejected():
+    pipeline = OperationPipeline([BrightnessAdjustment(0.5), SobelFilter()])
+    with pytest.raises(ValueError):
+        pipeline.apply(_image(), order=[1, 0])
+    with pytest.raises(ValueError):
+        pipeline.apply(_image(), order=[0, 0])
+
+
+@pytest.mark.parametrize("first, second, swappable", [
+    # brightening clips, so the blur would see different values
+    (BrightnessAdjustment(2.0), BoxBlurFilter(3, 3), False),
+    # sharpen clips its own result
+    (BrightnessAdjustment(0.5), SharpenFilter(1.0), False),
+    (BrightnessAdjustment(0.5), BrightnessAdjustment(0.8), True),
+    (BrightnessAdjustment(2.0), BrightnessAdjustment(1.5), True),
+    (BrightnessAdjustment(2.0), BrightnessAdjustment(0.5), False),
+])
+def test_only_swaps_exact_with_clipping_are_allowed(first, second, swappable):
+    pipeline = OperationPipeline([first, second])
+    assert pipeline.can_swap(0, 1) == swappable
+    if swappable:
+        image = np.random.default_rng(0).uniform(0, 255, (6, 7, 3))
+        in_order = pipeline.apply(ImageData(image.copy())).get_array()
+        swapped = pipeline.apply(ImageData(image.copy()), order=[1, 0]).get_array()
+        np.testing.assert_allclose(swapped, in_order)
+
+
+ALL_OPERATIONS = [
+    {"type": "brightness", "value": 1.2},
+    {"type": "contrast", "value": 1.3},
+    {"type": "saturation", "value": 1.5},
+    {"type": "box", "width": 5, "height": 3},
+    {"type": "sharpen", "value": 1.0},
+    {"type": "sobel"},
+]
+
+
+@pytest.mark.parametrize("precision", ["float32", "uint8"])
+def test_operations_leave_their_input_untouched(precision, random_image):
+    # uint8 also covers the fused and lookup table steps
+    pipeline = OperationPipeline.create_from_config(ALL_OPERATIONS, precision=precision)
+    for operation in pipeline.operations:
+        arr = pipeline.to_working(ImageData(random_image(24, 31))).get_array()
+        before = arr.copy()
+        image_data = ImageData(arr)
+        result = operation.apply(image_data)
+        assert result is not image_data and image_data.image is arr
+        assert np.array_equal(arr, before)
+    kernel = pipeline.operations[-2].kernel
+    with pytest.raises(ValueError):
+        kernel[0, 0] = 1
+
+
+def test_with_wrapped_filter_leaves_shared_decorator_alone():
+    inner = BrightnessAdjustment(2.0)
+    outer = BoxBlurFilter(3, 3)
+    chained = outer.with_wrapped_filter(inner)
+    assert chained._wrapped_filter is inner and outer._wrapped_filter is None
+    assert OperationPipeline.from_chain(chained).operations == [inner, chained]
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_one_pipeline_serves_many_threads(in_place, random_image):
+    pipeline = OperationPipeline.create_from_config(ALL_OPERATIONS, in_place=in_place)
+    images = [random_image(24, 31, seed) for seed in range(16)]
+    expected = [OperationPipeline.create_from_config(ALL_OPERATIONS).apply(
+        ImageData(image)).get_array() for image in images]
+
+    def run(image):
+        return pipeline.apply(ImageData(image)).get_array()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(run, images * 4))
+    for index, result in enumerate(results):
+        assert np.array_equal(result, expected[index % len(images)])
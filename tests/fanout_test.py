@@ -0,0 +1,95 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.config import Config
+from core.fanout import FanoutPlan
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+BRIGHTNESS = {"type": "brightness", "value": 1.1}
+BOX = {"type": "box", "width": 5, "height": 5}
+
+
+def _config(tmp_path, **extra):
+    config = {
+        "input": "tests/imgs/tiger.png",
+        "operations": [BRIGHTNESS],
+        "branches": [
+            {"operations": [BOX], "output": str(tmp_path / "soft.png"),
+             "branches": [{"operations": [{"type": "box", "width": 9, "height": 9}],
+                           "output": str(tmp_path / "softer.png")}]},
+            # repeats the leading box of the first branch: shared as well
+            {"operations": [dict(BOX, type="Box"), {"type": "sharpen", "value": 1.0}],
+             "output": str(tmp_path / "sharp.png")},
+            {"operations": [{"type": "sobel"}], "output": str(tmp_path / "edges.png")},
+        ],
+    }
+    config.update(extra)
+    return config
+
+
+def test_variants_match_separate_runs_and_share_prefixes(tmp_path, random_image):
+    plan = FanoutPlan.from_config(Config.from_dict(_config(tmp_path)))
+    assert plan.operation_count == 5 and plan.variant_operations == 10
+    [trunk] = plan.root.children
+    assert trunk.operations_config == [BRIGHTNESS]
+    assert [child.operations_config[0]["type"] for child in trunk.children] == ["box", "sobel"]
+
+    image = random_image(20, 27)
+    results = dict(plan.render(ImageData(image)))
+    assert np.array_equal(image, random_image(20, 27))
+    variants = {
+        "soft.png": [BRIGHTNESS, BOX],
+        "softer.png": [BRIGHTNESS, BOX, {"type": "box", "width": 9, "height": 9}],
+        "sharp.png": [BRIGHTNESS, BOX, {"type": "sharpen", "value": 1.0}],
+        "edges.png": [BRIGHTNESS, {"type": "sobel"}],
+    }
+    assert sorted(results) == sorted(str(tmp_path / name) for name in variants)
+    for name, operations in variants.items():
+        expected = OperationPipeline.create_from_config(operations).apply(ImageData(image))
+        assert np.array_equal(results[str(tmp_path / name)].get_array(), expected.get_array())
+
+
+def test_run_writes_every_output(tmp_path):
+    config = Config.from_dict(_config(tmp_path, output=str(tmp_path / "base.png")))
+    plan = FanoutPlan.from_config(config, precision="uint8")
+    written = plan.run(ImageData.load(config.input_path))
+    assert written[0] == str(tmp_path / "base.png") and len(written) == 5
+    base = OperationPipeline.create_from_config([BRIGHTNESS]).apply(
+        ImageData.load(config.input_path))
+    assert np.array_equal(ImageData.load(written[0]).get_array(),
+                          convert(base.get_array(), np.uint8))
+
+
+@pytest.mark.parametrize("branches", [
+    [{"operations": [BOX]}],
+    [{"operations": [BOX], "output": "a.png"}, {"operations": [], "output": "a.png"}],
+    [{"operations": [{"type": "box"}], "output": "a.png"}],
+])
+def test_invalid_branches_are_rejected(branches):
+    with pytest.raises(ValueError):
+        Config.from_dict({"input": "tests/imgs/tiger.png", "branches": branches})
+
+
+def test_display_is_rejected_with_branches(tmp_path):
+    with pytest.raises(ValueError):
+        Config.from_dict(_config(tmp_path, display=True))
+
+
+@pytest.mark.parametrize("flag", [["--in-place"], ["--profile"], ["--cache-dir", "cache"],
+                                  ["--preview", "4"], ["--tiled"]])
+def test_cli_rejects_flags_fanout_does_not_support(tmp_path, flag):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(_config(tmp_path)))
+    result = subprocess.run([sys.executable, "main.py", "--config", str(config_path)] + flag,
+                            cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert f"{flag[0]} is not supported with 'branches'" in result.stderr
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import numpy as np
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from operations.adjustments.brightness_adjustment import BrightnessAdjustment
+from operations.base.fused_operation import FusedPointwiseOperation
+from operations.base.lookup_table import LookupTableOperation
+from operations.filters.box_blur_filter import BoxBlurFilter
+
+IMAGE_PATH = Path(__file__).parent / "imgs" / "mona_lisa.jpg"
+
+POINTWISE_CHAIN = [
+    {"type": "brightness", "value": 1.2},
+    {"type": "contrast", "value": 1.1},
+    {"type": "saturation", "value": 2.0},
+]
+
+
+BRIGHTNESS_CHAIN = [
+    {"type": "brightness", "value": 1.7},
+    {"type": "brightness", "value": 0.4},
+    {"type": "brightness", "value": 1.3},
+]
+
+
+def test_pointwise_run_is_fused():
+    config = POINTWISE_CHAIN + [{"type": "box", "width": 3, "height": 3},
+                                {"type": "brightness", "value": 0.9}]
+    operations = OperationPipeline.create_from_config(config, precision="uint8").operations
+    assert [type(op) for op in operations] == [
+        FusedPointwiseOperation, BoxBlurFilter, LookupTableOperation]
+    assert len(operations[0].operations) == 3
+
+
+def test_fusion_opt_out():
+    operations = OperationPipeline.create_from_config(
+        POINTWISE_CHAIN, fuse=False).operations
+    assert len(operations) == 3
+    assert not any(isinstance(op, FusedPointwiseOperation) for op in operations)
+
+
+def test_fused_output_within_tolerance():
+    # with uint8 precision the unfused chain truncates between steps
+    fused = OperationPipeline.create_from_config(POINTWISE_CHAIN, precision="uint8")
+    unfused = OperationPipeline.create_from_config(POINTWISE_CHAIN, fuse=False,
+                                                   precision="uint8")
+    fused_result = fused.apply(ImageData.load(str(IMAGE_PATH))).get_array()
+    unfused_result = unfused.apply(ImageData.load(str(IMAGE_PATH))).get_array()
+
+    assert fused_result.dtype == unfused_result.dtype == np.uint8
+    diff = np.abs(fused_result.astype(int) - unfused_result.astype(int))
+    assert diff.max() <= FusedPointwiseOperation.TOLERANCE
+    assert diff.mean() < 1.0
+
+
+def test_lookup_tables_compose_into_one_operation():
+    operations = OperationPipeline.create_from_config(
+        BRIGHTNESS_CHAIN, precision="uint8").operations
+    assert len(operations) == 1
+    assert isinstance(operations[0], LookupTableOperation)
+    assert operations[0].table.shape == (256,)
+    assert operations[0].table.dtype == np.uint8
+
+
+def test_lookup_table_matches_sequential_operations():
+    lut = OperationPipeline.create_from_config(BRIGHTNESS_CHAIN, precision="uint8")
+    plain = OperationPipeline.create_from_config(BRIGHTNESS_CHAIN, fuse=False, lut=False,
+                                                 precision="uint8")
+    lut_result = lut.apply(ImageData.load(str(IMAGE_PATH))).get_array()
+    plain_result = plain.apply(ImageData.load(str(IMAGE_PATH))).get_array()
+    assert np.array_equal(lut_result, plain_result)
+
+
+def test_lookup_table_falls_back_on_float_input():
+    operation = LookupTableOperation([BrightnessAdjustment(2.0)])
+    arr = np.array([[10.5, 200.0]], dtype=np.float32)
+    np.testing.assert_allclose(operation.process(arr), [[21.0, 255.0]])
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+from core.config import Config
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert, value_max, working_dtype
+from operations.operation_factory import OperationFactory
+
+OPERATIONS = [
+    {"type": "brightness", "value": 1.3},
+    {"type": "contrast", "value": 1.2},
+    {"type": "saturation", "value": 1.5},
+    {"type": "box", "width": 3, "height": 5},
+    {"type": "sharpen", "value": 1.0},
+    {"type": "sobel"},
+]
+
+
+@pytest.fixture
+def image(random_image):
+    return random_image(24, 32)
+
+
+def test_convert_rescales_between_ranges(image):
+    wide = convert(image, np.uint16)
+    assert wide.max() <= 65535 and np.array_equal(wide, image.astype(np.uint16) * 257)
+    assert np.array_equal(convert(wide, np.uint8), image)
+    assert convert(image, np.uint8) is image
+    floats = np.array([-3.0, 12.9, 254.99, 300.0], dtype=np.float32)
+    assert convert(floats, np.uint8).tolist() == [0, 12, 254, 255]
+    assert value_max(np.float32) == value_max(np.uint8) == 255
+
+
+@pytest.mark.parametrize("config", OPERATIONS, ids=lambda config: config["type"])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, np.uint16, np.uint8])
+def test_operations_keep_the_working_dtype(config, dtype, image):
+    operation = OperationFactory.create(dict(config))
+    result = operation.apply(ImageData(convert(image, dtype))).get_array()
+    assert result.dtype == dtype
+    assert result.min() >= 0 and result.max() <= value_max(dtype)
+
+
+@pytest.mark.parametrize("precision", ["float32", "float64", "uint16"])
+def test_precisions_agree_after_the_final_cast(precision, image):
+    reference = OperationPipeline.create_from_config(OPERATIONS[:5], precision="float64")
+    pipeline = OperationPipeline.create_from_config(OPERATIONS[:5], precision=precision)
+    expected = convert(reference.apply(ImageData(image.copy())).get_array(), np.uint8)
+    result = pipeline.apply(ImageData(image.copy()))
+    assert result.get_array().dtype == working_dtype(precision)
+    diff = np.abs(convert(result.get_array(), np.uint8).astype(int) - expected)
+    assert diff.max() <= 1
+
+
+def test_no_quantization_between_steps():
+    config = [{"type": "brightness", "value": 0.5}, {"type": "brightness", "value": 2.0}]
+    image = np.array([[[1, 3, 201]]], dtype=np.uint8)
+    quantized = OperationPipeline.create_from_config(config, precision="uint8").apply(
+        ImageData(image.copy()))
+    assert quantized.get_array().tolist() == [[[0, 2, 200]]]
+    exact = OperationPipeline.create_from_config(config).apply(ImageData(image.copy()))
+    assert convert(exact.get_array(), np.uint8).tolist() == [[[1, 3, 201]]]
+
+
+def test_invalid_precision(tmp_path):
+    with pytest.raises(ValueError):
+        OperationPipeline.create_from_config(OPERATIONS, precision="int8")
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"operations": OPERATIONS, "precision": "half"}))
+    with pytest.raises(ValueError):
+        Config(str(config_path), batch=True)
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+from core.raw_image import write_raw
+
+IMGS_DIR = Path(__file__).parent / "imgs"
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+@pytest.mark.parametrize("name", ["mona_lisa.jpg", "tiger.png"])
+def test_load_at_reduced_scale(name):
+    width, height = Image.open(IMGS_DIR / name).size
+    for scale in (2, 4, 8):
+        image = ImageData.load(str(IMGS_DIR / name), scale=scale).get_array()
+        assert image.shape == (-(-height // scale), -(-width // scale), 3)
+    with pytest.raises(ValueError):
+        ImageData.load(str(IMGS_DIR / name), scale=3)
+
+
+def test_load_raw_at_reduced_scale(tmp_path):
+    array = np.arange(10 * 6 * 3, dtype=np.uint8).reshape(10, 6, 3)
+    write_raw(str(tmp_path / "a.imraw"), array)
+    assert np.array_equal(ImageData.load(str(tmp_path / "a.imraw"), scale=4).get_array(),
+                          array[::4, ::4])
+
+
+def test_scaled_operations():
+    pipeline = OperationPipeline.create_from_config(
+        [{"type": "box", "width": 15, "height": 5}, {"type": "sharpen", "value": 1.0},
+         {"type": "brightness", "value": 1.2}, {"type": "contrast", "value": 1.1}])
+    box, sharpen, fused = pipeline.scaled(4).operations
+    assert (box.width, box.height, box.footprint()) == (5, 1, (0, 2))
+    assert sharpen.kernel.shape == (3, 3)
+    assert fused is pipeline.operations[2]
+    assert pipeline.scaled(4).options["scale"] == 4
+    # the original pipeline is unchanged
+    assert (pipeline.operations[0].width, pipeline.operations[1].kernel.shape) == (15, (5, 5))
+
+
+def test_preview_matches_reduced_full_render():
+    path = str(IMGS_DIR / "mona_lisa.jpg")
+    pipeline = OperationPipeline.create_from_config(
+        [{"type": "box", "width": 15, "height": 15}, {"type": "sharpen", "value": 1.5}])
+    full = convert(pipeline.apply(ImageData.load(path)).get_array(), np.uint8)
+    reference = np.asarray(Image.fromarray(full).reduce(4), dtype=float)
+
+    def error(preview_pipeline):
+        preview = preview_pipeline.apply(ImageData.load(path, scale=4)).get_array()
+        return np.abs(convert(preview, np.uint8).astype(float) - reference).mean()
+
+    assert error(pipeline.scaled(4)) < 2.0
+    assert error(pipeline.scaled(4)) < error(pipeline) / 2
+
+
+@pytest.mark.parametrize("flag", [["--profile"], ["--cache-dir", "cache"], ["--tiled"]])
+def test_cli_rejects_flags_preview_does_not_support(flag):
+    config = str(Path(__file__).parent / "configs" / "config1.json")
+    result = subprocess.run([sys.executable, "main.py", "--config", config, "--preview", "4"]
+                            + flag, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert f"{flag[0]} is not supported with --preview" in result.stderr
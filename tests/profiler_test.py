@@ -0,0 +1,41 @@
+import json
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.profiler import PipelineProfiler
+
+CONFIG = [
+    {"type": "box", "width": 3, "height": 3},
+    {"type": "contrast", "value": 1.1},
+    {"type": "saturation", "value": 2.0},
+    {"type": "sobel"},
+]
+
+
+def test_profiler_records_every_step(tmp_path, random_image):
+    pipeline = OperationPipeline.create_from_config(CONFIG)
+    seen = []
+    profiler = PipelineProfiler(callback=seen.append).attach(pipeline)
+    pipeline.apply(ImageData(random_image(20, 30)))
+
+    assert [step.index for step in seen] == [0, 1, 2]
+    assert seen[0].operation == "BoxBlurFilter"
+    assert seen[1].operation.startswith("FusedPointwiseOperation")
+    assert seen[2].input_shape == (20, 30, 3) and seen[2].output_dtype == "float32"
+    assert all(step.wall_s >= 0 and step.alloc_peak_bytes > 0 for step in seen)
+
+    path = tmp_path / "profile.json"
+    profiler.to_json(str(path))
+    report = json.loads(path.read_text())
+    assert len(report["steps"]) == 3
+    assert report["total_wall_s"] >= report["steps"][0]["wall_s"]
+
+
+def test_detached_profiler_records_nothing(random_image):
+    pipeline = OperationPipeline.create_from_config(CONFIG)
+    profiler = PipelineProfiler(trace_allocations=False).attach(pipeline)
+    pipeline.apply(ImageData(random_image(20, 30)))
+    profiler.detach(pipeline)
+    pipeline.apply(ImageData(random_image(20, 30)))
+    assert len(profiler.steps) == 3
+    assert profiler.steps[0].alloc_peak_bytes is None
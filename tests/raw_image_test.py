@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.batch import BatchProcessor
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.raw_image import ALIGNMENT, create_raw, open_raw, read_header, write_raw
+
+IMAGE_PATH = str(Path(__file__).parent / "imgs" / "tiger.png")
+
+
+@pytest.mark.parametrize("array", [
+    np.arange(24, dtype=np.uint8).reshape(2, 4, 3),
+    np.linspace(0, 255, 40, dtype=np.float32).reshape(5, 8),
+    np.zeros((3, 2, 4), dtype=np.float64),
+])
+def test_round_trip_keeps_shape_and_dtype(tmp_path, array):
+    path = str(tmp_path / "image.imraw")
+    ImageData(array).save(path)
+    header, offset = read_header(path)
+    assert offset % ALIGNMENT == 0
+    assert header["channel_order"] == {2: "L", 3: "RGB", 4: "RGBA"}[
+        array.shape[2] if array.ndim == 3 else 2]
+
+    loaded = ImageData.load(path).get_array()
+    assert isinstance(loaded, np.memmap)
+    assert not loaded.flags.writeable
+    assert loaded.dtype == array.dtype
+    assert np.array_equal(loaded, array)
+
+
+def test_pipeline_runs_on_mapped_input(tmp_path):
+    path = str(tmp_path / "tiger.imraw")
+    image = ImageData.load(IMAGE_PATH)
+    image.save(path)
+    config = [{"type": "box", "width": 3, "height": 3}, {"type": "contrast", "value": 1.2},
+              {"type": "brightness", "value": 1.1}, {"type": "sharpen", "value": 1.0},
+              {"type": "sobel"}]
+    expected = OperationPipeline.create_from_config(config).apply(image)
+    result = OperationPipeline.create_from_config(config).apply(ImageData.load(path))
+    assert np.array_equal(result.get_array(), expected.get_array())
+
+
+def test_bgr_is_opened_as_rgb_view(tmp_path):
+    rgb = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+    path = str(tmp_path / "bgr.imraw")
+    write_raw(path, rgb[:, :, ::-1], channel_order="BGR")
+    loaded = ImageData.open_raw(path).get_array()
+    assert np.array_equal(loaded, rgb)
+    assert loaded.strides[2] < 0  # a reversed view, not a copy
+
+
+def test_incremental_write_and_write_through(tmp_path):
+    path = str(tmp_path / "strips.imraw")
+    data = create_raw(path, (4, 3), np.uint16)
+    for row in range(4):
+        data[row] = row
+    data.flush()
+    del data
+
+    mapped = ImageData.open_raw(path, mode="r+").get_array()
+    mapped[0, 0] = 7
+    mapped.flush()
+    del mapped
+    assert open_raw(path)[0][:, 0].tolist() == [7, 1, 2, 3]
+
+
+def test_invalid_files(tmp_path):
+    path = tmp_path / "bad.imraw"
+    path.write_bytes(b"not a raw image file")
+    with pytest.raises(ValueError):
+        ImageData.load(str(path))
+
+    write_raw(str(path), np.zeros((4, 4, 3), dtype=np.uint8))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        ImageData.load(str(path))
+
+    with pytest.raises(ValueError):
+        create_raw(str(path), (4, 4, 3), np.uint8, channel_order="RGBA")
+
+
+def test_batch_writes_raw_outputs(tmp_path):
+    pipeline = OperationPipeline.create_from_config([{"type": "brightness", "value": 0.5}])
+    report = BatchProcessor(pipeline, str(tmp_path), workers=1,
+                            output_extension=".imraw").run([IMAGE_PATH])
+    assert report.succeeded == 1
+    expected = pipeline.apply(ImageData.load(IMAGE_PATH)).get_array()
+    assert np.array_equal(ImageData.load(report.results[0].output_path).get_array(), expected)
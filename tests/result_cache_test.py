@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.result_cache import ResultCache
+
+IMAGE_PATH = str(Path(__file__).parent / "imgs" / "square.jpg")
+
+CONFIG = [
+    {"type": "box", "width": 3, "height": 3},
+    {"type": "sobel"},
+    {"type": "brightness", "value": 1.5},
+]
+
+
+def _run(config, cache, **options):
+    """Run the config through the cache; return (result, steps run, loaded)."""
+    pipeline = OperationPipeline.create_from_config(config, **options)
+    ran = []
+    loaded = []
+    pipeline.add_after_hook(lambda index, operation, image: ran.append(index))
+
+    def load():
+        loaded.append(True)
+        return ImageData.load(IMAGE_PATH)
+
+    result = pipeline.apply_cached(load, cache, ResultCache.file_hash(IMAGE_PATH))
+    return result.get_array(), ran, bool(loaded)
+
+
+def test_rerun_resumes_from_longest_cached_prefix(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    first, ran, loaded = _run(CONFIG, cache)
+    assert ran == [0, 1, 2] and loaded
+
+    # identical config: nothing runs, the input is not even decoded
+    again, ran, loaded = _run(CONFIG, cache)
+    assert ran == [] and not loaded
+    assert np.array_equal(again, first)
+
+    # only the last operation changed: resume after step 1
+    tweaked = CONFIG[:2] + [{"type": "brightness", "value": 0.5}]
+    result, ran, loaded = _run(tweaked, cache)
+    assert ran == [2] and not loaded
+    expected = OperationPipeline.create_from_config(tweaked).apply(ImageData.load(IMAGE_PATH))
+    assert np.array_equal(result, expected.get_array())
+
+
+def test_unfused_pointwise_tail_resumes_at_changed_operation(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    tail = [{"type": "brightness", "value": 1.2}, {"type": "contrast", "value": 1.3},
+            {"type": "saturation", "value": 1.5}]
+    _, ran, _ = _run(tail, cache, fuse=False, lut=False)
+    assert ran == [0, 1, 2]
+    tweaked = tail[:2] + [{"type": "saturation", "value": 0.5}]
+    result, ran, loaded = _run(tweaked, cache, fuse=False, lut=False)
+    assert ran == [2] and not loaded
+    expected = OperationPipeline.create_from_config(tweaked, fuse=False).apply(
+        ImageData.load(IMAGE_PATH))
+    assert np.array_equal(result, expected.get_array())
+
+
+def test_disk_tier_survives_new_cache_instance(tmp_path):
+    _run(CONFIG, ResultCache(str(tmp_path / "cache")))
+    _, ran, _ = _run(CONFIG, ResultCache(str(tmp_path / "cache")))
+    assert ran == []
+
+
+def test_prefix_key_is_canonical():
+    a = ResultCache.prefix_key("h", [{"type": "Box", "width": 3, "height": 5}])
+    b = ResultCache.prefix_key("h", [{"height": 5, "type": "box", "width": 3}])
+    assert a == b
+    assert a != ResultCache.prefix_key("other", [{"type": "box", "width": 3, "height": 5}])
+    assert a != ResultCache.prefix_key("h", [{"type": "box", "width": 3, "height": 5}],
+                                       {"fuse": False})
+
+
+def test_lru_eviction_under_byte_budgets(tmp_path):
+    array = np.zeros(1000, dtype=np.uint8)
+    cache = ResultCache(str(tmp_path), max_bytes=2500, memory_max_bytes=2000)
+    for key in ("a", "b", "c"):
+        cache.put(key, array)
+        os.utime(tmp_path / f"{key}.npy", (0, {"a": 1, "b": 2, "c": 3}[key]))
+    assert cache.get("a") is None          # evicted from memory and disk
+    assert not (tmp_path / "a.npy").exists()
+    assert cache.get("c") is not None
+    assert not cache.get("c").flags.writeable
@@ -0,0 +1,126 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.config import Config
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.profiler import PipelineProfiler
+from core.roi import RegionProcessor
+from core.tiled import PILSource
+
+IMAGE_PATH = str(Path(__file__).parent / "imgs" / "tiger.png")
+PROJECT_ROOT = Path(__file__).parent.parent
+
+CONFIGS = [
+    [{"type": "box", "width": 5, "height": 7}, {"type": "sharpen", "value": 1.0}],
+    # global statistics: contrast inside a fused step, sobel after a blur
+    [{"type": "brightness", "value": 1.2}, {"type": "contrast", "value": 1.5},
+     {"type": "box", "width": 3, "height": 3}, {"type": "sobel"}],
+    [{"type": "brightness", "value": 1.2}, {"type": "saturation", "value": 1.3}],
+]
+
+# interior, corners, full width, a single pixel on the border
+REGIONS = [(40, 30, 25, 18), (0, 0, 9, 6), (0, 50, None, 4), (None, None, 1, 1)]
+
+
+@pytest.fixture(scope="module")
+def image():
+    return ImageData.load(IMAGE_PATH).get_array()
+
+
+def _region(region, shape):
+    x, y, width, height = region
+    width = shape[1] if width is None else width
+    return (shape[1] - width if x is None else x, shape[0] - height if y is None else y,
+            width, height)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("region", REGIONS)
+def test_region_matches_crop_of_whole_image(image, config, region):
+    x, y, width, height = _region(region, image.shape)
+    pipeline = OperationPipeline.create_from_config(config)
+    expected = pipeline.apply(ImageData(image.copy())).get_array()
+    result = RegionProcessor(pipeline).process(image, (x, y, width, height))
+    assert result.dtype == expected.dtype
+    assert np.array_equal(result, expected[y:y + height, x:x + width])
+
+
+def test_input_region_grows_by_kernel_radius():
+    shape = (100, 120, 3)
+    pipeline = OperationPipeline.create_from_config(CONFIGS[1], fuse=False)
+    processor = RegionProcessor(pipeline)
+    # box 3x3 and sobel: one pixel each; brightness and contrast: none
+    assert processor.input_region((40, 30, 10, 5), shape) == (38, 28, 14, 9)
+    assert processor.input_region((0, 0, 10, 5), shape) == (0, 0, 12, 7)
+    assert processor.input_region((110, 95, 10, 5), shape) == (108, 93, 12, 7)
+    pointwise = RegionProcessor(OperationPipeline.create_from_config(CONFIGS[2]))
+    assert pointwise.input_region((40, 30, 10, 5), shape) == (40, 30, 10, 5)
+
+
+def test_local_statistics_use_only_the_region(image):
+    pipeline = OperationPipeline.create_from_config([{"type": "contrast", "value": 1.5}])
+    region = (40, 30, 25, 18)
+    crop = image[30:48, 40:65]
+    result = RegionProcessor(pipeline, exact_statistics=False).process(image, region)
+    assert np.array_equal(result, pipeline.apply(ImageData(crop.copy())).get_array())
+
+
+def test_run_reads_pil_and_raw_files(tmp_path, image):
+    pipeline = OperationPipeline.create_from_config(CONFIGS[0])
+    expected = pipeline.apply(ImageData(image.copy())).get_array()[30:48, 40:65]
+    ImageData(image).save_raw(str(tmp_path / "in.imraw"))
+    for path in (IMAGE_PATH, str(tmp_path / "in.imraw")):
+        result = RegionProcessor(pipeline).run(path, (40, 30, 25, 18)).get_array()
+        assert np.array_equal(result, expected)
+    assert np.array_equal(PILSource(IMAGE_PATH)[30:48, 40:65], image[30:48, 40:65])
+
+
+@pytest.mark.parametrize("region", [(0, 0, 0, 5), (-1, 0, 5, 5), (200, 0, 1000, 5), (1, 2, 3)])
+def test_invalid_region_raises(image, region):
+    pipeline = OperationPipeline.create_from_config(CONFIGS[0])
+    with pytest.raises(ValueError):
+        RegionProcessor(pipeline).process(image, region)
+
+
+@pytest.mark.parametrize("roi", [[0, 0, 5], [0, 0, 0, 5], [-1, 0, 5, 5], [0, 0, 5.5, 5], "0,0,5,5"])
+def test_config_rejects_invalid_roi(roi):
+    with pytest.raises(ValueError):
+        Config.from_dict({"input": IMAGE_PATH, "output": "out.png", "roi": roi,
+                          "operations": CONFIGS[0]})
+
+
+def test_region_steps_run_the_pipeline_hooks(image):
+    pipeline = OperationPipeline.create_from_config(CONFIGS[1])
+    profiler = PipelineProfiler(trace_allocations=False).attach(pipeline)
+    RegionProcessor(pipeline).process(image, (40, 30, 25, 18))
+    assert [step.index for step in profiler.steps] == list(range(len(pipeline)))
+    # the region plus the 2 pixel halo of the box and sobel steps
+    assert profiler.steps[0].input_shape == (22, 29, 3)
+
+
+@pytest.mark.parametrize("flags, message", [
+    (["--roi", "1,2,3,4", "--cache-dir", "cache"], "--cache-dir is not supported with --roi"),
+    (["--roi", "1,2,3,4", "--preview", "2"], "--preview is not supported with --roi"),
+    (["--roi", "1,2,3,4", "--tiled"], "--tiled is not supported with --roi"),
+    (["--roi-local-stats"], "--roi-local-stats needs --roi"),
+])
+def test_cli_rejects_flags_roi_does_not_support(tmp_path, flags, message):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"input": IMAGE_PATH, "output": str(tmp_path / "out.png"),
+                                       "operations": CONFIGS[0]}))
+    result = subprocess.run([sys.executable, "main.py", "--config", str(config_path)] + flags,
+                            cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert message in result.stderr
+
+
+def test_config_rejects_roi_with_branches(tmp_path):
+    with pytest.raises(ValueError):
+        Config.from_dict({"input": IMAGE_PATH, "roi": [0, 0, 5, 5], "operations": CONFIGS[0],
+                          "branches": [{"output": str(tmp_path / "a.png")}]})
@@ -0,0 +1,159 @@
+import base64
+import json
+import socket
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+
+IMGS_DIR = Path(__file__).parent / "imgs"
+OPERATIONS = [{"type": "brightness", "value": 1.2}, {"type": "box", "width": 3, "height": 3}]
+
+
+@pytest.fixture(scope="module")
+def output_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("outputs")
+
+
+@pytest.fixture(scope="module")
+def server(output_dir):
+    from core.server import ImageServer
+
+    server = ImageServer(port=0, workers=2, roots=[str(IMGS_DIR), str(output_dir)]).start()
+    yield server
+    server.shutdown()
+
+
+def request(server, path, payload=None):
+    host, port = server.address
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    with urllib.request.urlopen(f"http://{host}:{port}{path}", data=data, timeout=60) as response:
+        return response.status, response.headers["Content-Type"], response.read()
+
+
+def expected(path):
+    result = OperationPipeline.create_from_config(OPERATIONS).apply(ImageData.load(str(path)))
+    return convert(result.get_array(), np.uint8)
+
+
+def test_process_path_and_base64_inputs(server):
+    path = IMGS_DIR / "square.jpg"
+    status, content_type, body = request(
+        server, "/process", {"input": str(path), "operations": OPERATIONS})
+    assert (status, content_type) == (200, "image/png")
+    assert np.array_equal(ImageData.from_bytes(body).get_array(), expected(path))
+
+    encoded = base64.b64encode(path.read_bytes()).decode("ascii")
+    _, _, body = request(server, "/process", {"input_base64": encoded, "operations": OPERATIONS})
+    assert np.array_equal(ImageData.from_bytes(body).get_array(), expected(path))
+
+
+def test_process_writes_output_path(server, output_dir):
+    output = output_dir / "out" / "result.png"
+    status, content_type, body = request(server, "/process", {
+        "input": str(IMGS_DIR / "square.jpg"), "output": str(output), "operations": OPERATIONS})
+    assert (status, content_type) == (200, "application/json")
+    assert json.loads(body) == {"output": str(output)}
+    assert np.array_equal(ImageData.load(str(output)).get_array(),
+                          expected(IMGS_DIR / "square.jpg"))
+
+
+def test_concurrent_requests_and_metrics(server):
+    payload = {"input": str(IMGS_DIR / "square.jpg"),
+               "operations": [{"type": "Contrast", "value": 1.1}]}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        bodies = list(executor.map(lambda _: request(server, "/process", payload)[2], range(8)))
+    assert all(body == bodies[0] for body in bodies)
+
+    _, _, body = request(server, "/metrics")
+    metrics = json.loads(body)
+    assert metrics["requests"] >= 8
+    assert metrics["in_flight"] == 0 and metrics["queue_depth"] == 0
+    # every worker builds the pipeline at most once
+    assert metrics["cache_hits"] >= 8 - server.workers
+    assert set(metrics["latency_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+
+
+def test_every_worker_is_started_before_serving(server):
+    assert len(set(server.worker_pids)) == server.workers == 2
+
+
+def test_invalid_requests_are_rejected(server):
+    for payload in ({"input": str(IMGS_DIR / "square.jpg"), "operations": [{"type": "blur"}]},
+                    {"input": str(IMGS_DIR / "missing.png"), "operations": OPERATIONS},
+                    {"operations": OPERATIONS}):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(server, "/process", payload)
+        assert error.value.code == 400
+        assert "error" in json.loads(error.value.read())
+
+    errors_before = json.loads(request(server, "/metrics")[2])["errors"]
+    assert errors_before >= 3
+    assert json.loads(request(server, "/health")[2]) == {"status": "ok"}
+
+
+@pytest.mark.parametrize("extra", [
+    {"roi": [0, 0, 5, 5]},
+    {"branches": [{"operations": OPERATIONS, "output": "a.png"}]},
+    {"display": True},
+])
+def test_unsupported_config_keys_are_rejected(server, extra):
+    payload = dict(extra, input=str(IMGS_DIR / "square.jpg"), operations=OPERATIONS)
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(server, "/process", payload)
+    assert error.value.code == 400
+    assert list(extra)[0] in json.loads(error.value.read())["error"]
+
+
+def test_negative_content_length_is_rejected(server):
+    host, port = server.address
+    with socket.create_connection((host, port), timeout=10) as connection:
+        connection.sendall(b"POST /process HTTP/1.1\r\nHost: x\r\nContent-Length: -1\r\n\r\n")
+        status_line = connection.makefile("rb").readline()
+    assert status_line.split()[1] == b"400"
+
+
+@pytest.mark.parametrize("payload", [
+    {"input": "/etc/hostname"},
+    {"input": str(IMGS_DIR / ".." / "server_test.py")},
+    {"input": str(IMGS_DIR / "square.jpg"), "output": "/tmp/escaped.png"},
+])
+def test_paths_outside_roots_are_forbidden(server, payload):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(server, "/process", dict(payload, operations=OPERATIONS))
+    assert error.value.code == 403
+
+
+def test_relative_paths_are_taken_from_the_first_root(server):
+    status, _, body = request(server, "/process", {"input": "square.jpg", "operations": OPERATIONS})
+    assert status == 200
+    assert np.array_equal(ImageData.from_bytes(body).get_array(), expected(IMGS_DIR / "square.jpg"))
+
+
+def test_remote_host_needs_opt_in():
+    from core.server import ImageServer
+
+    with pytest.raises(ValueError):
+        ImageServer(host="0.0.0.0", port=0, workers=1)
+
+
+def test_server_without_roots_takes_no_paths():
+    from core.server import ImageServer
+
+    server = ImageServer(port=0, workers=1)
+    try:
+        with pytest.raises(PermissionError):
+            server.process({"input": str(IMGS_DIR / "square.jpg"), "operations": OPERATIONS})
+        encoded = base64.b64encode((IMGS_DIR / "square.jpg").read_bytes()).decode("ascii")
+        body, _ = server.process({"input_base64": encoded, "operations": OPERATIONS})
+        assert np.array_equal(ImageData.from_bytes(body).get_array(),
+                              expected(IMGS_DIR / "square.jpg"))
+    finally:
+        server.shutdown()
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.session import EditSession, watch
+
+CHAIN = [
+    {"type": "box", "width": 5, "height": 5},
+    {"type": "brightness", "value": 1.2},
+    {"type": "contrast", "value": 1.3},
+    {"type": "saturation", "value": 1.5},
+]
+
+
+@pytest.fixture
+def image(random_image):
+    return random_image(20, 27)
+
+
+def _expected(image, operations):
+    pipeline = OperationPipeline.create_from_config(operations, fuse=False)
+    return pipeline.apply(ImageData(image.copy())).get_array()
+
+
+def test_render_recomputes_from_first_changed_step(image):
+    session = EditSession(ImageData(image))
+    assert np.array_equal(session.render(CHAIN).get_array(), _expected(image, CHAIN))
+    assert (session.last_stats.reused_steps, session.last_stats.computed_steps) == (0, 4)
+
+    changed = [dict(op) for op in CHAIN]
+    changed[3]["value"] = 0.5
+    assert np.array_equal(session.render(changed).get_array(), _expected(image, changed))
+    assert (session.last_stats.reused_steps, session.last_stats.computed_steps) == (3, 1)
+
+    changed[1]["value"] = 0.9
+    assert np.array_equal(session.render(changed).get_array(), _expected(image, changed))
+    assert (session.last_stats.reused_steps, session.last_stats.computed_steps) == (1, 3)
+
+    # a shorter chain is all cached; an invalid one keeps the cache
+    assert np.array_equal(session.render(changed[:2]).get_array(), _expected(image, changed[:2]))
+    assert session.last_stats.computed_steps == 0
+    with pytest.raises(ValueError):
+        session.render(changed[:2] + [{"type": "contrast"}])
+    session.render(changed[:2])
+    assert session.last_stats.computed_steps == 0
+
+
+def test_intermediates_stay_at_working_precision(image):
+    session = EditSession(ImageData(image))
+    session.render(CHAIN)
+    assert all(result.get_array().dtype == np.float32 for result in session._results)
+
+
+def test_watch_re_renders_on_change(tmp_path, image):
+    ImageData(image).save(str(tmp_path / "in.png"))
+    config_path = tmp_path / "config.json"
+    config = {"input": str(tmp_path / "in.png"), "output": str(tmp_path / "out.png"),
+              "operations": CHAIN}
+    config_path.write_text(json.dumps(config))
+
+    renders = []
+    first = threading.Event()
+
+    def on_render(result, stats):
+        renders.append(stats)
+        first.set()
+
+    thread = threading.Thread(target=watch, args=(str(config_path),), kwargs=dict(
+        interval=0.01, on_render=on_render, stop=lambda: len(renders) >= 2))
+    thread.start()
+    assert first.wait(timeout=30)
+    config["operations"] = CHAIN[:3] + [{"type": "saturation", "value": 0.2}]
+    config_path.write_text(json.dumps(config))
+    # make sure the modification time changes even on coarse clocks
+    mtime = os.stat(config_path).st_mtime_ns + 10 ** 9
+    os.utime(config_path, ns=(mtime, mtime))
+    thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert [(stats.reused_steps, stats.computed_steps) for stats in renders] == [(0, 4), (3, 1)]
+    assert os.path.exists(tmp_path / "out.png")
+
+
+def _touch(path):
+    """Make sure the modification time changes even on coarse clocks."""
+    mtime = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_watch_survives_missing_config_and_reloads_changed_input(tmp_path, image):
+    input_path = tmp_path / "in.png"
+    ImageData(image).save(str(input_path))
+    config_path = tmp_path / "config.json"
+    config = {"input": str(input_path), "output": str(tmp_path / "out.png"),
+              "operations": CHAIN}
+    config_path.write_text(json.dumps(config))
+
+    renders = []
+    rendered = threading.Semaphore(0)
+
+    def on_render(result, stats):
+        renders.append((result.get_array(), stats))
+        rendered.release()
+
+    thread = threading.Thread(target=watch, args=(str(config_path),), kwargs=dict(
+        interval=0.01, on_render=on_render, stop=lambda: len(renders) >= 3))
+    thread.start()
+    assert rendered.acquire(timeout=30)
+
+    # an editor saving through a rename: the file is briefly missing
+    os.remove(config_path)
+    time.sleep(0.1)
+    assert thread.is_alive()
+    config_path.write_text(json.dumps(config))
+    _touch(config_path)
+    assert rendered.acquire(timeout=30)
+
+    # only the input changes: a new session on the new image
+    changed = 255 - image
+    ImageData(changed).save(str(input_path))
+    _touch(input_path)
+    thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert [(stats.reused_steps, stats.computed_steps) for _, stats in renders] == [
+        (0, 4), (4, 0), (0, 4)]
+    assert np.array_equal(renders[2][0], _expected(changed, CHAIN))
@@ -0,0 +1,14 @@
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def test_import_main_skips_display_and_codec_modules():
+    """matplotlib and PIL are only imported when an image is shown/loaded."""
+    code = ("import sys, main; "
+            "print(','.join(m for m in ('matplotlib', 'PIL') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,80 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.image_data import ImageData
+from core.pipeline import OperationPipeline
+from core.precision import convert
+from core.tiled import TiledProcessor
+
+IMAGE_PATH = str(Path(__file__).parent / "imgs" / "tiger.png")
+PROJECT_ROOT = Path(__file__).parent.parent
+
+CONFIGS = [
+    [{"type": "box", "width": 5, "height": 7}, {"type": "sharpen", "value": 1.0}],
+    # global statistics: contrast inside a fused step, sobel after a blur
+    [{"type": "brightness", "value": 1.2}, {"type": "contrast", "value": 1.5},
+     {"type": "box", "width": 3, "height": 3}, {"type": "sobel"}],
+    [{"type": "box", "width": 9, "height": 9}, {"type": "contrast", "value": 1.5},
+     {"type": "saturation", "value": 1.3}],
+]
+
+
+@pytest.fixture(scope="module")
+def image():
+    return ImageData.load(IMAGE_PATH).get_array()
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("tile_rows", [1, 7, 64, 10_000])
+def test_tiled_matches_whole_image(image, config, tile_rows):
+    pipeline = OperationPipeline.create_from_config(config)
+    expected = pipeline.apply(ImageData(image.copy())).get_array()
+    result = TiledProcessor(pipeline, tile_rows=tile_rows).process(image)
+    assert result.dtype == expected.dtype
+    assert np.array_equal(result, expected)
+
+
+def test_statistic_pass_does_not_change_pipeline(image):
+    pipeline = OperationPipeline.create_from_config([{"type": "sobel"}])
+    TiledProcessor(pipeline, tile_rows=16).process(image)
+    assert pipeline.operations[0].max_magnitude is None
+
+
+def test_run_streams_npy_and_encodes_png(tmp_path, image):
+    config = CONFIGS[1]
+    pipeline = OperationPipeline.create_from_config(config)
+    expected = pipeline.apply(ImageData(image.copy())).get_array()
+    np.save(tmp_path / "in.npy", image)
+
+    processor = TiledProcessor(pipeline, tile_bytes=64 * image.shape[1] * 3 * 8)
+    assert processor.rows_per_strip(image.shape) == 64
+    processor.run(str(tmp_path / "in.npy"), str(tmp_path / "out.npy"))
+    assert np.array_equal(np.load(tmp_path / "out.npy"), expected)
+
+    processor.run(IMAGE_PATH, str(tmp_path / "out.png"))
+    assert np.array_equal(np.array(Image.open(tmp_path / "out.png")),
+                          convert(expected, np.uint8))
+
+    processor.run(str(tmp_path / "out.npy"), str(tmp_path / "again.imraw"))
+    processor.run(str(tmp_path / "again.imraw"), str(tmp_path / "again.npy"))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "again.imraw", "again.npy", "in.npy", "out.npy", "out.png"]
+
+
+@pytest.mark.parametrize("flag", [["--profile"], ["--cache-dir", "cache"]])
+def test_cli_rejects_flags_tiled_does_not_support(flag):
+    config = str(Path(__file__).parent / "configs" / "config1.json")
+    result = subprocess.run([sys.executable, "main.py", "--config", config, "--tiled"] + flag,
+                            cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert f"{flag[0]} is not supported with --tiled" in result.stderr
+
+
+def test_invalid_tile_rows():
+    with pytest.raises(ValueError):
+        TiledProcessor(OperationPipeline.create_from_config(CONFIGS[0]), tile_rows=0)